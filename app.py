@@ -21,6 +21,15 @@ from flask_jwt_extended import (                     # JWT for authentication
     JWTManager                                       # JWT manager
 )
 from flask_cors import CORS
+from utils.receipt_worker import start_receipt_workers  # Background receipt rendering pool
+from utils.migrations import run_migrations            # Create tables + apply pending schema changes
+from utils import token_store                          # Refresh-token revocation store
+from utils.sqlite_tuning import configure_sqlite       # SQLite profile for the local/edge fallback
+from utils.traffic_capture import init_capture         # Record-and-replay traffic capture
+from utils.metrics import init_metrics                 # Prometheus metrics
+from utils.nplusone import init_nplusone               # N+1 query detector
+from utils.profiler import init_profiler               # On-demand / rolling request profiler
+from utils.json_provider import FastJSONProvider       # orjson-backed JSON with exact Decimals
 
 
 app = Flask(__name__)                                 # Create Flask application
@@ -29,18 +38,49 @@ app = Flask(__name__)                                 # Create Flask application
 CORS(app, origins=["https://bank-frontend-self.vercel.app"])
 # Create database configuration
 app.config.from_object(Config)                        # Load configuration from Config class
+app.json = FastJSONProvider(app)                      # Decimal → string, datetime → ISO-8601
 # app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///user.db"  # Override DB path for local SQLite
 
 # Initialize database
 db.init_app(app)                                      # Link SQLAlchemy with this Flask app
+configure_sqlite(app)                                 # WAL + pragmas when running on SQLite
 
 # Initialize JWT manager
 jwt = JWTManager(app)                                 # Enable JWT authentication
 
+# Refresh tokens are single-use (rotated on /auth/refresh) and can be revoked;
+# access tokens stay stateless so protected routes don't pay for a lookup
+@jwt.token_in_blocklist_loader
+def check_if_token_revoked(jwt_header, jwt_payload):
+    return jwt_payload.get("type") == "refresh" and token_store.is_revoked(jwt_payload)
+
 # Register all routes
 register_routes(app)                                  # Add routes from routes.py
 app.register_blueprint(auth_bp)                       # Add auth routes (login, signup) via blueprint
 
+# Opt-in: append sanitized request records to CAPTURE_PATH for replay benchmarks
+init_capture(app)
+
+# Request latency / SQL / receipt metrics, served at /metrics
+init_metrics(app)
+
+# Opt-in N+1 query detection (development / CI)
+init_nplusone(app)
+
+# Sampling profiler: admin ?profile=1 and PROFILE_SAMPLE_EVERY rolling mode
+init_profiler(app)
+
+# Start the receipt worker pool lazily, once per (forked) worker process
+@app.before_request
+def ensure_receipt_workers():
+    start_receipt_workers(app)
+
+# `flask --app app migrate` → bring an existing database up to date
+@app.cli.command("migrate")
+def migrate():
+    applied = run_migrations()
+    print("Applied:", ", ".join(applied) if applied else "nothing (up to date)")
+
 # Optional test routes (commented out)
 # @app.route("/")
 # def home():
@@ -60,7 +100,7 @@ app.register_blueprint(auth_bp)                       # Add auth routes (login,
 
 if __name__ == "__main__":                             # Only run if file executed directly
     with app.app_context():                            # Ensure app context for DB operations
-        db.create_all()                                # Create all tables if they don't exist
+        run_migrations()                               # Create missing tables and indexes
     app.run(debug=True)                                # Start Flask app in debug mode
 
 
@@ -0,0 +1,82 @@
+"""History lookup time vs. row count, with and without the hot lookup indexes.
+
+Uses an in-memory SQLite database built from the models' metadata; no Flask
+app or server needed. Run from the repo root:
+
+    python -m benchmarks.bench_indexes --rows 10000 100000 500000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert, select  # noqa: E402
+
+from models import db, Account, Transaction, User  # noqa: E402
+
+HOT_INDEXES = [ix for ix in list(Transaction.__table__.indexes) + list(Account.__table__.indexes)
+               if ix.name in ("ix_transactions_account_id_date_added",
+                              "ix_transactions_user_id_date_added", "ix_accounts_user_id")]
+
+
+def build(rows, users=1000, accounts=2000):
+    engine = create_engine("sqlite://")
+    db.metadata.create_all(engine)
+    for ix in HOT_INDEXES:                             # Start from the pre-migration schema
+        ix.drop(engine)
+
+    rng = random.Random(42)
+    start = datetime(2025, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": u, "username": f"u{u}", "name": "x", "dob": start.date(),
+             "email": f"u{u}@x", "password_hash": "x"} for u in range(1, users + 1)])
+        conn.execute(insert(Account), [
+            {"id": a, "user_id": rng.randint(1, users), "balance": 0} for a in range(1, accounts + 1)])
+        conn.execute(insert(Transaction), [
+            {"user_id": rng.randint(1, users), "account_id": rng.randint(1, accounts),
+             "amount": rng.randint(1, 10000) / 100, "transaction_type": "deposit",
+             "date_added": start + timedelta(seconds=30 * i)} for i in range(rows)])
+    return engine
+
+
+def lookups(engine, n=200):
+    rng = random.Random(7)
+    queries = [
+        lambda conn, k: conn.execute(
+            select(Transaction.id).where(Transaction.account_id == k)
+            .order_by(Transaction.date_added.desc()).limit(20)).all(),
+        lambda conn, k: conn.execute(
+            select(Transaction.id).where(Transaction.user_id == k)
+            .order_by(Transaction.date_added.desc()).limit(20)).all(),
+        lambda conn, k: conn.execute(select(Account.id).where(Account.user_id == k)).all(),
+    ]
+    with engine.connect() as conn:
+        t0 = time.perf_counter()
+        for _ in range(n):
+            for q in queries:
+                q(conn, rng.randint(1, 1000))
+        return (time.perf_counter() - t0) / (n * len(queries)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 50000, 200000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'no index (ms)':>15} {'indexed (ms)':>14} {'speedup':>9}")
+    for rows in args.rows:
+        engine = build(rows)
+        before = lookups(engine)
+        for ix in HOT_INDEXES:
+            ix.create(engine)
+        after = lookups(engine)
+        print(f"{rows:>10} {before:>15.3f} {after:>14.3f} {before / after:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Microbenchmarks for model/query hot paths and whole GET requests.
+
+Needs pytest-benchmark (skipped otherwise); see bench_serialization.py for
+how to save and compare runs.
+"""
+import pytest
+from sqlalchemy import func
+
+pytest.importorskip("pytest_benchmark")
+
+from models import db, Account, Transaction, User  # noqa: E402
+from utils.account_summary import account_summary  # noqa: E402
+from utils.pagination import keyset_page  # noqa: E402
+
+PAGE = 500
+
+
+def fresh_session(app, fn):
+    """Run ``fn`` in its own app context (new session, empty identity map), like a request."""
+    def run():
+        with app.app_context():
+            return fn()
+    return run
+
+
+def test_keyset_page_transactions(benchmark, app):
+    benchmark(fresh_session(app, lambda: keyset_page(Transaction.query, Transaction.id, PAGE, 10000)))
+
+
+def test_recent_transactions_for_user(benchmark, app):
+    benchmark(fresh_session(app, lambda: Transaction.query.filter_by(user_id=42)
+                            .order_by(Transaction.date_added.desc(), Transaction.id.desc()).limit(20).all()))
+
+
+def test_transaction_summary_group_by(benchmark, app):
+    benchmark(fresh_session(app, lambda: db.session.query(
+        Transaction.transaction_type, func.count(Transaction.id), func.sum(Transaction.amount)
+    ).filter(Transaction.user_id == 42).group_by(Transaction.transaction_type).all()))
+
+
+def test_account_summary_by_week(benchmark, app):
+    benchmark(fresh_session(app, lambda: account_summary(7, None, None, "week", 400)))
+
+
+def test_user_with_accounts(benchmark, app):
+    def run():
+        user = db.session.get(User, 42)
+        return user.to_dict(), [a.to_dict() for a in Account.query.filter_by(user_id=42).all()]
+    benchmark(fresh_session(app, run))
+
+
+def test_get_transactions_page_endpoint(benchmark, client):
+    benchmark(lambda: client.get(f"/transactions/?limit={PAGE}").get_data())
+
+
+def test_get_accounts_page_endpoint(benchmark, client):
+    benchmark(lambda: client.get("/accounts/?limit=400").get_data())
+
+
+def test_get_account_endpoint(benchmark, client):
+    benchmark(lambda: client.get("/accounts/7").get_data())
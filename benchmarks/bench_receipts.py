@@ -0,0 +1,67 @@
+"""Receipts/sec: reportlab ``generate_pdf_receipt`` vs the template-stamped engine.
+
+Run from the repo root:  python -m benchmarks.bench_receipts -n 2000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.pdf_generator import generate_pdf_receipt  # noqa: E402
+from utils.receipt_engine import render_receipt_pdf, write_receipts  # noqa: E402
+
+
+def fake_transactions(n):
+    start = datetime(2026, 1, 1)
+    return [
+        SimpleNamespace(
+            id=i,
+            user_id=i % 97 + 1,
+            account_id=i % 211 + 1,
+            transaction_type=("deposit", "withdrawal", "transfer_in", "transfer_out")[i % 4],
+            amount=Decimal(i % 100000) / 100,
+            date_added=start + timedelta(seconds=37 * i),
+        )
+        for i in range(1, n + 1)
+    ]
+
+
+def timed(label, n, fn):
+    t0 = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - t0
+    print(f"{label:<38} {n / elapsed:>10.0f} receipts/sec  ({elapsed:.3f}s)")
+    return n / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, default=1000, help="receipts per run")
+    args = parser.parse_args()
+
+    txns = fake_transactions(args.n)
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_dir = os.path.join(tmp, "legacy")
+        engine_dir = os.path.join(tmp, "engine")
+
+        def legacy():
+            for t in txns:
+                generate_pdf_receipt(t, os.path.join(legacy_dir, f"transaction_{t.id}.pdf"))
+
+        old = timed("generate_pdf_receipt (to disk)", args.n, legacy)
+        new = timed("receipt_engine.write_receipts (to disk)", args.n,
+                    lambda: write_receipts(txns, engine_dir))
+        timed("receipt_engine.render_receipt_pdf (bytes)", args.n,
+              lambda: [render_receipt_pdf(t) for t in txns])
+
+    print(f"speedup (to disk): {new / old:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
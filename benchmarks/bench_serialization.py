@@ -0,0 +1,118 @@
+"""Microbenchmarks for response building: to_dict, hand-built route dicts, jsonify, receipts.
+
+The jsonify / get_all_transactions() benchmarks run once per JSON provider,
+so Flask's default provider (with the old float amounts) is the "before".
+
+Needs pytest-benchmark (skipped otherwise). Run from the repo root, saving
+a baseline and comparing a later commit against it:
+
+    python -m pytest benchmarks/bench_serialization.py benchmarks/bench_queries.py --benchmark-autosave
+    python -m pytest benchmarks/bench_serialization.py benchmarks/bench_queries.py --benchmark-compare
+"""
+import tempfile
+
+import pytest
+from flask import jsonify
+from flask.json.provider import DefaultJSONProvider
+
+pytest.importorskip("pytest_benchmark")
+
+from routes.accounts import account_payload  # noqa: E402
+from routes.transactions import get_all_transactions, transaction_payload  # noqa: E402
+from utils.json_provider import FastJSONProvider  # noqa: E402
+from utils.pagination import MAX_LIMIT  # noqa: E402
+from utils.receipt_cache import ReceiptCache  # noqa: E402
+from utils.receipt_engine import render_receipts  # noqa: E402
+from utils.receipts import build_json_receipt, generate_receipts  # noqa: E402
+
+
+def test_user_to_dict(benchmark, users):
+    benchmark.extra_info["rows"] = len(users)
+    benchmark(lambda: [u.to_dict() for u in users])
+
+
+def test_account_route_dicts(benchmark, accounts):
+    benchmark.extra_info["rows"] = len(accounts)
+    benchmark(lambda: [account_payload(a) for a in accounts])
+
+
+def test_transaction_route_dicts(benchmark, transactions):
+    benchmark.extra_info["rows"] = len(transactions)
+    benchmark(lambda: [transaction_payload(t) for t in transactions])
+
+
+def test_transaction_to_dict(benchmark, transactions):
+    benchmark.extra_info["rows"] = len(transactions)
+    benchmark(lambda: [t.to_dict() for t in transactions])
+
+
+def test_float_amount(benchmark, transactions):
+    amounts = [t.amount for t in transactions]
+    benchmark.extra_info["rows"] = len(amounts)
+    benchmark(lambda: [float(a) for a in amounts])
+
+
+@pytest.fixture(params=["flask-default", "stdlib", "orjson"])
+def json_provider(request, app, monkeypatch):
+    """Swap app.json: Flask's own provider (the old behaviour) or FastJSONProvider on each backend."""
+    if request.param == "flask-default":
+        provider = DefaultJSONProvider(app)
+    else:
+        if request.param == "orjson":
+            pytest.importorskip("orjson")
+        provider = FastJSONProvider(app)
+        provider.use_orjson = request.param == "orjson"
+    monkeypatch.setattr(app, "json", provider)
+    return request.param
+
+
+def test_jsonify_transaction_page(benchmark, app, transactions, json_provider):
+    items = [transaction_payload(t) for t in transactions]
+    if json_provider == "flask-default":               # Routes used to send float(amount)
+        items = [{**item, "amount": float(item["amount"])} for item in items]
+    benchmark.extra_info["rows"] = len(items)
+
+    def run():
+        with app.test_request_context():
+            return jsonify({"items": items, "next_cursor": None}).get_data()
+    benchmark(run)
+
+
+def test_get_all_transactions_response(benchmark, app, json_provider):
+    benchmark.extra_info["rows"] = MAX_LIMIT
+
+    def run():
+        with app.test_request_context(f"/transactions/?limit={MAX_LIMIT}"):
+            return get_all_transactions().get_data()
+    benchmark(run)
+
+
+def test_build_json_receipt(benchmark, transactions):
+    benchmark.extra_info["rows"] = len(transactions)
+    benchmark(lambda: [build_json_receipt(t) for t in transactions])
+
+
+def test_render_receipts_pdf(benchmark, transactions):
+    batch = transactions[:500]
+    benchmark.extra_info["rows"] = len(batch)
+    benchmark(lambda: list(render_receipts(batch)))   # It's a generator
+
+
+def test_generate_receipts_cold(benchmark, transactions):
+    batch = transactions[:100]
+    benchmark.extra_info["rows"] = len(batch)
+
+    def setup():                                       # Fresh cache each round: every receipt is rendered
+        return (ReceiptCache(tempfile.mkdtemp(), 256 * 1024 * 1024),), {}
+
+    benchmark.pedantic(lambda cache: [generate_receipts(t, cache) for t in batch],
+                       setup=setup, rounds=10)
+
+
+def test_generate_receipts_warm(benchmark, transactions):
+    batch = transactions[:100]
+    cache = ReceiptCache(tempfile.mkdtemp(), 256 * 1024 * 1024)
+    for t in batch:
+        generate_receipts(t, cache)
+    benchmark.extra_info["rows"] = len(batch)
+    benchmark(lambda: [generate_receipts(t, cache) for t in batch])
@@ -0,0 +1,77 @@
+"""Fixtures for the pytest-benchmark microbenchmarks (bench_serialization.py, bench_queries.py).
+
+Everything runs against an in-memory SQLite database seeded once per session
+with a fixed RNG seed, so numbers are comparable across commits.
+pytest-benchmark comes with ``pip install -r requirements-dev.txt``.
+"""
+import os
+import random
+import sys
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["DATABASE_URL"] = "sqlite://"               # In-memory; never touches a real database
+os.environ.setdefault("RECEIPT_WORKERS", "0")          # No background threads sharing the connection
+os.environ.setdefault("CAPTURE_ENABLED", "0")
+
+N_USERS = 200
+ACCOUNTS_PER_USER = 2
+N_TRANSACTIONS = 20000
+TXN_TYPES = ("deposit", "withdrawal", "transfer_in", "transfer_out")
+
+
+@pytest.fixture(scope="session")
+def app():
+    from app import app as flask_app
+    from models import db, Account, Transaction, User
+
+    rng = random.Random(1234)
+    with flask_app.app_context():
+        db.create_all()
+        start = datetime(2026, 1, 1)
+        db.session.execute(db.insert(User), [
+            {"username": f"user{i}", "name": f"User {i}", "dob": date(1980 + i % 30, 1 + i % 12, 1 + i % 28),
+             "email": f"user{i}@example.com", "job": "Engineer", "password_hash": "x", "date_added": start}
+            for i in range(N_USERS)
+        ])
+        db.session.execute(db.insert(Account), [
+            {"user_id": u + 1, "account_type": ("checking", "savings")[a], "balance": Decimal("1000.00"),
+             "date_added": start}
+            for u in range(N_USERS) for a in range(ACCOUNTS_PER_USER)
+        ])
+        db.session.execute(db.insert(Transaction), [
+            {"user_id": (acct - 1) // ACCOUNTS_PER_USER + 1, "account_id": acct,
+             "amount": Decimal(rng.randint(1, 500000)) / 100, "transaction_type": rng.choice(TXN_TYPES),
+             "date_added": start + timedelta(seconds=60 * i)}
+            for i, acct in enumerate(rng.randint(1, N_USERS * ACCOUNTS_PER_USER) for _ in range(N_TRANSACTIONS))
+        ])
+        db.session.commit()
+        yield flask_app
+
+
+@pytest.fixture(scope="session")
+def users(app):
+    from models import User
+    return User.query.order_by(User.id).all()
+
+
+@pytest.fixture(scope="session")
+def accounts(app):
+    from models import Account
+    return Account.query.order_by(Account.id).all()
+
+
+@pytest.fixture(scope="session")
+def transactions(app):
+    """5000 loaded Transaction rows (a large page / export chunk)."""
+    from models import Transaction
+    return Transaction.query.order_by(Transaction.id).limit(5000).all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
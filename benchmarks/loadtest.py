@@ -0,0 +1,396 @@
+"""End-to-end load test for the money-moving and auth endpoints.
+
+Seeds a throwaway database (or adds load users to DATABASE_URL), then runs
+``--concurrency`` closed-loop virtual users for ``--duration`` seconds. Each
+user logs in once and then sends a weighted mix of deposit / withdraw /
+transfer / login / me requests. The report gives req/s and p50/p95/p99
+latency per endpoint and can be saved as JSON. ``compare`` diffs two saved
+runs and exits non-zero if req/s dropped, p95/p99 rose by more than
+``--threshold``, or errors increased.
+
+Targets:
+
+* ``--mode client`` (default): in-process Flask test client. No server
+  needed, but every worker shares one GIL.
+* ``--mode gunicorn``: starts ``gunicorn app:app`` with ``--workers`` on a
+  free local port against the seeded database.
+* ``--url http://host:port``: an already running server, which must use the
+  same DATABASE_URL as this process so the seeded users exist. The load
+  users are added to that database; its tables are only dropped and
+  recreated with ``--reset``.
+
+    python -m benchmarks.loadtest run --concurrency 16 --duration 20 --out before.json
+    python -m benchmarks.loadtest run --mode gunicorn --workers 4 --concurrency 32 --out after.json
+    python -m benchmarks.loadtest compare before.json after.json --threshold 0.10
+"""
+import argparse
+import http.client
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import date, datetime
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PASSWORD = "loadtest-password"
+DEFAULT_MIX = "deposit=25,withdraw=20,transfer=25,login=5,me=25"
+ENDPOINTS = ("deposit", "withdraw", "transfer", "login", "me")
+
+
+# ============================================================
+# Seeding
+# ============================================================
+
+
+def seed(n_users, balance, reset=False):
+    """Make sure ``n_users`` load users (two accounts each) exist; returns {user: [account ids]}.
+
+    Only ``reset`` drops the schema first. Otherwise the schema is migrated in
+    place and users left by an earlier run are reused, so pointing the script
+    at a shared DATABASE_URL never wipes existing data.
+    """
+    from app import app
+    from models import db, Account, User
+    from utils.migrations import run_migrations
+
+    with app.app_context():
+        if reset:
+            db.drop_all()
+        run_migrations()
+        names = [f"load{i}" for i in range(n_users)]
+        existing = {u.username: u for u in User.query.filter(User.username.in_(names))}
+        users = []
+        for i, name in enumerate(names):
+            user = existing.get(name)
+            if user is None:
+                user = User(username=name, name=f"Load {i}", dob=date(1990, 1, 1), email=f"{name}@example.com")
+                user.set_password(PASSWORD)
+                db.session.add(user)
+            users.append(user)
+        db.session.flush()
+        owned = {user_id for (user_id,) in db.session.query(Account.user_id).filter(
+            Account.user_id.in_([u.id for u in users])).distinct()}
+        db.session.add_all([Account(user_id=u.id, balance=balance)
+                            for u in users if u.id not in owned for _ in range(2)])
+        db.session.commit()
+        accounts = defaultdict(list)
+        for account in Account.query.filter(Account.user_id.in_([u.id for u in users])).order_by(Account.id):
+            accounts[account.user_id].append(account.id)
+        return {u.username: accounts[u.id] for u in users}
+
+
+# ============================================================
+# Transports
+# ============================================================
+
+
+class ClientTransport:
+    """Flask test client, one per virtual user."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body=None, headers=None):
+        r = self.client.open(path, method=method, json=body, headers=headers or {})
+        return r.status_code, r.get_data()
+
+
+class HttpTransport:
+    """Keep-alive HTTP/1.1 connection, one per virtual user."""
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.conn = None
+
+    def request(self, method, path, body=None, headers=None):
+        if self.conn is None:
+            self.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        data = json.dumps(body).encode() if body is not None else None
+        try:
+            self.conn.request(method, path, body=data,
+                              headers={"Content-Type": "application/json", **(headers or {})})
+            resp = self.conn.getresponse()
+            return resp.status, resp.read()
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            self.conn = None
+            return 0, b""                              # Transport failure
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(workers, port):
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-w", str(workers), "-b", f"127.0.0.1:{port}", "app:app"],
+        cwd=ROOT, env=dict(os.environ), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit("gunicorn exited: " + proc.stderr.read().decode(errors="replace")[-2000:])
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise SystemExit("gunicorn did not start listening within 30s")
+
+
+# ============================================================
+# Virtual users
+# ============================================================
+
+
+def parse_mix(spec):
+    weights = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ENDPOINTS:
+            raise SystemExit(f"unknown endpoint in --mix: {name!r} (expected one of {', '.join(ENDPOINTS)})")
+        weights[name.strip()] = float(weight)
+    return weights
+
+
+def login(transport, username):
+    status, body = transport.request("POST", "/auth/login", {"username": username, "password": PASSWORD})
+    token = json.loads(body)["access_token"] if status == 200 else None
+    return status, token
+
+
+def virtual_user(n, transport, users, mix, warmup_until, stop_at, samples, lock):
+    rng = random.Random(n)
+    usernames = sorted(users)
+    username = usernames[n % len(usernames)]
+    own = users[username]
+    all_accounts = [aid for ids in users.values() for aid in ids]
+    _, token = login(transport, username)
+    names, weights = zip(*mix.items())
+    local = []
+
+    while True:
+        started = time.perf_counter()
+        if started >= stop_at:
+            break
+        endpoint = rng.choices(names, weights)[0]
+        amount = f"{rng.randint(1, 2000) / 100:.2f}"
+        if endpoint == "deposit":
+            status, _ = transport.request("POST", "/transactions/deposit",
+                                          {"account_id": rng.choice(own), "amount": amount})
+        elif endpoint == "withdraw":
+            status, _ = transport.request("POST", "/transactions/withdraw",
+                                          {"account_id": rng.choice(own), "amount": amount})
+        elif endpoint == "transfer":
+            source = rng.choice(own)
+            target = rng.choice([aid for aid in all_accounts if aid != source])
+            status, _ = transport.request("POST", "/transactions/transfer",
+                                          {"from_account_id": source, "to_account_id": target, "amount": amount})
+        elif endpoint == "login":
+            status, new_token = login(transport, username)
+            token = new_token or token
+        else:
+            status, _ = transport.request("GET", "/auth/me", headers={"Authorization": f"Bearer {token}"})
+        elapsed = time.perf_counter() - started
+        if started >= warmup_until:
+            local.append((endpoint, status, elapsed))
+
+    with lock:
+        samples.extend(local)
+
+
+# ============================================================
+# Reporting
+# ============================================================
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(samples, duration):
+    by_endpoint = defaultdict(list)
+    for endpoint, status, elapsed in samples:
+        by_endpoint[endpoint].append((status, elapsed))
+    by_endpoint["total"] = [(status, elapsed) for _, status, elapsed in samples]
+
+    report = {}
+    for endpoint, rows in by_endpoint.items():
+        latencies = sorted(elapsed * 1000 for _, elapsed in rows)
+        statuses = Counter(status for status, _ in rows)
+        report[endpoint] = {
+            "requests": len(rows),
+            "rps": round(len(rows) / duration, 2),
+            "errors": sum(c for s, c in statuses.items() if s == 0 or s >= 500),
+            "statuses": {str(s): c for s, c in sorted(statuses.items())},
+            "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+            "p99_ms": round(percentile(latencies, 99), 3),
+            "max_ms": round(latencies[-1], 3) if latencies else 0.0,
+        }
+    return report
+
+
+def print_report(report):
+    print(f"{'endpoint':<10} {'reqs':>7} {'req/s':>9} {'err':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for endpoint in [e for e in ENDPOINTS if e in report] + ["total"]:
+        r = report[endpoint]
+        print(f"{endpoint:<10} {r['requests']:>7} {r['rps']:>9.1f} {r['errors']:>5} "
+              f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f}")
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ============================================================
+# Commands
+# ============================================================
+
+
+def run(args):
+    scratch = not args.url and "DATABASE_URL" not in os.environ
+    if scratch:                                        # Our own database: safe to start from nothing
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'loadtest.db')}"
+    from decimal import Decimal
+    users = seed(args.users, Decimal(args.balance), reset=scratch or args.reset)
+    mix = parse_mix(args.mix)
+
+    server = None
+    if args.url:
+        base_url = args.url
+    elif args.mode == "gunicorn":
+        port = free_port()
+        server = start_gunicorn(args.workers, port)
+        base_url = f"http://127.0.0.1:{port}"
+    else:
+        base_url = None
+
+    if base_url:
+        make_transport = lambda: HttpTransport(base_url)  # noqa: E731
+    else:
+        from app import app
+        make_transport = lambda: ClientTransport(app)  # noqa: E731
+
+    samples, lock = [], threading.Lock()
+    now = time.perf_counter()
+    warmup_until, stop_at = now + args.warmup, now + args.warmup + args.duration
+    threads = [threading.Thread(target=virtual_user,
+                                args=(n, make_transport(), users, mix, warmup_until, stop_at, samples, lock))
+               for n in range(args.concurrency)]
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=10)
+
+    report = summarize(samples, args.duration)
+    print_report(report)
+    result = {
+        "meta": {
+            "started_at": datetime.utcnow().isoformat() + "Z",
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "mode": "url" if args.url else args.mode,
+            "workers": args.workers if args.mode == "gunicorn" and not args.url else None,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "users": args.users,
+            "mix": mix,
+        },
+        "endpoints": report,
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"saved {args.out}")
+
+
+def compare(args):
+    with open(args.baseline) as f:
+        base = json.load(f)["endpoints"]
+    with open(args.candidate) as f:
+        cand = json.load(f)["endpoints"]
+
+    regressions = []
+    print(f"{'endpoint':<30} {'metric':<7} {'baseline':>10} {'candidate':>10} {'change':>8}")
+    others = sorted(e for e in base if e not in ENDPOINTS and e != "total")   # e.g. replay routes
+    for endpoint in [e for e in list(ENDPOINTS) + others + ["total"] if e in base and e in cand]:
+        for metric, higher_is_worse in (("rps", False), ("p50_ms", True), ("p95_ms", True), ("p99_ms", True)):
+            old, new = base[endpoint][metric], cand[endpoint][metric]
+            change = (new - old) / old if old else 0.0
+            worse = change > args.threshold if higher_is_worse else change < -args.threshold
+            flag = "  REGRESSION" if worse and metric != "p50_ms" else ""
+            if flag:
+                regressions.append(f"{endpoint} {metric} {old} -> {new}")
+            print(f"{endpoint:<30} {metric:<7} {old:>10.2f} {new:>10.2f} {change:>+8.1%}{flag}")
+        if cand[endpoint]["errors"] > base[endpoint]["errors"]:
+            regressions.append(f"{endpoint} errors {base[endpoint]['errors']} -> {cand[endpoint]['errors']}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for r in regressions:
+            print("  " + r)
+        sys.exit(1)
+    print(f"\nno regressions beyond {args.threshold:.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for the money-moving and auth endpoints")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    r = sub.add_parser("run", help="seed, drive load and report")
+    r.add_argument("--mode", choices=["client", "gunicorn"], default="client")
+    r.add_argument("--url", help="test an already running server instead")
+    r.add_argument("--workers", type=int, default=4, help="gunicorn workers (--mode gunicorn)")
+    r.add_argument("--concurrency", type=int, default=16, help="virtual users")
+    r.add_argument("--duration", type=float, default=20, help="measured seconds")
+    r.add_argument("--warmup", type=float, default=3, help="unmeasured seconds before that")
+    r.add_argument("--users", type=int, default=50, help="seeded users (two accounts each)")
+    r.add_argument("--balance", default="100000.00", help="starting balance per account")
+    r.add_argument("--reset", action="store_true",
+                   help="drop and recreate every table of DATABASE_URL before seeding")
+    r.add_argument("--mix", default=DEFAULT_MIX, help="endpoint=weight,... (default: %(default)s)")
+    r.add_argument("--out", help="write results as JSON")
+    r.set_defaults(func=run)
+
+    c = sub.add_parser("compare", help="flag regressions between two saved runs")
+    c.add_argument("baseline")
+    c.add_argument("candidate")
+    c.add_argument("--threshold", type=float, default=0.10, help="allowed relative change (default 10%%)")
+    c.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""Replay a traffic capture (utils/traffic_capture.py) against a local instance.
+
+Reads one or more capture files, including rotated ``.1`` ... ``.N`` ones
+(pass them all), orders the records by timestamp and re-issues each one at
+its original offset divided by ``--speed``. ``--speed 0`` sends them as fast
+as ``--concurrency`` allows. Redacted values are filled in before sending:
+
+* credentials become ``--username`` / ``--password``;
+* ``<str:N>`` becomes N x's;
+* requests that were authenticated get a bearer token from logging in as
+  ``--username``.
+
+Idempotency keys are not replayed.
+
+Without ``--url`` the replay runs through the in-process test client against
+a fresh SQLite file, or against DATABASE_URL if it is set and
+``--allow-writes`` is given (the replay refuses to write into an existing
+database otherwise). The schema is migrated first and seeded so the
+capture's references resolve: the ``--username`` user, plus users, accounts
+and transactions up to the highest id the capture mentions in a path or body.
+Seeded accounts belong to ``--username`` and start with ``--balance``. With
+``--url`` the server's database must already hold them.
+
+The report has the same layout as benchmarks/loadtest.py, keyed by
+"METHOD route", so ``python -m benchmarks.loadtest compare`` works on saved
+replays too. It also counts responses whose status differs from the
+captured one.
+
+    python -m benchmarks.replay captures/requests.jsonl.1 captures/requests.jsonl \\
+        --url http://127.0.0.1:8000 --username alice --password secret --speed 4 --out replay.json
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from decimal import Decimal
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.loadtest import ClientTransport, HttpTransport, summarize  # noqa: E402
+
+REDACTED = "<redacted>"
+STR_PLACEHOLDER = re.compile(r"^<str:(\d+)>$")
+PATH_ID = re.compile(r"^/(users|accounts|transactions)/(\d+)")
+BODY_IDS = {"user_id": "users", "account_id": "accounts",
+            "from_account_id": "accounts", "to_account_id": "accounts"}
+
+
+def load(paths):
+    records = []
+    for path in paths:
+        with open(path) as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+    records.sort(key=lambda r: r["ts"])
+    return records
+
+
+def fill(value, key, args):
+    """Turn a sanitized payload back into something the API accepts."""
+    if isinstance(value, dict):
+        return {k: fill(v, k, args) for k, v in value.items()}
+    if isinstance(value, list):
+        return [fill(v, None, args) for v in value]
+    if value == REDACTED:
+        return {"username": args.username, "password": args.password}.get(key, "replay")
+    if isinstance(value, str):
+        match = STR_PLACEHOLDER.match(value)
+        if match:
+            return "x" * int(match.group(1))
+    return value
+
+
+def target_path(record):
+    if record["path"]:
+        path = record["path"]
+    else:                                              # Text params were dropped; use a placeholder
+        path = re.sub(r"<(?:\w+:)?\w+>", "replay", record["route"] or "/")
+    query = urlencode({k: v for k, v in record["query"].items() if v != REDACTED})
+    return f"{path}?{query}" if query else path
+
+
+def referenced_ids(records):
+    """Highest user, account and transaction id the capture refers to."""
+    top = {"users": 0, "accounts": 0, "transactions": 0}
+
+    def walk(value):
+        if isinstance(value, dict):
+            for k, v in value.items():
+                if k in BODY_IDS and isinstance(v, int):
+                    top[BODY_IDS[k]] = max(top[BODY_IDS[k]], v)
+                walk(v)
+        elif isinstance(value, list):
+            for v in value:
+                walk(v)
+
+    for record in records:
+        match = PATH_ID.match(record["path"] or "")
+        if match:
+            top[match.group(1)] = max(top[match.group(1)], int(match.group(2)))
+        walk(record["body"])
+    return top
+
+
+def seed(records, args):
+    """Migrate the schema and add the rows the capture refers to; returns {table: rows added}."""
+    from sqlalchemy import func
+
+    from app import app
+    from models import db, Account, Transaction, User
+    from utils.migrations import run_migrations
+
+    top = referenced_ids(records)
+    with app.app_context():
+        run_migrations()
+
+        def missing(model, wanted):                    # Ids are assigned max + 1, so add the difference
+            return max(0, wanted - (db.session.query(func.max(model.id)).scalar() or 0))
+
+        def user(username):
+            return User(username=username, name=username.title(), dob=date(1990, 1, 1),
+                        email=f"{username}@replay.invalid")
+
+        added = {"users": 0, "accounts": 0, "transactions": 0}
+        owner = User.query.filter_by(username=args.username).first()
+        if owner is None:
+            owner = user(args.username)
+            owner.set_password(args.password)
+            db.session.add(owner)
+            db.session.flush()
+            added["users"] += 1
+
+        start = db.session.query(func.max(User.id)).scalar()
+        users = [user(f"{args.username}-{start + i + 1}") for i in range(missing(User, top["users"]))]
+        for u in users:
+            u.password_hash = owner.password_hash      # One KDF run, not one per seeded user
+        db.session.add_all(users)
+        added["users"] += len(users)
+
+        n = missing(Account, top["accounts"])
+        if not n and not Account.query.filter_by(user_id=owner.id).first():
+            n = 1                                      # Somewhere to book seeded transactions
+        db.session.add_all([Account(user_id=owner.id, balance=args.balance) for _ in range(n)])
+        db.session.flush()
+        added["accounts"] = n
+
+        account = Account.query.filter_by(user_id=owner.id).order_by(Account.id).first()
+        n = missing(Transaction, top["transactions"])
+        db.session.add_all([
+            Transaction(user_id=owner.id, account_id=account.id, amount=Decimal("1.00"), transaction_type="deposit")
+            for _ in range(n)])
+        added["transactions"] = n
+        db.session.commit()
+        return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captured traffic")
+    parser.add_argument("files", nargs="+", help="capture files (oldest rotation first)")
+    parser.add_argument("--url", help="base URL of the instance (default: in-process test client)")
+    parser.add_argument("--speed", type=float, default=1.0, help="time compression; 0 = no pacing")
+    parser.add_argument("--concurrency", type=int, default=32, help="max requests in flight")
+    parser.add_argument("--username", default="replay", help="used for redacted usernames and for auth")
+    parser.add_argument("--password", default="replay-password")
+    parser.add_argument("--balance", type=Decimal, default="1000000.00",
+                        help="starting balance of seeded accounts (in-process only)")
+    parser.add_argument("--allow-writes", action="store_true",
+                        help="seed and replay into an existing DATABASE_URL (in-process only)")
+    parser.add_argument("--out", help="write results as JSON")
+    args = parser.parse_args()
+
+    records = load(args.files)
+    if not records:
+        raise SystemExit("no records in capture")
+
+    if args.url:
+        make_transport = lambda: HttpTransport(args.url)  # noqa: E731
+    else:
+        if "DATABASE_URL" not in os.environ:           # A scratch database of our own
+            os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'replay.db')}"
+        elif not args.allow_writes:                    # Never replay writes into a real database by accident
+            raise SystemExit("DATABASE_URL is set: pass --allow-writes to seed and replay into it")
+        added = seed(records, args)
+        print("seeded " + ", ".join(f"{n} {table}" for table, n in added.items()))
+        from app import app
+        make_transport = lambda: ClientTransport(app)  # noqa: E731
+
+    local = threading.local()
+
+    def transport():
+        if not hasattr(local, "transport"):
+            local.transport = make_transport()
+        return local.transport
+
+    status, body = make_transport().request(
+        "POST", "/auth/login", {"username": args.username, "password": args.password})
+    token = json.loads(body)["access_token"] if status == 200 else None
+    if token is None and any(r["auth"] for r in records):
+        print(f"warning: login as {args.username!r} failed ({status}); authenticated requests will fail")
+
+    samples, mismatched, lock = [], [0], threading.Lock()
+
+    def send(record):
+        headers = {"Authorization": f"Bearer {token}"} if record["auth"] and token else {}
+        body = fill(record["body"], None, args) if record["body"] is not None else None
+        started = time.perf_counter()
+        status, _ = transport().request(record["method"], target_path(record), body, headers)
+        elapsed = time.perf_counter() - started
+        with lock:
+            samples.append((f"{record['method']} {record['route']}", status, elapsed))
+            mismatched[0] += status != record["status"]
+
+    t0, start = records[0]["ts"], time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for record in records:
+            if args.speed > 0:
+                delay = (record["ts"] - t0) / args.speed - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            pool.submit(send, record)
+    duration = time.perf_counter() - start
+
+    report = summarize(samples, duration)
+    print(f"{'endpoint':<45} {'reqs':>6} {'req/s':>8} {'err':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name in sorted(k for k in report if k != "total") + ["total"]:
+        r = report[name]
+        print(f"{name:<45} {r['requests']:>6} {r['rps']:>8.1f} {r['errors']:>5} "
+              f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f}")
+    print(f"{len(records)} records replayed in {duration:.1f}s "
+          f"(captured span {records[-1]['ts'] - t0:.1f}s); {mismatched[0]} status mismatches")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({
+                "meta": {"mode": "replay", "files": args.files, "speed": args.speed,
+                         "concurrency": args.concurrency, "records": len(records),
+                         "duration_s": round(duration, 3), "status_mismatches": mismatched[0]},
+                "endpoints": report,
+            }, f, indent=2)
+        print(f"saved {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Concurrency stress test for deposit / withdraw / transfer.
+
+Hammers the money-moving endpoints from many threads at once through the
+Flask test client, then checks the ledger invariants:
+
+* total money == starting money + successful deposits - successful withdrawals
+* no account balance is negative
+* every balance == its starting balance + the signed sum of its transaction rows
+
+Uses a throwaway SQLite file by default; point DATABASE_URL at a scratch
+Postgres database to test real row locking. Exits non-zero on any violation.
+
+    python -m benchmarks.stress_balances --threads 32 --ops 200
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+from collections import Counter
+from datetime import date
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp, 'stress.db')}")
+
+from sqlalchemy import case, func, select  # noqa: E402
+
+from app import app  # noqa: E402
+from models import db, Account, Transaction, User  # noqa: E402
+
+START_BALANCE = Decimal("100.00")
+
+
+def seed(n_accounts):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        user = User(username="stress", name="Stress", dob=date(1990, 1, 1), email="stress@example.com",
+                    password_hash="x")
+        db.session.add(user)
+        db.session.flush()
+        db.session.add_all([Account(user_id=user.id, balance=START_BALANCE) for _ in range(n_accounts)])
+        db.session.commit()
+        return [a.id for a in Account.query.order_by(Account.id)]
+
+
+def worker(account_ids, ops, seed_value, totals, statuses, lock):
+    rng = random.Random(seed_value)
+    client = app.test_client()
+    deposited = withdrawn = Decimal("0")
+    local = Counter()
+    for _ in range(ops):
+        amount = Decimal(rng.randint(1, 6000)) / 100        # Large enough to hit overdraft checks
+        kind = rng.choice(["deposit", "withdraw", "transfer", "transfer"])
+        if kind == "transfer":
+            a, b = rng.sample(account_ids, 2)
+            r = client.post("/transactions/transfer",
+                            json={"from_account_id": a, "to_account_id": b, "amount": str(amount)})
+        else:
+            r = client.post(f"/transactions/{kind}",
+                            json={"account_id": rng.choice(account_ids), "amount": str(amount)})
+            if r.status_code in (200, 201):
+                if kind == "deposit":
+                    deposited += amount
+                else:
+                    withdrawn += amount
+        local[(kind, r.status_code)] += 1
+    with lock:
+        totals["deposited"] += deposited
+        totals["withdrawn"] += withdrawn
+        statuses.update(local)
+
+
+def check(account_ids, totals):
+    problems = []
+    with app.app_context():
+        balances = dict(db.session.execute(select(Account.id, Account.balance)).all())
+        signed = case(
+            (Transaction.transaction_type.in_(["withdrawal", "transfer_out"]), -Transaction.amount),
+            else_=Transaction.amount)
+        logged = dict(db.session.execute(
+            select(Transaction.account_id, func.sum(signed)).group_by(Transaction.account_id)).all())
+
+    expected_total = START_BALANCE * len(account_ids) + totals["deposited"] - totals["withdrawn"]
+    actual_total = sum(balances.values())
+    if actual_total != expected_total:
+        problems.append(f"total money {actual_total} != expected {expected_total}")
+    for aid, balance in balances.items():
+        if balance < 0:
+            problems.append(f"account {aid} overdrawn: {balance}")
+        expected = START_BALANCE + Decimal(logged.get(aid) or 0).quantize(Decimal("0.01"))
+        if balance != expected:
+            problems.append(f"account {aid} balance {balance} != start + logged {expected}")
+    return actual_total, problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Money-moving concurrency stress test")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--ops", type=int, default=100, help="operations per thread")
+    parser.add_argument("--accounts", type=int, default=8, help="few accounts = more contention")
+    args = parser.parse_args()
+
+    account_ids = seed(args.accounts)
+    totals = {"deposited": Decimal("0"), "withdrawn": Decimal("0")}
+    statuses = Counter()
+    lock = threading.Lock()
+    threads = [threading.Thread(target=worker, args=(account_ids, args.ops, n, totals, statuses, lock))
+               for n in range(args.threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    total, problems = check(account_ids, totals)
+    for (kind, status), count in sorted(statuses.items()):
+        print(f"{kind:<9} {status}: {count}")
+    print(f"total money: {total}")
+    if problems:
+        print("FAILED:")
+        for p in problems:
+            print("  " + p)
+        sys.exit(1)
+    print("OK: no money created or lost, no overdrafts")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,123 @@
 # config.py
 import os
 
+
+def engine_options(uri):
+    """Pool settings for one engine; SQLite keeps Flask-SQLAlchemy's own pool defaults."""
+    options = {"pool_pre_ping": os.environ.get("DB_POOL_PRE_PING", "1") != "0"}  # Drop dead connections
+    if not uri.startswith("sqlite"):
+        options.update(
+            pool_size=int(os.environ.get("DB_POOL_SIZE", 10)),          # Connections kept open
+            max_overflow=int(os.environ.get("DB_MAX_OVERFLOW", 10)),    # Extra connections under load
+            pool_timeout=int(os.environ.get("DB_POOL_TIMEOUT", 30)),    # Seconds to wait for a connection
+            pool_recycle=int(os.environ.get("DB_POOL_RECYCLE", 1800)),  # Reconnect after this many seconds
+        )
+    return options
+
+
+def replica_binds(urls):
+    """SQLALCHEMY_BINDS entries for read replicas (see utils/db_routing.py)."""
+    return {f"replica_{i}": {"url": url, **engine_options(url)} for i, url in enumerate(urls)}
+
+
 class Config:
     # Production: Postgres, fallback: SQLite locally
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL") or "sqlite:///user.db"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    # Optional comma-separated read replicas; read-only GET routes use them round-robin
+    DATABASE_REPLICA_URLS = [u.strip() for u in os.environ.get("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+    SQLALCHEMY_BINDS = replica_binds(DATABASE_REPLICA_URLS)
+
+    # SQLite fallback profile (utils/sqlite_tuning.py); ignored on other databases
+    SQLITE_TUNED = os.environ.get("SQLITE_TUNED", "1") != "0"                  # WAL + pragmas below
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 5000))  # Wait for the write lock
+    SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))  # Bytes of memory-mapped I/O
+    SQLITE_CACHE_SIZE_KB = int(os.environ.get("SQLITE_CACHE_SIZE_KB", 64 * 1024))  # Page cache per connection
+    # Queue ledger writes on one thread per process; other workers still contend for the file lock
+    SQLITE_SINGLE_WRITER = os.environ.get("SQLITE_SINGLE_WRITER", "1") != "0"
+
+    # Opt-in traffic capture for replay benchmarks (utils/traffic_capture.py, benchmarks/replay.py)
+    CAPTURE_ENABLED = os.environ.get("CAPTURE_ENABLED", "0") == "1"
+    CAPTURE_PATH = os.environ.get("CAPTURE_PATH") or "captures/requests.jsonl"
+    CAPTURE_MAX_BYTES = int(os.environ.get("CAPTURE_MAX_BYTES", 50 * 1024 * 1024))  # Rotate past this size
+    CAPTURE_BACKUPS = int(os.environ.get("CAPTURE_BACKUPS", 5))                     # Rotated files kept
+    CAPTURE_BUFFER_RECORDS = int(os.environ.get("CAPTURE_BUFFER_RECORDS", 200))     # Flush after this many
+    CAPTURE_FLUSH_INTERVAL = float(os.environ.get("CAPTURE_FLUSH_INTERVAL", 5))     # ...or this many seconds
+
+    # Prometheus metrics at /metrics (utils/metrics.py)
+    METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") != "0"
+    METRICS_DIR = os.environ.get("METRICS_DIR", "")    # Snapshot dir; empty = per-master temp dir under gunicorn
+    METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", 5))  # Seconds between snapshots
+
+    # N+1 query detector for development/CI (utils/nplusone.py)
+    NPLUSONE_ENABLED = os.environ.get("NPLUSONE_ENABLED", "0") == "1"
+    NPLUSONE_THRESHOLD = int(os.environ.get("NPLUSONE_THRESHOLD", 5))   # Repeats of one query shape per request
+    NPLUSONE_ACTION = os.environ.get("NPLUSONE_ACTION") or "log"        # "log" or "raise"
+
+    # Users allowed to use admin-only features (request profiling); comma-separated ids
+    ADMIN_USER_IDS = {int(i) for i in os.environ.get("ADMIN_USER_IDS", "").split(",") if i.strip()}
+
+    # Sampling profiler (utils/profiler.py): ?profile=1 / X-Profile: 1 for admins, or 1-in-N requests
+    PROFILE_ENABLED = os.environ.get("PROFILE_ENABLED", "1") != "0"
+    PROFILE_SAMPLE_EVERY = int(os.environ.get("PROFILE_SAMPLE_EVERY", 0))   # Rolling mode: every Nth request (0 = off)
+    PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", 5))   # Milliseconds between stack samples
+    PROFILE_DIR = os.environ.get("PROFILE_DIR") or "profiles"
+    PROFILE_MAX_FILES = int(os.environ.get("PROFILE_MAX_FILES", 200))       # Ring size; oldest removed first
+
+    # JSON responses (utils/json_provider.py): "auto" uses orjson when installed, else the stdlib
+    JSON_BACKEND = os.environ.get("JSON_BACKEND", "auto")
+
     JWT_SECRET_KEY = os.environ.get("JWT_SECRET_KEY") or "supersecret"
     JWT_ACCESS_TOKEN_EXPIRES = 3600
+    JWT_REFRESH_TOKEN_EXPIRES = int(os.environ.get("JWT_REFRESH_TOKEN_EXPIRES", 30 * 24 * 3600))
+    TOKEN_REVOCATION_CACHE_SIZE = int(os.environ.get("TOKEN_REVOCATION_CACHE_SIZE", 10000))
+
+    # Password hashing: werkzeug method string (stored hashes are upgraded on login when it changes)
+    PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD") or "scrypt:32768:8:1"
+    PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", 2))   # Hashes running at once
+    PASSWORD_HASH_QUEUE = int(os.environ.get("PASSWORD_HASH_QUEUE", 8))       # Waiting before 503
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get("PASSWORD_HASH_TIMEOUT", 10))
+
+    # /auth/me returns only the most recent transactions (clients may ask for up to the max)
+    ME_RECENT_TRANSACTIONS = int(os.environ.get("ME_RECENT_TRANSACTIONS", 20))
+    ME_MAX_RECENT_TRANSACTIONS = int(os.environ.get("ME_MAX_RECENT_TRANSACTIONS", 100))
+
+    # Receipts are rendered on demand into a bounded, content-addressed cache directory
+    RECEIPT_DIR = os.environ.get("RECEIPT_DIR") or "receipts"
+    RECEIPT_CACHE_MAX_BYTES = int(os.environ.get("RECEIPT_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+    # Background worker pool fed by the receipt_jobs table
+    RECEIPT_WORKERS = int(os.environ.get("RECEIPT_WORKERS", 2))          # Threads per process (0 disables)
+    RECEIPT_POLL_INTERVAL = float(os.environ.get("RECEIPT_POLL_INTERVAL", 2.0))  # Seconds between polls
+    RECEIPT_MAX_ATTEMPTS = int(os.environ.get("RECEIPT_MAX_ATTEMPTS", 3))
+    RECEIPT_JOB_TIMEOUT = int(os.environ.get("RECEIPT_JOB_TIMEOUT", 300))  # Reclaim "running" jobs after this
+
+    # POST /transactions/batch
+    BATCH_MAX_OPERATIONS = int(os.environ.get("BATCH_MAX_OPERATIONS", 1000))
+
+    # Idempotency-Key handling for money-moving endpoints
+    IDEMPOTENCY_TTL = int(os.environ.get("IDEMPOTENCY_TTL", 24 * 3600))       # Seconds a key is remembered
+    IDEMPOTENCY_CACHE_SIZE = int(os.environ.get("IDEMPOTENCY_CACHE_SIZE", 10000))  # In-process LRU entries
+    IDEMPOTENCY_LEASE = int(os.environ.get("IDEMPOTENCY_LEASE", 120))  # Seconds before a stuck claim is retaken
+
+    # Read-through cache for GET /users/<id>, /accounts/<id>, /transactions/<id>. Writes only
+    # invalidate the cache they can see, so it defaults on only with the shared backend; with
+    # "memory" and several workers another worker could serve an old balance for up to the TTL
+    MODEL_CACHE_ENABLED = os.environ.get(
+        "MODEL_CACHE_ENABLED", "1" if os.environ.get("CACHE_BACKEND") == "shared" else "0") != "0"
+    MODEL_CACHE_TTL = int(os.environ.get("MODEL_CACHE_TTL", 30))          # Seconds (writes invalidate earlier)
+    MODEL_CACHE_SIZE = int(os.environ.get("MODEL_CACHE_SIZE", 10000))     # Entries per process
+
+    # GET /accounts/<id>/summary: larger ranges must use a coarser bucket
+    SUMMARY_MAX_BUCKETS = int(os.environ.get("SUMMARY_MAX_BUCKETS", 400))
+
+    # "memory" = per-process caches; "shared" = one mmap'd cache file for all workers on the host
+    # (model cache and token revocation cache)
+    CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "memory")
+    SHARED_CACHE_PATH = os.environ.get("SHARED_CACHE_PATH", "")            # Default: /dev/shm/bank-backend-cache
+    SHARED_CACHE_SLOTS = int(os.environ.get("SHARED_CACHE_SLOTS", 16384))  # Total entries
+    SHARED_CACHE_SLOT_SIZE = int(os.environ.get("SHARED_CACHE_SLOT_SIZE", 1024))  # Bytes per entry (key + JSON)
+    SHARED_CACHE_WAYS = int(os.environ.get("SHARED_CACHE_WAYS", 8))        # Slots per set (LRU within a set)
 
 
 # class Config:
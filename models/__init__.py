@@ -1,11 +1,15 @@
 from flask_sqlalchemy import SQLAlchemy            # Import SQLAlchemy ORM
+from utils.db_routing import RoutingSession         # Sends read-only route SELECTs to replicas
 
-db = SQLAlchemy()                                  # Create the database instance to use across models
+db = SQLAlchemy(session_options={"class_": RoutingSession})  # Database instance used across models
 
 # Import models so SQLAlchemy knows about them
 from .user import User                              # User model (users table)
 from .account import Account                        # Account model (accounts table)
 from .transaction import Transaction                # Transaction model (transactions table)
+from .receipt_job import ReceiptJob                 # ReceiptJob model (receipt_jobs table)
+from .idempotency_key import IdempotencyKey         # IdempotencyKey model (idempotency_keys table)
+from .revoked_token import RevokedToken             # RevokedToken model (revoked_tokens table)
 
 
 # from flask_sqlalchemy import SQLAlchemy
@@ -6,8 +6,8 @@ class Account(db.Model):                          # Account table
     __tablename__ = 'accounts'                    # Table name in DB
 
     id = db.Column(db.Integer, primary_key=True)  # Unique account ID
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
-    # Link to the User who owns this account
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
+    # Link to the User who owns this account (indexed for user → accounts lookups)
 
     account_type = db.Column(db.String, default="checking")
     # Optional: "checking", "savings", etc. Default is "checking"
@@ -28,6 +28,15 @@ class Account(db.Model):                          # Account table
         if self.balance < 0:                      # Raise error if insufficient funds
             raise ValueError("Insufficient funds")
 
+    def to_dict(self):                             # Return dict representation for API
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "account_type": self.account_type,
+            "balance": self.balance,               # Decimal; encoded as an exact string (utils/json_provider.py)
+            "date_added": self.date_added.isoformat() if self.date_added else None
+        }
+
 
 # import os
 # from datetime import datetime
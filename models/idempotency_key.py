@@ -0,0 +1,37 @@
+from datetime import datetime                     # For timestamps like date_added
+from . import db                                  # Import SQLAlchemy instance from package
+
+
+class IdempotencyKey(db.Model):                   # Stored responses for Idempotency-Key retries
+    __tablename__ = 'idempotency_keys'            # Table name in DB
+
+    id = db.Column(db.Integer, primary_key=True)  # Unique row ID
+    caller = db.Column(db.String, nullable=False, default="")
+    # JWT identity of the client ("" when anonymous); keys are scoped per caller
+
+    key = db.Column(db.String(255), nullable=False)
+    # Client-supplied Idempotency-Key header value
+
+    endpoint = db.Column(db.String, nullable=False)
+    # Request path the key was used on (keys are scoped per endpoint)
+
+    request_hash = db.Column(db.String(64), nullable=False)
+    # SHA-256 of the request body; a reused key with a different body is rejected
+
+    status = db.Column(db.String, nullable=False, default="in_progress")
+    # "in_progress" while the first request runs, then "completed"
+
+    status_code = db.Column(db.Integer, nullable=True)   # Stored HTTP status
+    response_body = db.Column(db.Text, nullable=True)    # Stored response body
+    mimetype = db.Column(db.String, nullable=True)       # Stored response content type
+
+    date_added = db.Column(db.DateTime, default=datetime.utcnow)
+    # Timestamp when the current claim started; an "in_progress" claim older than
+    # IDEMPOTENCY_LEASE can be taken over by a retry
+
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    # After this the key is forgotten and may be reused
+
+    __table_args__ = (
+        db.UniqueConstraint("caller", "key", "endpoint", name="uq_idempotency_keys_caller_key_endpoint"),
+    )
@@ -0,0 +1,44 @@
+from datetime import datetime                     # For timestamps like date_added
+from . import db                                  # Import SQLAlchemy instance from package
+
+
+class ReceiptJob(db.Model):                       # Receipt job queue table (no external broker needed)
+    __tablename__ = 'receipt_jobs'                # Table name in DB
+
+    id = db.Column(db.Integer, primary_key=True)  # Unique job ID
+    transaction_id = db.Column(db.Integer, db.ForeignKey(
+        "transactions.id"), nullable=False, index=True)
+    # Transaction whose receipts this job renders
+
+    status = db.Column(db.String, nullable=False, default="pending", index=True)
+    # Job state: "pending", "running", "done" or "failed"
+
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    # Number of times a worker has claimed this job
+
+    error = db.Column(db.String, nullable=True)   # Last error message (if any)
+    receipt_json = db.Column(db.String, nullable=True)  # Path of the JSON receipt once rendered
+    receipt_pdf = db.Column(db.String, nullable=True)   # Path of the PDF receipt once rendered
+
+    date_added = db.Column(db.DateTime, default=datetime.utcnow)
+    # Timestamp when the job was queued
+
+    date_updated = db.Column(db.DateTime, default=datetime.utcnow)
+    # Timestamp of the last status change (used to reclaim stuck jobs)
+
+    # Relationships
+    transaction = db.relationship("Transaction")
+    # Lets a job be queued before the transaction has been flushed and has an ID
+
+    def to_dict(self):                            # Return dict representation for API
+        return {
+            "job_id": self.id,
+            "transaction_id": self.transaction_id,
+            "status": self.status,
+            "attempts": self.attempts,
+            "error": self.error,
+            "receipt_json": self.receipt_json,
+            "receipt_pdf": self.receipt_pdf,
+            "date_added": self.date_added.isoformat() if self.date_added else None,
+            "date_updated": self.date_updated.isoformat() if self.date_updated else None
+        }
@@ -0,0 +1,19 @@
+from datetime import datetime                     # For timestamps like revoked_at
+from . import db                                  # Import SQLAlchemy instance from package
+
+
+class RevokedToken(db.Model):                     # Revoked (or already rotated) JWTs
+    __tablename__ = 'revoked_tokens'              # Table name in DB
+
+    id = db.Column(db.Integer, primary_key=True)  # Unique row ID
+    jti = db.Column(db.String(36), nullable=False, unique=True)
+    # JWT ID; the unique constraint makes "use a refresh token once" race-free
+
+    token_type = db.Column(db.String, nullable=False)   # "refresh" or "access"
+    user_id = db.Column(db.Integer, nullable=True)      # Token subject, for auditing
+
+    revoked_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Timestamp when the token was revoked
+
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    # Token's own expiry; after this the row can be purged
@@ -26,6 +26,23 @@ class Transaction(db.Model):                      # Transaction table
     date_added = db.Column(db.DateTime, default=datetime.utcnow)
     # Timestamp when transaction was created
 
+    # Indexes for per-account / per-user history (newest first) lookups.
+    # Existing databases get them through utils/migrations.py.
+    __table_args__ = (
+        db.Index("ix_transactions_account_id_date_added", "account_id", "date_added"),
+        db.Index("ix_transactions_user_id_date_added", "user_id", "date_added"),
+    )
+
+    def to_dict(self):                             # Return dict representation for API
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "account_id": self.account_id,
+            "amount": self.amount,
+            "transaction_type": self.transaction_type,
+            "date_added": self.date_added.isoformat() if self.date_added else None
+        }
+
 
 # import os
 # from datetime import datetime
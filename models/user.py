@@ -2,6 +2,13 @@ import os                                         # For any OS/path utilities
 from datetime import datetime                     # For timestamps like date_added
 from . import db                                  # Import SQLAlchemy instance from package
 from werkzeug.security import generate_password_hash, check_password_hash  # Password hashing utilities
+from flask import current_app, has_app_context
+from utils.hashing import DEFAULT_METHOD, method_prefix
+
+
+def _hash_method():                               # Configured hash method (default outside an app)
+    return current_app.config["PASSWORD_HASH_METHOD"] if has_app_context() else DEFAULT_METHOD
+
 
 class User(db.Model):                             # User table
     __tablename__ = 'users'                       # Table name in DB
@@ -20,12 +27,15 @@ class User(db.Model):                             # User table
     accounts = db.relationship("Account", backref="user", lazy=True)         # User → multiple accounts
     transactions = db.relationship("Transaction", backref="user", lazy=True) # User → multiple transactions
 
-    def set_password(self, password: str):        # Hash and store password
-        self.password_hash = generate_password_hash(password)
+    def set_password(self, password: str, method: str = None):  # Hash and store password
+        self.password_hash = generate_password_hash(password, method=method or _hash_method())
 
     def check_password(self, password: str) -> bool:  # Check password against stored hash
         return check_password_hash(self.password_hash, password)
 
+    def needs_rehash(self, method: str = None) -> bool:  # Stored hash uses outdated parameters?
+        return self.password_hash.split("$", 1)[0] != method_prefix(method or _hash_method())
+
     def to_dict(self):                             # Return safe dict representation for API
         return {
             "id": self.id,
@@ -5,15 +5,19 @@ from flask import Blueprint
 from .users import users_bp
 from .accounts import accounts_bp
 from .transactions import transactions_bp
+from .ops import ops_bp
+from .metrics import metrics_bp
 
 # Optional: make them easily accessible when importing *
-__all__ = ["users_bp", "accounts_bp", "transactions_bp"]
+__all__ = ["users_bp", "accounts_bp", "transactions_bp", "ops_bp", "metrics_bp"]
 
 # Function to register all blueprints to the Flask app
 def register_routes(app):
     app.register_blueprint(users_bp)        # Register /users routes
     app.register_blueprint(accounts_bp)     # Register /accounts routes
     app.register_blueprint(transactions_bp) # Register /transactions routes
+    app.register_blueprint(ops_bp)          # Register /ops routes (runtime stats)
+    app.register_blueprint(metrics_bp)      # Register /metrics (Prometheus)
 
 
 # from .users import users_bp
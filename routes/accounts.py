@@ -1,6 +1,11 @@
-from flask import Blueprint, jsonify, request          # Blueprint for routes, request for input, jsonify for JSON output
-from models import db, User, Account                   # Import DB, User and Account models
+from flask import Blueprint, jsonify, request, current_app  # Blueprint for routes, request for input, jsonify for JSON output
+from models import db, User, Account, Transaction      # Import DB, User, Account and Transaction models
 from datetime import datetime                           # For timestamps
+from utils.pagination import page_args, keyset_page     # Cursor-based pagination
+from utils.model_cache import get_cached               # Read-through cache for single rows
+from utils.db_routing import read_replica              # GET handlers read from replicas
+from utils.account_summary import account_summary, BUCKETS, SummaryTooLarge  # SQL-side cash-flow totals
+from routes.transactions import parse_date_range       # ?from=&to= parsing shared with /transactions/export
 
 # Blueprint for accounts routes, all URLs start with /accounts
 accounts_bp = Blueprint("accounts", __name__, url_prefix="/accounts")
@@ -8,31 +13,75 @@ accounts_bp = Blueprint("accounts", __name__, url_prefix="/accounts")
 # ============================================================
 # GET ALL ACCOUNTS
 # ============================================================
-@accounts_bp.get("/")                                  # GET /accounts → returns all accounts
+@accounts_bp.get("/")                                  # GET /accounts?limit=&cursor= → one page of accounts
+@read_replica
 def get_all_accounts():
-    accounts = Account.query.all()
-    return jsonify([
-        {
-            "id": a.id,
-            "user_id": a.user_id,
-            "balance": float(a.balance),
-            "date_added": a.date_added
-        } for a in accounts
-    ])
+    try:
+        limit, after_id = page_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    accounts, next_cursor = keyset_page(Account.query, Account.id, limit, after_id)
+    return jsonify({
+        "items": [
+            {
+                "id": a.id,
+                "user_id": a.user_id,
+                "balance": a.balance,
+                "date_added": a.date_added
+            } for a in accounts
+        ],
+        "next_cursor": next_cursor                     # None on the last page
+    })
 
 # ============================================================
 # GET ACCOUNT BY ID
 # ============================================================
 @accounts_bp.get("/<int:account_id>")                 # GET /accounts/<id> → single account
+@read_replica
 def get_account(account_id):
-    account = Account.query.get(account_id)
+    account = get_cached(Account, account_id, account_payload)
     if not account:
         return jsonify({"error": "Account not found"}), 404
-    return jsonify({
+    return jsonify(account)
+
+
+def account_payload(account):
+    return {
         "id": account.id,
         "user_id": account.user_id,
-        "balance": float(account.balance),
+        "balance": account.balance,
         "date_added": account.date_added
+    }
+
+# ============================================================
+# ACCOUNT SUMMARY (cash-flow totals per day/week/month)
+# ============================================================
+@accounts_bp.get("/<int:account_id>/summary")         # GET /accounts/<id>/summary?from=&to=&bucket=day|week|month
+@read_replica
+def get_account_summary(account_id):
+    bucket = request.args.get("bucket", "month")
+    if bucket not in BUCKETS:
+        return jsonify({"error": "bucket must be day, week or month"}), 400
+    try:
+        start, end = parse_date_range(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if not get_cached(Account, account_id, account_payload):   # Same lookup as GET /accounts/<id>
+        return jsonify({"error": "Account not found"}), 404
+
+    try:
+        summary = account_summary(account_id, start, end, bucket, current_app.config["SUMMARY_MAX_BUCKETS"])
+    except SummaryTooLarge as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({
+        "account_id": account_id,
+        "bucket": bucket,
+        "from": request.args.get("from"),
+        "to": request.args.get("to"),
+        **summary
     })
 
 # ============================================================
@@ -66,7 +115,7 @@ def create_account():
         "message": "Account created",
         "id": account.id,
         "user_id": user.id,
-        "balance": float(account.balance)
+        "balance": account.balance
     }), 201
 
 # ============================================================
@@ -92,8 +141,8 @@ def delete_account(account_id):
     if not account:
         return jsonify({"error": "Account not found"}), 404
 
-    # Prevent deletion if transactions exist
-    if account.transactions:
+    # Prevent deletion if transactions exist (EXISTS query; don't load the whole history)
+    if db.session.query(Transaction.query.filter_by(account_id=account.id).exists()).scalar():
         return jsonify({"error": "Cannot delete account with existing transactions"}), 400
 
     db.session.delete(account)
@@ -1,17 +1,28 @@
-from flask import Blueprint, request, jsonify         # Blueprint for routes, request for input, jsonify for JSON output
-from models import db
+from flask import Blueprint, request, jsonify, current_app  # Blueprint for routes, request for input, jsonify for JSON output
+from models import db, Account, Transaction
 from models.user import User                           # Import User model
+from sqlalchemy import func
 from flask_jwt_extended import (                      # JWT helpers
     create_access_token,
     create_refresh_token,
     jwt_required,
+    get_jwt,
     get_jwt_identity
 )
+from utils import token_store                          # Revocation store for refresh tokens
+from utils.hashing import get_hasher, HashingBusy      # Bounded password-hashing executor
+from utils.model_cache import get_cached               # Cached identity lookups
 from datetime import timedelta
+from decimal import Decimal
 
 # Blueprint for authentication routes, all start with /auth
 auth_bp = Blueprint("auth", __name__, url_prefix="/auth")
 
+# Too many logins/signups hashing at once → shed load instead of queueing forever
+@auth_bp.errorhandler(HashingBusy)
+def hashing_busy(e):
+    return jsonify({"error": "Server busy, please retry"}), 503, {"Retry-After": "1"}
+
 # ============================================================
 # SIGNUP
 # ============================================================
@@ -37,7 +48,8 @@ def signup():
         email=data["email"],
         job=data.get("job")                             # Optional field
     )
-    user.set_password(data["password"])                 # Hash password before storing
+    # Hash password before storing (on the bounded hashing pool)
+    get_hasher(current_app).run(user.set_password, data["password"], current_app.config["PASSWORD_HASH_METHOD"])
 
     db.session.add(user)                                # Add to DB session
     db.session.commit()                                 # Commit to database
@@ -61,11 +73,22 @@ def login():
         (User.username == username_or_email) | (User.email == username_or_email)
     ).first()
 
-    if not user or not user.check_password(password):
+    hasher = get_hasher(current_app)
+    if not user or not hasher.run(user.check_password, password):
         return jsonify({"error": "Invalid credentials"}), 401
 
-    access_token = create_access_token(identity=user.id)
-    refresh_token = create_refresh_token(identity=user.id)
+    # Upgrade the stored hash if the configured cost parameters changed
+    method = current_app.config["PASSWORD_HASH_METHOD"]
+    if user.needs_rehash(method):
+        try:
+            hasher.run(user.set_password, password, method)
+            db.session.commit()
+        except HashingBusy:
+            pass                                       # Not urgent; try again on a later login
+
+    # JWT subjects must be strings
+    access_token = create_access_token(identity=str(user.id))
+    refresh_token = create_refresh_token(identity=str(user.id))
 
     return jsonify({
         "access_token": access_token,
@@ -73,21 +96,70 @@ def login():
         "user": user.to_dict()
     }), 200
 
+# ============================================================
+# REFRESH (rotate refresh token, no password check)
+# ============================================================
+@auth_bp.post("/refresh")                              # POST /auth/refresh with the refresh token as Bearer
+@jwt_required(refresh=True)
+def refresh():
+    claims = get_jwt()
+    # Each refresh token works once; a second use means it leaked or was replayed
+    if not token_store.revoke(claims):
+        return jsonify({"error": "Refresh token has already been used"}), 401
+
+    identity = get_jwt_identity()
+    return jsonify({
+        "access_token": create_access_token(identity=identity),
+        "refresh_token": create_refresh_token(identity=identity)
+    }), 200
+
+# ============================================================
+# LOGOUT (revoke the refresh token)
+# ============================================================
+@auth_bp.post("/logout")                               # POST /auth/logout with the refresh token as Bearer
+@jwt_required(refresh=True)
+def logout():
+    token_store.revoke(get_jwt())
+    return jsonify({"message": "Logged out"}), 200
+
 # ============================================================
 # PROTECTED ROUTE: CURRENT USER
 # ============================================================
-@auth_bp.get("/me")
+@auth_bp.get("/me")                                    # GET /auth/me?limit= → dashboard payload
 @jwt_required()
 def me():
-    user_id = get_jwt_identity()                       # Get user ID from JWT
-    user = User.query.get(user_id)
-    if not user:
+    try:
+        limit = int(request.args.get("limit", current_app.config["ME_RECENT_TRANSACTIONS"]))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    limit = max(0, min(limit, current_app.config["ME_MAX_RECENT_TRANSACTIONS"]))
+
+    user_id = int(get_jwt_identity())                  # Get user ID from JWT
+    user_data = get_cached(User, user_id, User.to_dict)  # Identity lookup served from the model cache
+    if not user_data:
         return jsonify({"error": "User not found"}), 404
-
-    # Add accounts and transactions to the response
-    user_data = user.to_dict()
-    user_data["accounts"] = [account.to_dict() for account in user.accounts]
-    user_data["transactions"] = [txn.to_dict() for txn in user.transactions]
+    accounts = Account.query.filter_by(user_id=user_id).order_by(Account.id).all()
+
+    # Only the N newest transactions, via the (user_id, date_added) index
+    recent = Transaction.query.filter_by(user_id=user_id) \
+        .order_by(Transaction.date_added.desc(), Transaction.id.desc()) \
+        .limit(limit).all() if limit else []
+
+    # Count and totals by type computed in the database, not in Python
+    by_type = db.session.query(
+        Transaction.transaction_type, func.count(Transaction.id), func.sum(Transaction.amount)
+    ).filter(Transaction.user_id == user_id).group_by(Transaction.transaction_type).all()
+
+    user_data = dict(user_data)                        # Don't mutate the cached payload
+    user_data["accounts"] = [account.to_dict() for account in accounts]
+    user_data["transactions"] = [txn.to_dict() for txn in recent]
+    user_data["transaction_summary"] = {
+        "count": sum(count for _, count, _ in by_type),
+        "by_type": {
+            txn_type: {"count": count, "total": total or Decimal("0")}
+            for txn_type, count, total in by_type
+        }
+    }
 
     return jsonify(user_data), 200
 
@@ -0,0 +1,12 @@
+from flask import Blueprint, Response, current_app   # Blueprint for routes, Response for plain text
+from utils.metrics import exposition                 # Prometheus text format, merged across workers
+
+# Blueprint for the Prometheus scrape endpoint (no URL prefix)
+metrics_bp = Blueprint("metrics", __name__)
+
+# ============================================================
+# PROMETHEUS METRICS
+# ============================================================
+@metrics_bp.get("/metrics")                          # GET /metrics → request, SQL and receipt metrics
+def metrics():
+    return Response(exposition(current_app), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,46 @@
+from flask import Blueprint, jsonify, current_app, send_file  # Blueprint for routes, JSON output, files
+from models import db                                # Database instance (engines for pool stats)
+from utils import model_cache                        # Read-through cache for single rows
+from utils.db_routing import pool_stats              # Connection pool usage per engine
+from utils.profiler import is_admin                  # Admin check for profile downloads
+
+# Blueprint for operational endpoints (runtime stats), all URLs start with /ops
+ops_bp = Blueprint("ops", __name__, url_prefix="/ops")
+
+# ============================================================
+# CACHE STATS
+# ============================================================
+@ops_bp.get("/cache")                                # GET /ops/cache → hit/miss counters of the model cache
+def cache_stats():
+    return jsonify({"model_cache": model_cache.stats()})
+
+# ============================================================
+# CONNECTION POOL STATS
+# ============================================================
+@ops_bp.get("/pool")                                 # GET /ops/pool → connections in use per engine (primary, replicas)
+def pool_usage():
+    return jsonify({"pools": pool_stats(db)})
+
+# ============================================================
+# REQUEST PROFILES (admin only)
+# ============================================================
+@ops_bp.get("/profiles")                             # GET /ops/profiles → stored profiles, newest first
+def list_profiles():
+    store = current_app.extensions.get("profile_store")
+    if store is None:
+        return jsonify({"error": "Profiling is disabled"}), 404
+    if not is_admin():
+        return jsonify({"error": "Admin only"}), 403
+    return jsonify({"profiles": store.names()})
+
+@ops_bp.get("/profiles/<name>")                      # GET /ops/profiles/<name> → collapsed stacks (flamegraph input)
+def get_profile(name):
+    store = current_app.extensions.get("profile_store")
+    if store is None:
+        return jsonify({"error": "Profiling is disabled"}), 404
+    if not is_admin():
+        return jsonify({"error": "Admin only"}), 403
+    path = store.path(name)
+    if path is None:
+        return jsonify({"error": "Profile not found"}), 404
+    return send_file(path, mimetype="text/plain", as_attachment=True, download_name=name)
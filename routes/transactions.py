@@ -1,81 +1,150 @@
 # Blueprint for routes, request for input, jsonify for JSON output
-from flask import Blueprint, jsonify, request
-# Import DB, Account, Transaction models
-from models import db, Account, Transaction
-from datetime import datetime                       # For timestamps
-# Function to generate PDF receipts
-from utils.pdf_generator import generate_pdf_receipt
+from flask import Blueprint, jsonify, request, send_file, current_app, Response, stream_with_context
+# Import DB, Account, Transaction, ReceiptJob models
+from models import db, Account, Transaction, ReceiptJob
+from datetime import datetime, timedelta            # For timestamps
+from sqlalchemy import select
+# Receipts are rendered on demand into a bounded on-disk cache
+from utils.receipts import build_json_receipt, open_receipt
+from utils.receipt_cache import get_receipt_cache, FORMATS
+from utils.receipt_worker import enqueue_receipt, notify_workers
+from utils.pagination import page_args, keyset_page
+from utils.model_cache import get_cached            # Read-through cache for single rows
+from utils.db_routing import read_replica           # GET handlers read from replicas
+from utils import ledger                            # Atomic balance updates
+from utils.idempotency import idempotent            # Idempotency-Key support
+import csv
+import io
 import json
-import os
 
 # Blueprint for transactions routes, all start with /transactions
 transactions_bp = Blueprint(
     "transactions", __name__, url_prefix="/transactions")
 
 # ============================================================
-# Helper: Log transaction into database
+# Helper: Receipt links returned by money-moving endpoints
 # ============================================================
 
 
-def log_transaction(user_id, account_id, amount, txn_type):
-    txn = Transaction(
-        user_id=user_id,
-        account_id=account_id,
-        amount=amount,
-        transaction_type=txn_type,
-        date_added=datetime.utcnow()
-    )
-    db.session.add(txn)        # Add transaction to DB session
-    return txn                  # Return txn object (not yet committed)
+def receipt_links(txn_id):
+    return {
+        "status_url": f"/transactions/{txn_id}/receipt",
+        "json_url": f"/transactions/{txn_id}/receipt.json",
+        "pdf_url": f"/transactions/{txn_id}/receipt.pdf"
+    }
 
 # ============================================================
-# Helper: Save JSON + PDF receipts
+# GET ALL TRANSACTIONS
 # ============================================================
 
 
-def generate_receipts(transaction):
-    os.makedirs("receipts", exist_ok=True)  # Ensure receipts folder exists
-
-    # JSON receipt
-    json_receipt = {
-        "receipt_id": f"tx-{transaction.id}",
-        "transaction_id": transaction.id,
-        "user_id": transaction.user_id,
-        "account_id": transaction.account_id,
-        "transaction_type": transaction.transaction_type,
-        "amount": str(transaction.amount),
-        "date": transaction.date_added.isoformat()
-    }
-
-    # Save JSON
-    json_path = f"receipts/transaction_{transaction.id}.json"
-    with open(json_path, "w") as f:
-        json.dump(json_receipt, f, indent=4)
-
-    # Generate PDF
-    pdf_path = f"receipts/transaction_{transaction.id}.pdf"
-    generate_pdf_receipt(transaction, pdf_path)
+@transactions_bp.get("/")  # GET /transactions?limit=&cursor= → one page of transactions
+@read_replica
+def get_all_transactions():
+    try:
+        limit, after_id = page_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    return json_path, pdf_path, json_receipt
+    txns, next_cursor = keyset_page(Transaction.query, Transaction.id, limit, after_id)
+    return jsonify({
+        "items": [
+            {
+                "id": t.id,
+                "user_id": t.user_id,
+                "account_id": t.account_id,
+                "amount": t.amount,
+                "transaction_type": t.transaction_type,
+                "date_added": t.date_added
+            } for t in txns
+        ],
+        "next_cursor": next_cursor  # None on the last page
+    })
 
 # ============================================================
-# GET ALL TRANSACTIONS
+# EXPORT TRANSACTIONS (streamed)
 # ============================================================
 
-
-@transactions_bp.get("/")  # GET /transactions → all transactions
-def get_all_transactions():
-    txns = Transaction.query.all()
-    return jsonify([
-        {
+EXPORT_COLUMNS = ["id", "user_id", "account_id", "amount", "transaction_type", "date_added"]
+EXPORT_CHUNK = 1000                                 # Rows fetched and written per chunk
+
+
+def parse_date_range(args):
+    # from/to accept YYYY-MM-DD or a full ISO timestamp; a date-only "to" includes that day
+    bounds = []
+    for name in ("from", "to"):
+        value = args.get(name)
+        if not value:
+            bounds.append(None)
+            continue
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f"{name} must be YYYY-MM-DD or an ISO-8601 timestamp")
+        if name == "to" and len(value) == 10:
+            parsed += timedelta(days=1)
+        bounds.append(parsed)
+    return bounds
+
+
+def export_rows(start, end):
+    stmt = select(*(getattr(Transaction, c) for c in EXPORT_COLUMNS)).order_by(Transaction.id)
+    if start:
+        stmt = stmt.where(Transaction.date_added >= start)
+    if end:
+        stmt = stmt.where(Transaction.date_added < end)
+    # yield_per keeps a server-side cursor open and buffers only one chunk of rows
+    result = db.session.execute(stmt.execution_options(yield_per=EXPORT_CHUNK))
+    for chunk in result.partitions():
+        yield chunk
+
+
+def ndjson_stream(start, end):
+    for chunk in export_rows(start, end):
+        yield "".join(json.dumps({
             "id": t.id,
             "user_id": t.user_id,
             "account_id": t.account_id,
-            "amount": float(t.amount),
+            "amount": str(t.amount),
             "transaction_type": t.transaction_type,
-            "date_added": t.date_added
-        } for t in txns
-    ])
+            "date_added": t.date_added.isoformat() if t.date_added else None
+        }) + "\n" for t in chunk)
+
+
+def csv_stream(start, end):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for chunk in export_rows(start, end):
+        writer.writerows(
+            (t.id, t.user_id, t.account_id, t.amount, t.transaction_type,
+             t.date_added.isoformat() if t.date_added else "") for t in chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():                                # Header only (no rows)
+        yield buffer.getvalue()
+
+
+@transactions_bp.get("/export")  # GET /transactions/export?format=ndjson|csv&from=&to=
+@read_replica
+def export_transactions():
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in ("ndjson", "csv"):
+        return jsonify({"error": "format must be ndjson or csv"}), 400
+    try:
+        start, end = parse_date_range(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if fmt == "csv":
+        body, mimetype = csv_stream(start, end), "text/csv"
+    else:
+        body, mimetype = ndjson_stream(start, end), "application/x-ndjson"
+
+    return Response(stream_with_context(body), mimetype=mimetype, headers={
+        "Content-Disposition": f"attachment; filename=transactions.{fmt}"
+    })
 
 # ============================================================
 # GET TRANSACTION BY ID
@@ -83,18 +152,86 @@ def get_all_transactions():
 
 
 @transactions_bp.get("/<int:txn_id>")  # GET /transactions/<id>
+@read_replica
 def get_transaction(txn_id):
-    t = Transaction.query.get(txn_id)
+    t = get_cached(Transaction, txn_id, transaction_payload)
     if not t:
         return jsonify({"error": "Transaction not found"}), 404
-    return jsonify({
+    return jsonify(t)
+
+
+def transaction_payload(t):
+    return {
         "id": t.id,
         "user_id": t.user_id,
         "account_id": t.account_id,
-        "amount": float(t.amount),
+        "amount": t.amount,
         "transaction_type": t.transaction_type,
         "date_added": t.date_added
-    })
+    }
+
+# ============================================================
+# GET RECEIPT STATUS
+# ============================================================
+
+
+@transactions_bp.get("/<int:txn_id>/receipt")  # GET /transactions/<id>/receipt
+def get_receipt(txn_id):
+    t = Transaction.query.get(txn_id)
+    if not t:
+        return jsonify({"error": "Transaction not found"}), 404
+
+    cache = get_receipt_cache(current_app)
+    json_receipt = build_json_receipt(t)
+    links = receipt_links(t.id)
+    if all(cache.contains(cache.key_for(json_receipt, fmt), fmt) for fmt in FORMATS):
+        return jsonify({"transaction_id": t.id, "status": "ready", **links})
+
+    # Not rendered (or evicted): queue a background render unless one is in flight
+    job = ReceiptJob.query.filter(
+        ReceiptJob.transaction_id == t.id,
+        ReceiptJob.status.in_(["pending", "running"])
+    ).first()
+    if not job:
+        job = enqueue_receipt(t)
+        db.session.commit()
+        notify_workers()
+
+    return jsonify({"transaction_id": t.id, "status": job.status, "job": job.to_dict(), **links}), 202
+
+# ============================================================
+# DOWNLOAD RECEIPT (rendered on first request)
+# ============================================================
+
+
+@transactions_bp.get("/<int:txn_id>/receipt.<fmt>")  # GET /transactions/<id>/receipt.pdf|json
+def download_receipt(txn_id, fmt):
+    if fmt not in FORMATS:
+        return jsonify({"error": "format must be json or pdf"}), 404
+
+    t = Transaction.query.get(txn_id)
+    if not t:
+        return jsonify({"error": "Transaction not found"}), 404
+
+    f = open_receipt(t, fmt, get_receipt_cache(current_app))
+    return send_file(f, mimetype=FORMATS[fmt], download_name=f"transaction_{t.id}.{fmt}")
+
+# ============================================================
+# Helper: Validate account IDs and amounts from request JSON
+# ============================================================
+
+
+def parse_money_request(data, id_fields):
+    ids = []
+    for field in id_fields:
+        value = data.get(field)
+        if isinstance(value, bool):
+            raise ValueError(f"{field} must be an integer")
+        try:
+            ids.append(int(value))
+        except (TypeError, ValueError):
+            raise ValueError(f"{field} must be an integer")
+    return ids, ledger.parse_amount(data.get("amount"))
 
 # ============================================================
 # DEPOSIT
@@ -102,43 +239,30 @@ def get_transaction(txn_id):
 
 
 @transactions_bp.post("/deposit")  # POST /transactions/deposit
+@idempotent
 def deposit():
     data = request.get_json() or {}
 
-    account_id = data.get("account_id")
-    amount = data.get("amount")
-
-    if account_id is None or amount is None:
+    if data.get("account_id") is None or data.get("amount") is None:
         return jsonify({"error": "account_id and amount are required"}), 400
 
     try:
-        amount = float(amount)
-    except ValueError:
-        return jsonify({"error": "amount must be a number"}), 400
+        (account_id,), amount = parse_money_request(data, ["account_id"])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    if amount <= 0:
-        return jsonify({"error": "Amount must be positive"}), 400
-
-    account = Account.query.get(account_id)
-    if not account:
-        return jsonify({"error": "Account not found"}), 404
-
-    # Update balance
-    account.balance = float(account.balance) + amount
-
-    # Log transaction
-    txn = log_transaction(account.user_id, account.id, amount, "deposit")
-    db.session.commit()
-
-    # Generate receipts
-    json_path, pdf_path, json_receipt = generate_receipts(txn)
+    # Single atomic UPDATE + transaction log (receipts are rendered when first requested)
+    try:
+        result = ledger.deposit(account_id, amount)
+    except ledger.LedgerError as e:
+        return jsonify({"error": str(e)}), e.status_code
 
+    txn = result["transaction"]
     return jsonify({
         "message": "Deposit successful",
-        "new_balance": float(account.balance),
-        "transaction": json_receipt,
-        "receipt_json": json_path,
-        "receipt_pdf": pdf_path
+        "new_balance": result["new_balance"],
+        "transaction": txn,
+        "receipt": receipt_links(txn["transaction_id"])
     }), 201
 
 # ============================================================
@@ -147,40 +271,30 @@ def deposit():
 
 
 @transactions_bp.post("/withdraw")  # POST /transactions/withdraw
+@idempotent
 def withdraw():
-    data = request.get_json()
-    account_id = data.get("account_id")
-    amount = data.get("amount")
+    data = request.get_json() or {}
 
-    if not account_id or not amount:
+    if not data.get("account_id") or not data.get("amount"):
         return jsonify({"error": "account_id and amount required"}), 400
 
-    if amount <= 0:
-        return jsonify({"error": "Amount must be positive"}), 400
-
-    account = Account.query.get(account_id)
-    if not account:
-        return jsonify({"error": "Account not found"}), 404
-
-    if account.balance < amount:
-        return jsonify({"error": "Insufficient funds"}), 400
-
-    # Update balance
-    account.balance -= amount
-
-    # Log transaction
-    txn = log_transaction(account.user_id, account.id, amount, "withdrawal")
-    db.session.commit()
+    try:
+        (account_id,), amount = parse_money_request(data, ["account_id"])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    # Generate receipts
-    json_path, pdf_path, json_receipt = generate_receipts(txn)
+    # Conditional UPDATE: only succeeds if the balance covers the amount
+    try:
+        result = ledger.withdraw(account_id, amount)
+    except ledger.LedgerError as e:
+        return jsonify({"error": str(e)}), e.status_code
 
+    txn = result["transaction"]
     return jsonify({
         "message": "Withdrawal successful",
-        "new_balance": float(account.balance),
-        "transaction": json_receipt,
-        "receipt_json": json_path,
-        "receipt_pdf": pdf_path
+        "new_balance": result["new_balance"],
+        "transaction": txn,
+        "receipt": receipt_links(txn["transaction_id"])
     })
 
 # ============================================================
@@ -189,53 +303,98 @@ def withdraw():
 
 
 @transactions_bp.post("/transfer")  # POST /transactions/transfer
+@idempotent
 def transfer():
-    data = request.get_json()
-
-    from_id = data.get("from_account_id")
-    to_id = data.get("to_account_id")
-    amount = data.get("amount")
+    data = request.get_json() or {}
 
-    if not all([from_id, to_id, amount]):
+    if not all([data.get("from_account_id"), data.get("to_account_id"), data.get("amount")]):
         return jsonify({"error": "from_account_id, to_account_id, amount required"}), 400
 
-    if amount <= 0:
-        return jsonify({"error": "Amount must be positive"}), 400
-
-    from_acct = Account.query.get(from_id)
-    to_acct = Account.query.get(to_id)
+    try:
+        (from_id, to_id), amount = parse_money_request(data, ["from_account_id", "to_account_id"])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    if not from_acct or not to_acct:
+    # Both balance changes and both log rows commit together (or not at all)
+    try:
+        result = ledger.transfer(from_id, to_id, amount)
+    except ledger.AccountNotFound:
         return jsonify({"error": "One or both accounts not found"}), 404
-
-    if from_acct.balance < amount:
-        return jsonify({"error": "Insufficient funds"}), 400
-
-    # Update balances
-    from_acct.balance -= amount
-    to_acct.balance += amount
-
-    # Log transactions
-    out_txn = log_transaction(
-        from_acct.user_id, from_acct.id, amount, "transfer_out")
-    in_txn = log_transaction(
-        to_acct.user_id, to_acct.id, amount, "transfer_in")
-    db.session.commit()
-
-    # Generate receipts
-    out_json_path, out_pdf_path, out_json = generate_receipts(out_txn)
-    in_json_path, in_pdf_path, in_json = generate_receipts(in_txn)
+    except ledger.LedgerError as e:
+        return jsonify({"error": str(e)}), e.status_code
 
     return jsonify({
         "message": "Transfer successful",
-        "from_account_balance": float(from_acct.balance),
-        "to_account_balance": float(to_acct.balance),
+        "from_account_balance": result["from_account_balance"],
+        "to_account_balance": result["to_account_balance"],
         "receipts": {
-            "outgoing": {"json": out_json_path, "pdf": out_pdf_path},
-            "incoming": {"json": in_json_path, "pdf": in_pdf_path}
+            "outgoing": receipt_links(result["outgoing"]["transaction_id"]),
+            "incoming": receipt_links(result["incoming"]["transaction_id"])
         }
     })
 
+# ============================================================
+# BATCH (many operations, one DB transaction)
+# ============================================================
+
+BATCH_ID_FIELDS = {
+    "deposit": ["account_id"],
+    "withdraw": ["account_id"],
+    "transfer": ["from_account_id", "to_account_id"],
+}
+
+
+@transactions_bp.post("/batch")  # POST /transactions/batch
+@idempotent
+def batch():
+    data = request.get_json() or {}
+    operations = data.get("operations")
+    atomic = data.get("atomic", True)                  # False → best-effort, apply what succeeds
+
+    if not isinstance(operations, list) or not operations:
+        return jsonify({"error": "operations must be a non-empty list"}), 400
+    if len(operations) > current_app.config["BATCH_MAX_OPERATIONS"]:
+        return jsonify({"error": f"At most {current_app.config['BATCH_MAX_OPERATIONS']} operations per batch"}), 400
+    if not isinstance(atomic, bool):
+        return jsonify({"error": "atomic must be true or false"}), 400
+
+    # Validate everything up front, before touching the database
+    valid, invalid = [], []
+    for index, op in enumerate(operations):
+        op_type = op.get("type") if isinstance(op, dict) else None
+        if op_type not in BATCH_ID_FIELDS:
+            invalid.append({"index": index, "status": "invalid", "error": "type must be deposit, withdraw or transfer"})
+            continue
+        try:
+            ids, amount = parse_money_request(op, BATCH_ID_FIELDS[op_type])
+        except ValueError as e:
+            invalid.append({"index": index, "status": "invalid", "error": str(e)})
+            continue
+        if op_type == "transfer" and ids[0] == ids[1]:
+            invalid.append({"index": index, "status": "invalid", "error": "Cannot transfer to the same account"})
+            continue
+        valid.append({"index": index, "type": op_type, "amount": amount, **dict(zip(BATCH_ID_FIELDS[op_type], ids))})
+
+    if invalid and atomic:
+        return jsonify({"error": "Batch rejected; no operations were applied", "results": invalid}), 400
+
+    result = {"results": [], "balances": {}}
+    if valid:
+        try:
+            result = ledger.apply_batch(valid, atomic)
+        except ledger.BatchRejected as e:
+            return jsonify({"error": str(e), "results": e.results}), e.status_code
+
+    results = sorted(result["results"] + invalid, key=lambda r: r["index"])
+    applied = sum(1 for r in results if r["status"] == "ok")
+    return jsonify({
+        "message": "Batch applied" if applied == len(results) else "Batch partially applied",
+        "applied": applied,
+        "failed": len(results) - applied,
+        "results": results,
+        "balances": {str(aid): balance for aid, balance in result["balances"].items()}
+    }), 200
+
 
 # from flask import Blueprint, jsonify, request
 # from models import db, Account, Transaction
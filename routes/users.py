@@ -1,6 +1,9 @@
 from flask import Blueprint, request, jsonify        # Flask Blueprint for routes, request for input, jsonify for JSON responses
 from models import db, User                           # Import database and User model
 from datetime import datetime                         # For handling date fields
+from utils.pagination import page_args, keyset_page   # Cursor-based pagination
+from utils.model_cache import get_cached             # Read-through cache for single rows
+from utils.db_routing import read_replica            # GET handlers read from replicas
 
 # Create Blueprint for users routes; all routes start with /users
 users_bp = Blueprint("users", __name__, url_prefix="/users")
@@ -8,25 +11,36 @@ users_bp = Blueprint("users", __name__, url_prefix="/users")
 # --------------------------
 # GET ALL USERS
 # --------------------------
-@users_bp.get("/")                                    # GET /users → fetch all users
+@users_bp.get("/")                                    # GET /users?limit=&cursor= → fetch one page of users
+@read_replica
 def get_all_users():
-    users = User.query.all()                         # Query all users from the database
-    return jsonify([u.to_dict() for u in users]), 200 # Return JSON list of users, HTTP 200 OK
+    try:
+        limit, after_id = page_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    users, next_cursor = keyset_page(User.query, User.id, limit, after_id)
+    return jsonify({
+        "items": [u.to_dict() for u in users],
+        "next_cursor": next_cursor                   # None on the last page
+    }), 200
 
 # --------------------------
 # GET SINGLE USER
 # --------------------------
 @users_bp.get("/<int:user_id>")                      # GET /users/<id> → fetch a specific user by ID
+@read_replica
 def get_user(user_id):
-    user = User.query.get(user_id)                   # Query user by primary key
+    user = get_cached(User, user_id, User.to_dict)   # Cached JSON of user by primary key
     if not user:                                     # If user does not exist
         return jsonify({"error": "User not found"}), 404
-    return jsonify(user.to_dict()), 200              # Return JSON of user, HTTP 200 OK
+    return jsonify(user), 200                        # Return JSON of user, HTTP 200 OK
 
 # --------------------------
 # GET USER BY USERNAME
 # --------------------------
 @users_bp.get("/name/<string:username>")            # GET /users/name/<username> → fetch user by username
+@read_replica
 def get_user_by_name(username):
     user = User.query.filter_by(username=username).first()  # Query first user matching the username
     if not user:
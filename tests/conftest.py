@@ -0,0 +1,84 @@
+"""Fixtures for the API tests.
+
+The app runs against a throwaway SQLite file (so the single writer thread and
+the request thread share one database), with tables recreated and in-process
+caches cleared for every test. Every test is also checked for N+1 queries
+(utils/pytest_nplusone.py); mark exceptions with ``nplusone_allowed``.
+Install the test tools with ``pip install -r requirements-dev.txt``.
+"""
+import os
+import sys
+import tempfile
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp = tempfile.mkdtemp(prefix="bank-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/test.db"   # Never a real database
+os.environ["RECEIPT_DIR"] = os.path.join(_tmp, "receipts")
+os.environ["RECEIPT_WORKERS"] = "0"
+os.environ["CAPTURE_ENABLED"] = "0"
+os.environ["PROFILE_ENABLED"] = "0"
+os.environ["METRICS_DIR"] = os.path.join(_tmp, "metrics")
+os.environ["JWT_SECRET_KEY"] = "test-secret-key-that-is-long-enough-for-hs256"
+# Cheap, and deliberately not the default method: hashing must honour the config
+os.environ["PASSWORD_HASH_METHOD"] = "pbkdf2:sha256:1000"
+
+pytest_plugins = ["utils.pytest_nplusone"]
+
+
+@pytest.fixture
+def app():
+    from app import app as flask_app
+    from models import db
+    from utils import idempotency, model_cache, token_store
+
+    with flask_app.app_context():
+        db.drop_all()
+        db.create_all()
+    for cache in (model_cache._cache, model_cache._invalidated, idempotency._cache, token_store._revoked):
+        if cache is not None:
+            cache.clear()
+    yield flask_app
+
+
+@pytest.fixture(autouse=True)
+def _check_nplusone(nplusone):
+    """Fail any test whose requests run one query shape NPLUSONE_THRESHOLD times."""
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(app):
+    """make_user(username, password="pw", balances=(...)) -> (user_id, [account_id, ...])"""
+    from models import db, Account, User
+
+    def make(username, password="pw", balances=()):
+        with app.app_context():
+            user = User(username=username, name=username.title(), dob=date(1990, 1, 1),
+                        email=f"{username}@example.com")
+            user.set_password(password)
+            db.session.add(user)
+            db.session.flush()
+            accounts = [Account(user_id=user.id, balance=balance) for balance in balances]
+            db.session.add_all(accounts)
+            db.session.commit()
+            return user.id, [account.id for account in accounts]
+    return make
+
+
+@pytest.fixture
+def balance(app):
+    """balance(account_id) -> the stored Decimal balance."""
+    from models import db, Account
+
+    def get(account_id):
+        with app.app_context():
+            return db.session.get(Account, account_id).balance
+    return get
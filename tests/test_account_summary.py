@@ -0,0 +1,40 @@
+"""Cash-flow summary per account (routes/accounts.py, utils/account_summary.py)."""
+from sqlalchemy import event
+
+from models import db
+
+
+def test_summary_totals(client, make_user):
+    _, (acct,) = make_user("ann", balances=["100.00"])
+    for path, amount in (("deposit", "10.00"), ("deposit", "5.50"), ("withdraw", "3.00")):
+        assert client.post(f"/transactions/{path}", json={"account_id": acct, "amount": amount}).status_code < 300
+    r = client.get(f"/accounts/{acct}/summary?bucket=day")
+    assert r.status_code == 200
+    assert len(r.json["buckets"]) == 1
+    assert r.json["totals"]["deposit"] == {"count": 2, "total": "15.50"}
+    assert r.json["totals"]["withdrawal"] == {"count": 1, "total": "3.00"}
+
+
+def test_unknown_account_is_a_404(client):
+    assert client.get("/accounts/999/summary").status_code == 404
+
+
+def test_cached_account_needs_no_existence_query(app, client, make_user, monkeypatch):
+    monkeypatch.setitem(app.config, "MODEL_CACHE_ENABLED", True)
+    _, (acct,) = make_user("ann", balances=["1.00"])
+    assert client.get(f"/accounts/{acct}").status_code == 200   # Now cached
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        assert client.get(f"/accounts/{acct}/summary").status_code == 200
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert statements                                  # The summary query itself
+    assert not [s for s in statements if "FROM accounts" in s]
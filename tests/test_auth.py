@@ -0,0 +1,121 @@
+"""Login and refresh-token rotation (routes/auth.py, utils/token_store.py)."""
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from models import db
+from utils import token_store
+
+
+def login(client, username="ann", password="pw"):
+    return client.post("/auth/login", json={"username": username, "password": password})
+
+
+def bearer(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_refresh_rotates_the_token(client, make_user):
+    make_user("ann")
+    refresh_token = login(client).json["refresh_token"]
+
+    r = client.post("/auth/refresh", headers=bearer(refresh_token))
+    assert r.status_code == 200
+    assert r.json["refresh_token"] != refresh_token
+    assert client.post("/auth/refresh", headers=bearer(r.json["refresh_token"])).status_code == 200
+
+
+def test_reused_refresh_token_is_rejected(client, make_user):
+    make_user("ann")
+    refresh_token = login(client).json["refresh_token"]
+    assert client.post("/auth/refresh", headers=bearer(refresh_token)).status_code == 200
+
+    r = client.post("/auth/refresh", headers=bearer(refresh_token))
+    assert r.status_code == 401
+
+
+def test_logout_revokes_the_refresh_token(client, make_user):
+    make_user("ann")
+    refresh_token = login(client).json["refresh_token"]
+    assert client.post("/auth/logout", headers=bearer(refresh_token)).status_code == 200
+    assert client.post("/auth/refresh", headers=bearer(refresh_token)).status_code == 401
+
+
+def test_wrong_password(client, make_user):
+    make_user("ann")
+    assert login(client, password="nope").status_code == 401
+
+
+def test_failed_revocation_is_not_cached(app, monkeypatch):
+    payload = {"jti": "jti-1", "type": "refresh", "sub": "1", "exp": 4102444800}
+
+    def fail():
+        raise OperationalError("COMMIT", {}, Exception("disk I/O error"))
+
+    with app.app_context():
+        monkeypatch.setattr(db.session, "commit", fail)
+        with pytest.raises(OperationalError):
+            token_store.revoke(payload)
+        db.session.rollback()
+        monkeypatch.undo()
+        assert not token_store.is_revoked(payload)
+
+
+def stored_hash(app, username):
+    from models.user import User
+
+    with app.app_context():
+        return User.query.filter_by(username=username).one().password_hash
+
+
+def test_login_rehashes_once_to_the_configured_method(app, client, make_user, monkeypatch):
+    from models.user import User
+
+    make_user("ann")
+    with app.app_context():                            # Stored with older parameters
+        user = User.query.filter_by(username="ann").one()
+        user.set_password("pw", method="pbkdf2:sha256:2000")
+        db.session.commit()
+
+    rehashes = []
+    set_password = User.set_password
+    monkeypatch.setattr(User, "set_password", lambda self, *a: rehashes.append(a) or set_password(self, *a))
+
+    assert login(client).status_code == 200
+    upgraded = stored_hash(app, "ann")
+    assert upgraded.startswith(app.config["PASSWORD_HASH_METHOD"] + "$")
+    assert len(rehashes) == 1
+
+    assert login(client).status_code == 200           # Converged: no second KDF, no write
+    assert stored_hash(app, "ann") == upgraded
+    assert len(rehashes) == 1
+
+
+def test_hashing_pool_sees_the_configured_method(app):
+    from models.user import User
+    from utils.hashing import get_hasher
+
+    with app.app_context():
+        user = User(username="bob")
+        get_hasher(app).run(user.set_password, "pw")   # No method passed: resolved on the pool thread
+        assert user.password_hash.startswith(app.config["PASSWORD_HASH_METHOD"] + "$")
+
+
+def test_slow_hash_is_a_503(app, client, make_user, monkeypatch):
+    import threading
+
+    from models.user import User
+    from utils import hashing
+
+    make_user("ann")
+    monkeypatch.setitem(app.config, "PASSWORD_HASH_TIMEOUT", 0.05)
+    monkeypatch.setattr(hashing, "_hasher_pid", None)  # Rebuilt with the tiny timeout
+    monkeypatch.setattr(hashing, "_hasher", None)
+    release = threading.Event()
+    monkeypatch.setattr(User, "check_password", lambda self, password: release.wait(5))
+
+    try:
+        r = login(client)
+    finally:
+        release.set()
+    assert r.status_code == 503
+    assert r.headers["Retry-After"] == "1"
@@ -0,0 +1,85 @@
+"""POST /transactions/batch, atomic and partial (utils/ledger.py)."""
+from decimal import Decimal
+
+from sqlalchemy import event
+
+from models import db, Transaction
+
+
+def transaction_count(app):
+    with app.app_context():
+        return db.session.query(Transaction).count()
+
+
+def test_atomic_batch_is_all_or_nothing(app, client, make_user, balance):
+    _, (a, b) = make_user("ann", balances=["10.00", "0.00"])
+    r = client.post("/transactions/batch", json={"operations": [
+        {"type": "deposit", "account_id": b, "amount": "5"},
+        {"type": "transfer", "from_account_id": a, "to_account_id": b, "amount": "8"},
+        {"type": "withdraw", "account_id": a, "amount": "3"},   # Only 2.00 left after the transfer
+    ]})
+    assert r.status_code == 400
+    assert [x["status"] for x in r.json["results"]] == ["rolled_back", "rolled_back", "failed"]
+    assert (balance(a), balance(b)) == (Decimal("10.00"), Decimal("0.00"))
+    assert transaction_count(app) == 0
+
+
+def test_atomic_batch_rejects_invalid_operations_up_front(app, client, make_user, balance):
+    _, (a,) = make_user("ann", balances=["10.00"])
+    r = client.post("/transactions/batch", json={"operations": [
+        {"type": "deposit", "account_id": a, "amount": "5"},
+        {"type": "deposit", "account_id": a, "amount": "-1"},
+    ]})
+    assert r.status_code == 400
+    assert r.json["results"] == [{"index": 1, "status": "invalid", "error": "Amount must be positive"}]
+    assert balance(a) == Decimal("10.00")
+
+
+def test_non_atomic_batch_applies_what_succeeds(app, client, make_user, balance):
+    _, (a, b) = make_user("ann", balances=["10.00", "0.00"])
+    r = client.post("/transactions/batch", json={"atomic": False, "operations": [
+        {"type": "transfer", "from_account_id": a, "to_account_id": b, "amount": "8"},
+        {"type": "withdraw", "account_id": a, "amount": "3"},
+        {"type": "deposit", "account_id": 999, "amount": "1"},
+        {"type": "bogus"},
+        {"type": "withdraw", "account_id": b, "amount": "2"},
+    ]})
+    assert r.status_code == 200
+    assert r.json["message"] == "Batch partially applied"
+    assert (r.json["applied"], r.json["failed"]) == (2, 3)
+    statuses = [(x["index"], x["status"], x.get("error")) for x in r.json["results"]]
+    assert statuses == [
+        (0, "ok", None),
+        (1, "failed", "Insufficient funds"),
+        (2, "failed", "Account not found"),
+        (3, "invalid", "type must be deposit, withdraw or transfer"),
+        (4, "ok", None),
+    ]
+    assert len(r.json["results"][0]["transaction_ids"]) == 2
+    assert r.json["balances"] == {str(a): "2.00", str(b): "6.00"}
+    assert (balance(a), balance(b)) == (Decimal("2.00"), Decimal("6.00"))
+    assert transaction_count(app) == 3
+
+
+def test_batch_inserts_all_rows_in_one_statement(app, client, make_user):
+    _, accounts = make_user("ann", balances=["0.00"] * 4)
+    inserts = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO transactions"):
+            inserts.append(statement)
+
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        r = client.post("/transactions/batch", json={"operations": [
+            {"type": "deposit", "account_id": acct, "amount": str(i + 1)} for i, acct in enumerate(accounts * 3)]})
+    finally:
+        with app.app_context():
+            event.remove(db.engine, "before_cursor_execute", record)
+    assert r.status_code == 200
+    assert len(inserts) == 1
+    with app.app_context():                            # Ids were matched to the right operations
+        for result in r.json["results"]:
+            txn = db.session.get(Transaction, result["transaction_ids"][0])
+            assert (txn.account_id, txn.amount) == (accounts[result["index"] % 4], result["index"] + 1)
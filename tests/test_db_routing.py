@@ -0,0 +1,95 @@
+"""Pool settings and read-replica routing (config.py, utils/db_routing.py)."""
+from datetime import date
+
+import pytest
+from flask import Flask, jsonify
+from sqlalchemy import select
+
+from config import engine_options, replica_binds
+from models import db, User
+from utils.db_routing import pool_stats, read_replica, use_primary
+
+
+@pytest.fixture
+def routed(tmp_path, monkeypatch):
+    """An app with a primary and two replicas, each holding one user named after it."""
+    monkeypatch.setattr(db, "metadatas", dict(db.metadatas))   # init_app adds one per bind key
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path}/primary.db"
+    app.config["SQLALCHEMY_BINDS"] = replica_binds([f"sqlite:///{tmp_path}/replica_{i}.db" for i in range(2)])
+    db.init_app(app)
+
+    def names():
+        return [u.username for u in User.query.all()]
+
+    @app.get("/replica")
+    @read_replica
+    def on_replica():
+        return jsonify(names())
+
+    @app.get("/primary")
+    def on_primary():
+        return jsonify(names())
+
+    @app.get("/pinned")
+    @read_replica
+    def pinned():
+        with use_primary():
+            return jsonify(names())
+
+    @app.get("/locked")
+    @read_replica
+    def locked():
+        return jsonify([u.username for u in db.session.scalars(select(User).with_for_update())])
+
+    @app.post("/write")
+    @read_replica
+    def write():
+        db.session.add(User(username="new", name="New", dob=date(1990, 1, 1), email="new@example.com",
+                            password_hash="x"))
+        db.session.commit()
+        return jsonify([])
+
+    with app.app_context():
+        engines = [("primary", db.engine)] + [(f"replica_{i}", db.engines[f"replica_{i}"]) for i in range(2)]
+        for name, engine in engines:
+            db.metadata.create_all(engine)
+            with engine.begin() as conn:
+                conn.execute(User.__table__.insert().values(
+                    username=name, name=name, dob=date(1990, 1, 1), email=f"{name}@example.com", password_hash="x"))
+    yield app
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def test_read_only_views_alternate_between_replicas(routed):
+    client = routed.test_client()
+    seen = {tuple(client.get("/replica").json) for _ in range(4)}
+    assert seen == {("replica_0",), ("replica_1",)}
+
+
+def test_everything_else_reads_the_primary(routed):
+    client = routed.test_client()
+    assert client.get("/primary").json == ["primary"]
+    assert client.get("/pinned").json == ["primary"]
+    assert client.get("/locked").json == ["primary"]   # SELECT ... FOR UPDATE
+    assert client.post("/write").status_code == 200
+    assert client.get("/primary").json == ["primary", "new"]   # The write went to the primary
+    assert client.get("/replica").json in (["replica_0"], ["replica_1"])
+
+
+def test_pool_stats_cover_every_engine(routed):
+    with routed.app_context():
+        stats = pool_stats(db)
+    assert set(stats) == {"primary", "replica_0", "replica_1"}
+    assert all("status" in entry for entry in stats.values())
+
+
+def test_engine_options_come_from_the_environment(monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "3")
+    monkeypatch.setenv("DB_MAX_OVERFLOW", "0")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "0")
+    options = engine_options("postgresql+psycopg://db/bank")
+    assert (options["pool_size"], options["max_overflow"], options["pool_pre_ping"]) == (3, 0, False)
+    assert engine_options("sqlite:///x.db") == {"pool_pre_ping": False}   # SQLite keeps its pool defaults
@@ -0,0 +1,61 @@
+"""Streamed transaction exports (GET /transactions/export)."""
+import csv
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+import routes.transactions
+from models import db, Transaction
+
+DATES = [datetime(2026, 9, 1, 8), datetime(2026, 9, 15, 23, 59), datetime(2026, 9, 16), datetime(2026, 10, 2)]
+
+
+@pytest.fixture
+def history(app, make_user, monkeypatch):
+    monkeypatch.setattr(routes.transactions, "EXPORT_CHUNK", 3)   # Several chunks per export
+    user_id, (acct,) = make_user("ann", balances=["0.00"])
+    with app.app_context():
+        db.session.add_all([Transaction(user_id=user_id, account_id=acct, amount=Decimal(i + 1) / 4,
+                                        transaction_type="deposit", date_added=d)
+                            for i, d in enumerate(DATES * 2)])
+        db.session.commit()
+
+
+def test_ndjson_export(client, history):
+    r = client.get("/transactions/export")
+    assert r.status_code == 200
+    assert r.mimetype == "application/x-ndjson"
+    assert r.headers["Content-Disposition"] == "attachment; filename=transactions.ndjson"
+    rows = [json.loads(line) for line in r.get_data(as_text=True).splitlines()]
+    assert [row["id"] for row in rows] == list(range(1, 9))
+    assert rows[0] == {"id": 1, "user_id": 1, "account_id": 1, "amount": "0.25",
+                       "transaction_type": "deposit", "date_added": "2026-09-01T08:00:00"}
+
+
+def test_csv_export(client, history):
+    r = client.get("/transactions/export?format=csv")
+    assert r.status_code == 200
+    assert r.mimetype == "text/csv"
+    rows = list(csv.reader(io.StringIO(r.get_data(as_text=True))))
+    assert rows[0] == routes.transactions.EXPORT_COLUMNS
+    assert len(rows) == 9                              # Header written once, not per chunk
+    assert rows[2] == ["2", "1", "1", "0.50", "deposit", "2026-09-15T23:59:00"]
+
+
+def test_date_only_to_includes_that_day(client, history):
+    r = client.get("/transactions/export?from=2026-09-02&to=2026-09-15")
+    ids = [json.loads(line)["id"] for line in r.get_data(as_text=True).splitlines()]
+    assert ids == [2, 6]
+
+
+def test_empty_csv_export_is_just_the_header(client, app):
+    r = client.get("/transactions/export?format=csv")
+    assert r.get_data(as_text=True).splitlines() == [",".join(routes.transactions.EXPORT_COLUMNS)]
+
+
+@pytest.mark.parametrize("query", ["format=xml", "from=yesterday", "to=2026-13-01"])
+def test_bad_export_arguments_are_rejected(client, query):
+    assert client.get(f"/transactions/export?{query}").status_code == 400
@@ -0,0 +1,99 @@
+"""Idempotency-Key handling on the money-moving endpoints (utils/idempotency.py)."""
+import hashlib
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from models import db, IdempotencyKey
+
+
+def test_retry_replays_the_stored_response(client, make_user, balance):
+    _, (acct,) = make_user("ann", balances=["10.00"])
+    headers = {"Idempotency-Key": "deposit-1"}
+    first = client.post("/transactions/deposit", json={"account_id": acct, "amount": "5"}, headers=headers)
+    again = client.post("/transactions/deposit", json={"account_id": acct, "amount": "5"}, headers=headers)
+
+    assert first.status_code == again.status_code == 201
+    assert "Idempotency-Replayed" not in first.headers
+    assert again.headers["Idempotency-Replayed"] == "true"
+    assert again.get_data() == first.get_data()
+    assert balance(acct) == Decimal("15.00")           # Applied once
+
+
+def test_key_reused_with_a_different_body_is_rejected(client, make_user, balance):
+    _, (acct,) = make_user("ann", balances=["10.00"])
+    headers = {"Idempotency-Key": "deposit-2"}
+    assert client.post("/transactions/deposit", json={"account_id": acct, "amount": "5"},
+                       headers=headers).status_code == 201
+
+    r = client.post("/transactions/deposit", json={"account_id": acct, "amount": "6"}, headers=headers)
+    assert r.status_code == 422
+    assert balance(acct) == Decimal("15.00")
+
+
+def test_keys_are_scoped_per_endpoint(client, make_user, balance):
+    _, (acct,) = make_user("ann", balances=["10.00"])
+    headers = {"Idempotency-Key": "same-key"}
+    assert client.post("/transactions/deposit", json={"account_id": acct, "amount": "5"},
+                       headers=headers).status_code == 201
+    assert client.post("/transactions/withdraw", json={"account_id": acct, "amount": "5"},
+                       headers=headers).status_code == 200
+    assert balance(acct) == Decimal("10.00")
+
+
+def bearer(client, username):
+    token = client.post("/auth/login", json={"username": username, "password": "pw"}).json["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_keys_are_scoped_per_caller(client, make_user, balance):
+    _, (acct,) = make_user("ann", balances=["10.00"])
+    make_user("bob")
+    body = {"account_id": acct, "amount": "5"}
+    ann = client.post("/transactions/deposit", json=body,
+                      headers={**bearer(client, "ann"), "Idempotency-Key": "k"})
+    bob = client.post("/transactions/deposit", json=body,
+                      headers={**bearer(client, "bob"), "Idempotency-Key": "k"})
+    anonymous = client.post("/transactions/deposit", json=body, headers={"Idempotency-Key": "k"})
+
+    assert ann.status_code == bob.status_code == anonymous.status_code == 201
+    assert "Idempotency-Replayed" not in bob.headers   # Not ann's stored response
+    assert "Idempotency-Replayed" not in anonymous.headers
+    assert balance(acct) == Decimal("25.00")
+
+
+def claim(app, key, body, age):
+    """An in_progress claim of ``age`` left behind by a worker that died mid-request."""
+    with app.app_context():
+        db.session.add(IdempotencyKey(
+            caller="", key=key, endpoint="/transactions/deposit", status="in_progress",
+            request_hash=hashlib.sha256(json.dumps(body).encode()).hexdigest(),
+            date_added=datetime.utcnow() - age, expires_at=datetime.utcnow() + timedelta(days=1)))
+        db.session.commit()
+
+
+def post_raw(client, body, key):
+    return client.post("/transactions/deposit", data=json.dumps(body),
+                       content_type="application/json", headers={"Idempotency-Key": key})
+
+
+def test_claim_within_its_lease_is_in_progress(app, client, make_user, balance):
+    _, (acct,) = make_user("ann", balances=["10.00"])
+    body = {"account_id": acct, "amount": "5"}
+    claim(app, "fresh", body, timedelta(seconds=1))
+    assert post_raw(client, body, "fresh").status_code == 409
+    assert balance(acct) == Decimal("10.00")
+
+
+def test_abandoned_claim_is_taken_over_after_its_lease(app, client, make_user, balance):
+    _, (acct,) = make_user("ann", balances=["10.00"])
+    body = {"account_id": acct, "amount": "5"}
+    claim(app, "stuck", body, timedelta(seconds=app.config["IDEMPOTENCY_LEASE"] + 1))
+
+    assert post_raw(client, body, "stuck").status_code == 201
+    replayed = post_raw(client, body, "stuck")
+    assert replayed.headers["Idempotency-Replayed"] == "true"
+    assert balance(acct) == Decimal("15.00")
+
+    claim(app, "stuck-2", body, timedelta(seconds=app.config["IDEMPOTENCY_LEASE"] + 1))
+    assert post_raw(client, {**body, "amount": "6"}, "stuck-2").status_code == 422
@@ -0,0 +1,87 @@
+"""orjson / stdlib JSON provider (utils/json_provider.py)."""
+import dataclasses
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+from flask import Flask, jsonify
+
+from utils import json_provider
+from utils.json_provider import FastJSONProvider
+
+BACKENDS = ["json", pytest.param("orjson", marks=pytest.mark.skipif(json_provider.orjson is None,
+                                                                    reason="orjson not installed"))]
+
+
+@dataclasses.dataclass
+class Point:
+    x: int
+    y: int
+
+
+class Row:
+    def to_dict(self):
+        return {"id": 1, "balance": Decimal("0.10")}
+
+
+def provider(backend):
+    app = Flask(__name__)
+    app.config["JSON_BACKEND"] = backend
+    app.json = FastJSONProvider(app)
+    return app
+
+
+PAYLOAD = {
+    "balance": Decimal("10.50"),
+    "tiny": Decimal("0.1") + Decimal("0.2"),           # 0.3 exactly, not 0.30000000000000004
+    "big": Decimal("12345678901234567890.01"),
+    "at": datetime(2024, 5, 1, 12, 30, 0, 123456),
+    "utc": datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc),
+    "dob": date(1990, 1, 2),
+    "row": Row(),
+    "point": Point(1, 2),
+    1: "non-string key",
+    "name": "Zoë",
+}
+EXPECTED = (
+    '{"balance":"10.50","tiny":"0.3","big":"12345678901234567890.01",'
+    '"at":"2024-05-01T12:30:00.123456","utc":"2024-05-01T12:30:00+00:00","dob":"1990-01-02",'
+    '"row":{"id":1,"balance":"0.10"},"point":{"x":1,"y":2},"1":"non-string key","name":"Zoë"}'
+)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_both_backends_encode_the_same(backend):
+    app = provider(backend)
+    assert app.json.use_orjson == (backend == "orjson")
+    assert app.json.dumps(PAYLOAD) == EXPECTED
+    with app.app_context():
+        assert jsonify(PAYLOAD).get_data(as_text=True) == EXPECTED
+        assert jsonify([1, 2]).mimetype == "application/json"
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_loads_round_trips_and_unknown_types_fail(backend):
+    app = provider(backend)
+    assert app.json.loads('{"a":[1,"2.50",null]}') == {"a": [1, "2.50", None]}
+    with pytest.raises(TypeError):
+        app.json.dumps({"x": object()})
+
+
+def test_stdlib_options_are_honoured_on_either_backend():
+    app = provider("auto")
+    assert app.json.dumps({"b": 1, "a": Decimal("1")}, sort_keys=True, indent=1) == '{\n "a":"1",\n "b":1\n}'
+
+
+def test_orjson_backend_requires_orjson(monkeypatch):
+    monkeypatch.setattr(json_provider, "orjson", None)
+    with pytest.raises(RuntimeError, match="orjson is not installed"):
+        provider("orjson")
+    assert provider("auto").json.use_orjson is False
+
+
+def test_api_amounts_are_exact_strings(client, make_user):
+    _, (acct,) = make_user("ann", balances=["0.10"])
+    client.post("/transactions/deposit", json={"account_id": acct, "amount": "0.20"})
+    body = client.get(f"/accounts/{acct}").get_data(as_text=True)
+    assert '"balance":"0.30"' in body
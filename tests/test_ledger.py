@@ -0,0 +1,137 @@
+"""Deposit / withdraw / transfer through the HTTP API (utils/ledger.py)."""
+import random
+import threading
+from collections import Counter
+from decimal import Decimal
+
+from sqlalchemy import event
+
+from models import db, Transaction
+
+
+def transaction_count(app):
+    with app.app_context():
+        return db.session.query(Transaction).count()
+
+
+def test_deposit_normalises_amount(client, make_user, balance):
+    _, (acct,) = make_user("ann", balances=["10.00"])
+    r = client.post("/transactions/deposit", json={"account_id": acct, "amount": "1E+3"})
+    assert r.status_code == 201
+    assert r.json["new_balance"] == "1010.00"
+    assert r.json["transaction"]["amount"] == "1000.00"
+    assert balance(acct) == Decimal("1010.00")
+
+
+def test_amount_above_column_limit_is_rejected(app, client, make_user, balance):
+    _, (acct,) = make_user("ann", balances=["10.00"])
+    for amount in ("1e20", "100000000", 100000000):
+        r = client.post("/transactions/deposit", json={"account_id": acct, "amount": amount})
+        assert r.status_code == 400, amount
+    assert balance(acct) == Decimal("10.00")
+    assert transaction_count(app) == 0
+
+
+def test_withdraw_cannot_overdraw(app, client, make_user, balance):
+    _, (acct,) = make_user("ann", balances=["50.00"])
+    r = client.post("/transactions/withdraw", json={"account_id": acct, "amount": "50.01"})
+    assert r.status_code == 400
+    assert r.json["error"] == "Insufficient funds"
+    assert balance(acct) == Decimal("50.00")
+    assert transaction_count(app) == 0
+
+    r = client.post("/transactions/withdraw", json={"account_id": acct, "amount": "50.00"})
+    assert r.status_code == 200
+    assert r.json["new_balance"] == "0.00"
+
+
+def test_transfer_cannot_overdraw(app, client, make_user, balance):
+    _, (a, b) = make_user("ann", balances=["5.00", "0.00"])
+    r = client.post("/transactions/transfer", json={"from_account_id": a, "to_account_id": b, "amount": "5.01"})
+    assert r.status_code == 400
+    assert (balance(a), balance(b)) == (Decimal("5.00"), Decimal("0.00"))
+    assert transaction_count(app) == 0
+
+
+def test_transfer_updates_rows_in_id_order(app, client, make_user, balance):
+    _, (low, high) = make_user("ann", balances=["100.00", "100.00"])
+    updated = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE accounts"):
+            updated.append(parameters[1])              # SET balance = balance ± ? WHERE accounts.id = ? ...
+
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        # Both directions lock the lower id first, so opposing transfers can't deadlock
+        for source, target in ((high, low), (low, high)):
+            updated.clear()
+            r = client.post("/transactions/transfer",
+                            json={"from_account_id": source, "to_account_id": target, "amount": "2.50"})
+            assert r.status_code == 200
+            assert updated == [low, high]
+    finally:
+        with app.app_context():
+            event.remove(db.engine, "before_cursor_execute", record)
+    assert (balance(low), balance(high)) == (Decimal("100.00"), Decimal("100.00"))
+
+
+def test_transfer_to_missing_account(client, make_user, balance):
+    _, (acct,) = make_user("ann", balances=["5.00"])
+    r = client.post("/transactions/transfer", json={"from_account_id": acct, "to_account_id": 999, "amount": "1"})
+    assert r.status_code == 404
+    assert balance(acct) == Decimal("5.00")
+
+
+def test_credit_past_the_column_limit_is_rejected(app, client, make_user, balance):
+    _, (full, other) = make_user("ann", balances=["99999990.00", "50.00"])
+    r = client.post("/transactions/deposit", json={"account_id": full, "amount": "10.00"})
+    assert r.status_code == 400
+    assert r.json["error"] == "Balance would exceed 99999999.99"
+
+    r = client.post("/transactions/transfer", json={"from_account_id": other, "to_account_id": full, "amount": "10"})
+    assert r.status_code == 400
+    assert (balance(full), balance(other)) == (Decimal("99999990.00"), Decimal("50.00"))
+    assert transaction_count(app) == 0
+
+    r = client.post("/transactions/batch", json={"operations": [
+        {"type": "deposit", "account_id": full, "amount": "5"}, {"type": "deposit", "account_id": full, "amount": "5"}]})
+    assert r.status_code == 400
+    assert r.json["results"][1]["error"] == "Balance would exceed 99999999.99"
+
+    r = client.post("/transactions/deposit", json={"account_id": full, "amount": "9.99"})
+    assert r.json["new_balance"] == "99999999.99"
+
+
+def test_concurrent_transfers_conserve_money(app, make_user, balance):
+    _, accounts = make_user("ann", balances=["100.00"] * 4)
+    statuses = Counter()
+    lock = threading.Lock()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        client = app.test_client()
+        for _ in range(25):
+            source, target = rng.sample(accounts, 2)
+            amount = f"{rng.randint(1, 6000) / 100:.2f}"   # Large enough to hit the overdraft guard
+            r = client.post("/transactions/transfer",
+                            json={"from_account_id": source, "to_account_id": target, "amount": amount})
+            with lock:
+                statuses[r.status_code] += 1
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert set(statuses) <= {200, 400} and statuses[200] > 0
+    balances = [balance(acct) for acct in accounts]
+    assert sum(balances) == Decimal("400.00")
+    assert min(balances) >= 0
+    with app.app_context():                            # Each balance agrees with its transaction log
+        for acct, current in zip(accounts, balances):
+            signed = sum(t.amount if t.transaction_type == "transfer_in" else -t.amount
+                         for t in Transaction.query.filter_by(account_id=acct))
+            assert current == Decimal("100.00") + signed
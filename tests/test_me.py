@@ -0,0 +1,47 @@
+"""Bounded /auth/me dashboard payload (routes/auth.py)."""
+import pytest
+
+
+@pytest.fixture
+def ann(client, make_user):
+    """ann with two accounts, 30 deposits and 5 withdrawals; returns her auth header."""
+    _, (a, b) = make_user("ann", balances=["0.00", "100.00"])
+    r = client.post("/transactions/batch", json={"operations": [
+        {"type": "deposit", "account_id": a, "amount": "1.50"} for _ in range(30)
+    ] + [{"type": "withdraw", "account_id": b, "amount": "2"} for _ in range(5)]})
+    assert r.status_code == 200
+    make_user("bob", balances=["5.00"])              # Another user's data must not show up
+    token = client.post("/auth/login", json={"username": "ann", "password": "pw"}).json["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_recent_transactions_are_limited_and_newest_first(app, client, ann):
+    r = client.get("/auth/me", headers=ann)
+    assert r.status_code == 200
+    recent = r.json["transactions"]
+    assert len(recent) == app.config["ME_RECENT_TRANSACTIONS"]
+    assert [t["id"] for t in recent] == sorted((t["id"] for t in recent), reverse=True)
+    assert recent[0]["transaction_type"] == "withdrawal"
+    assert [a["balance"] for a in r.json["accounts"]] == ["45.00", "90.00"]
+
+
+def test_summary_covers_every_transaction(client, ann):
+    summary = client.get("/auth/me?limit=0", headers=ann).json["transaction_summary"]
+    assert summary == {"count": 35, "by_type": {
+        "deposit": {"count": 30, "total": "45.00"},
+        "withdrawal": {"count": 5, "total": "10.00"},
+    }}
+
+
+@pytest.mark.parametrize("limit, expected", [("0", 0), ("-5", 0), ("3", 3), ("50", 35)])
+def test_limit(client, ann, limit, expected):
+    assert len(client.get(f"/auth/me?limit={limit}", headers=ann).json["transactions"]) == expected
+
+
+def test_limit_is_capped_at_the_max(app, client, ann, monkeypatch):
+    monkeypatch.setitem(app.config, "ME_MAX_RECENT_TRANSACTIONS", 10)
+    assert len(client.get("/auth/me?limit=1000", headers=ann).json["transactions"]) == 10
+
+
+def test_bad_limit(client, ann):
+    assert client.get("/auth/me?limit=many", headers=ann).status_code == 400
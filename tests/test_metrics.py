@@ -0,0 +1,63 @@
+"""SQL timing and the /metrics exposition (utils/metrics.py)."""
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from models import db
+from utils.metrics import registry
+
+
+def sql_seconds():
+    return registry.counters.get(("db_seconds_total", ()), 0)
+
+
+def test_failed_statements_leave_no_timing_state(app):
+    with app.app_context():
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                db.session.execute(text("SELECT * FROM no_such_table"))
+            db.session.rollback()
+        before = sql_seconds()
+        connection = db.session.connection()
+        db.session.execute(text("SELECT 1"))
+        assert not connection.info.get("metrics_started")   # Nothing piles up on the pooled connection
+        assert 0 <= sql_seconds() - before < 1
+
+
+def test_metrics_endpoint_counts_requests(client):
+    client.get("/users/")
+    body = client.get("/metrics").get_data(as_text=True)
+    assert 'http_requests_total{endpoint="users.get_all_users",method="GET",status="200"}' in body
+
+
+def test_without_a_metrics_dir_the_output_says_it_is_per_process(app, monkeypatch):
+    from utils.metrics import exposition
+
+    monkeypatch.delitem(app.extensions, "metrics_writer")
+    assert exposition(app).startswith("# Metrics of process ")
+
+
+@pytest.mark.parametrize("testing", [True, False])     # Propagated to the caller, or turned into a 500 page
+def test_a_raising_view_is_counted_as_a_500(testing):
+    from flask import Flask
+
+    from utils.metrics import _request_sql, init_metrics
+
+    app = Flask(__name__)
+    app.config.update(TESTING=testing, METRICS_ENABLED=True, METRICS_DIR="")
+    init_metrics(app)
+
+    @app.get("/boom")
+    def boom():
+        raise RuntimeError("boom")
+
+    key = ("http_requests_total", (("endpoint", "boom"), ("method", "GET"), ("status", "500")))
+    before = registry.counters.get(key, 0)
+    client = app.test_client()
+    if testing:
+        with pytest.raises(RuntimeError):
+            client.get("/boom")
+    else:
+        assert client.get("/boom").status_code == 500
+    assert registry.counters.get(key, 0) - before == 1
+    assert _request_sql.get() is None                  # The per-request SQL counter was reset
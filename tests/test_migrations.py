@@ -0,0 +1,41 @@
+"""Schema migration runner and the hot lookup indexes (utils/migrations.py)."""
+from sqlalchemy import create_engine, inspect, text
+
+from models import db
+from utils.migrations import MIGRATIONS, run_migrations
+
+INDEXES = {"ix_transactions_account_id_date_added", "ix_transactions_user_id_date_added", "ix_accounts_user_id"}
+
+
+def index_names(engine):
+    inspector = inspect(engine)
+    return {ix["name"] for table in ("accounts", "transactions") for ix in inspector.get_indexes(table)}
+
+
+def test_old_database_gets_the_indexes_once(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/old.db")
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:                       # A database created before the indexes existed
+        for name in INDEXES:
+            conn.execute(text(f"DROP INDEX {name}"))
+    assert not INDEXES & index_names(engine)
+
+    assert run_migrations(engine) == [version for version, _ in MIGRATIONS]
+    assert INDEXES <= index_names(engine)
+    assert run_migrations(engine) == []                # Recorded in schema_migrations
+
+
+def test_fresh_database_records_migrations_without_failing(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/new.db")
+    assert run_migrations(engine) == [version for version, _ in MIGRATIONS]
+    assert INDEXES <= index_names(engine)
+
+
+def test_account_history_uses_the_composite_index(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/plan.db")
+    run_migrations(engine)
+    with engine.connect() as conn:
+        plan = " ".join(row[-1] for row in conn.execute(text(
+            "EXPLAIN QUERY PLAN SELECT * FROM transactions WHERE account_id = 1 ORDER BY date_added DESC")))
+    assert "ix_transactions_account_id_date_added" in plan
+    assert "TEMP B-TREE" not in plan                   # Served in index order, no sort step
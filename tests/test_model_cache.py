@@ -0,0 +1,71 @@
+"""Read-through model cache and its invalidation (utils/model_cache.py)."""
+import os
+import subprocess
+import sys
+
+import pytest
+
+from utils import model_cache, shm_cache
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_elsewhere(code, **env):
+    """Run ``code`` in a separate Python process with the test environment plus ``env``."""
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env={**os.environ, **env},
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    return result.stdout.strip()
+
+
+@pytest.fixture
+def shared_cache(app, tmp_path, monkeypatch):
+    path = str(tmp_path / "cache")
+    for name, value in (("CACHE_BACKEND", "shared"), ("SHARED_CACHE_PATH", path), ("MODEL_CACHE_ENABLED", True)):
+        monkeypatch.setitem(app.config, name, value)
+    for module, attr in ((model_cache, "_cache"), (model_cache, "_invalidated"), (shm_cache, "_shared")):
+        monkeypatch.setattr(module, attr, None)       # Rebuilt on the shared backend
+    return {"CACHE_BACKEND": "shared", "SHARED_CACHE_PATH": path}
+
+
+def test_commit_in_another_process_invalidates_the_cached_row(client, make_user, shared_cache):
+    _, (acct,) = make_user("ann", balances=["10.00"])
+    assert client.get(f"/accounts/{acct}").json["balance"] == "10.00"   # Now cached
+
+    status = run_elsewhere(
+        "from app import app\n"
+        f"r = app.test_client().post('/transactions/deposit', json={{'account_id': {acct}, 'amount': '5'}})\n"
+        "print(r.status_code)", **shared_cache)
+    assert status == "201"
+
+    assert client.get(f"/accounts/{acct}").json["balance"] == "15.00"
+
+
+def test_commit_here_is_seen_by_another_process(client, make_user, shared_cache):
+    _, (acct,) = make_user("ann", balances=["10.00"])
+    read = (
+        "from app import app\n"
+        f"print(app.test_client().get('/accounts/{acct}').json['balance'])")
+    assert run_elsewhere(read, **shared_cache) == "10.00"                 # Cached by the other process
+
+    assert client.post("/transactions/deposit", json={"account_id": acct, "amount": "5"}).status_code == 201
+    assert run_elsewhere(read, **shared_cache) == "15.00"
+
+
+def test_writes_through_the_orm_invalidate(client, make_user, shared_cache):
+    user_id, _ = make_user("ann")
+    assert client.get(f"/users/{user_id}").json["job"] is None
+    assert client.put(f"/users/{user_id}", json={"job": "Pilot"}).status_code == 200
+    assert client.get(f"/users/{user_id}").json["job"] == "Pilot"
+
+
+@pytest.mark.parametrize("env, enabled", [
+    ({}, "False"),                                     # Per-process cache: off by default
+    ({"CACHE_BACKEND": "shared"}, "True"),
+    ({"CACHE_BACKEND": "shared", "MODEL_CACHE_ENABLED": "0"}, "False"),
+    ({"MODEL_CACHE_ENABLED": "1"}, "True"),            # Explicit opt-in, e.g. a single process
+])
+def test_cache_defaults_on_only_with_a_shared_backend(env, enabled, monkeypatch):
+    monkeypatch.delenv("CACHE_BACKEND", raising=False)
+    monkeypatch.delenv("MODEL_CACHE_ENABLED", raising=False)
+    assert run_elsewhere("from config import Config; print(Config.MODEL_CACHE_ENABLED)", **env) == enabled
@@ -0,0 +1,77 @@
+"""N+1 checks on the read endpoints, and the detector itself (utils/nplusone.py)."""
+import pytest
+
+from models import db, Account, User
+from utils.nplusone import NPlusOneDetected, detect_nplusone, nplusone_scope
+
+N = 8                                                  # Rows per list; above the default threshold of 5
+
+
+@pytest.fixture
+def seeded(client, make_user):
+    """N users with two accounts each, and a deposit into every account; returns (user ids, account ids)."""
+    users, accounts = [], []
+    for i in range(N):
+        user_id, account_ids = make_user(f"user{i}", balances=["100.00", "0.00"])
+        users.append(user_id)
+        accounts += account_ids
+    r = client.post("/transactions/batch", json={"operations": [
+        {"type": "deposit", "account_id": acct, "amount": "1"} for acct in accounts]})
+    assert r.status_code == 200
+    return users, accounts
+
+
+def bearer_for(client, username):
+    token = client.post("/auth/login", json={"username": username, "password": "pw"}).json["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.mark.parametrize("path", ["/users/", "/accounts/", "/transactions/"])
+def test_list_endpoints(client, seeded, path):
+    r = client.get(f"{path}?limit=100")
+    assert r.status_code == 200
+    assert len(r.json["items"]) >= N
+
+
+def test_detail_endpoints(client, seeded):
+    users, accounts = seeded
+    for path in (f"/users/{users[0]}", f"/accounts/{accounts[0]}", "/transactions/1",
+                 f"/accounts/{accounts[0]}/summary?bucket=day"):
+        assert client.get(path).status_code == 200, path
+
+
+def test_me(client, seeded):
+    r = client.get("/auth/me", headers=bearer_for(client, "user0"))
+    assert r.status_code == 200
+    assert len(r.json["accounts"]) == 2
+
+
+def test_exports(client, seeded):
+    assert client.get("/transactions/export?format=csv").status_code == 200
+    assert client.get("/transactions/export").get_data().count(b"\n") == 2 * N
+
+
+def test_repeated_requests_are_counted_separately(client, make_user):
+    _, (acct,) = make_user("ann", balances=["0.00"])
+    for _ in range(N):                                 # Same UPDATE in every request, but once per request
+        assert client.post("/transactions/deposit", json={"account_id": acct, "amount": "1"}).status_code == 201
+
+
+@pytest.mark.nplusone_allowed
+def test_lazy_loads_in_a_request_are_detected(app, seeded):
+    with nplusone_scope(threshold=5, action="raise"):
+        with app.test_request_context("/users/"):
+            app.preprocess_request()                   # Runs before_request: installs the request's tracker
+            with pytest.raises(NPlusOneDetected, match="from accounts"):
+                [len(user.accounts) for user in User.query.all()]
+
+
+@pytest.mark.nplusone_allowed
+def test_detect_nplusone_counts_a_whole_block(app, seeded):
+    with app.app_context():
+        with detect_nplusone(threshold=5, action="log") as tracker:
+            for account in Account.query.all():
+                account.user.username
+        assert tracker.reported
+        assert "from users" in tracker.reported[0][0]
+        db.session.rollback()
@@ -0,0 +1,65 @@
+"""Keyset pagination of the list endpoints (utils/pagination.py)."""
+import pytest
+
+from utils.pagination import MAX_LIMIT, decode_cursor, encode_cursor
+
+N = 7
+
+
+@pytest.fixture
+def seeded(client, make_user):
+    accounts = []
+    for i in range(N):
+        accounts += make_user(f"user{i}", balances=["0.00"])[1]
+    r = client.post("/transactions/batch", json={"operations": [
+        {"type": "deposit", "account_id": acct, "amount": "1"} for acct in accounts]})
+    assert r.status_code == 200
+
+
+def walk(client, path, limit):
+    """Follow next_cursor to the end; returns (ids in order, number of pages)."""
+    ids, pages, url = [], 0, f"{path}?limit={limit}"
+    while url:
+        r = client.get(url)
+        assert r.status_code == 200
+        assert set(r.json) == {"items", "next_cursor"}
+        ids += [item["id"] for item in r.json["items"]]
+        pages += 1
+        cursor = r.json["next_cursor"]
+        url = f"{path}?limit={limit}&cursor={cursor}" if cursor else None
+    return ids, pages
+
+
+@pytest.mark.parametrize("path", ["/users/", "/accounts/", "/transactions/"])
+def test_cursor_walk_returns_every_row_once_in_id_order(client, seeded, path):
+    ids, pages = walk(client, path, 3)
+    assert ids == list(range(1, N + 1))
+    assert pages == 3                                  # 3 + 3 + 1
+
+
+@pytest.mark.parametrize("path", ["/users/", "/accounts/", "/transactions/"])
+def test_exact_multiple_has_no_empty_trailing_page(client, seeded, path):
+    r = client.get(f"{path}?limit={N}")
+    assert len(r.json["items"]) == N
+    assert r.json["next_cursor"] is None
+
+
+def test_rows_added_mid_walk_are_not_skipped_or_repeated(client, seeded, make_user):
+    first = client.get("/accounts/?limit=4").json
+    make_user("late", balances=["0.00"])
+    rest = client.get(f"/accounts/?limit=100&cursor={first['next_cursor']}").json
+    assert [a["id"] for a in first["items"] + rest["items"]] == list(range(1, N + 2))
+
+
+@pytest.mark.parametrize("query", ["limit=0", f"limit={MAX_LIMIT + 1}", "limit=ten", "cursor=not-a-cursor",
+                                   f"cursor={encode_cursor('1')}"])
+def test_bad_page_arguments_are_rejected(client, query):
+    r = client.get(f"/users/?{query}")
+    assert r.status_code == 400
+    assert "error" in r.json
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(123456)
+    assert "=" not in cursor and "/" not in cursor and "+" not in cursor   # Safe in a query string
+    assert decode_cursor(cursor) == 123456
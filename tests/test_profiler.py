@@ -0,0 +1,101 @@
+"""On-demand and rolling request profiler (utils/profiler.py, routes/ops.py)."""
+import time
+
+import pytest
+from flask import Flask, jsonify
+from flask_jwt_extended import JWTManager, create_access_token
+
+from config import Config
+from routes.ops import ops_bp
+from utils.profiler import get_sampler, init_profiler
+
+ADMIN, USER = 7, 8
+
+
+def slow_view():
+    time.sleep(0.05)
+    return jsonify(ok=True)
+
+
+@pytest.fixture
+def profiled(tmp_path):
+    """A profiled app with a slow ``/slow`` view, a raising ``/boom`` view and the ops routes."""
+    def make(**config):
+        app = Flask(__name__)
+        app.config.update(JWT_SECRET_KEY=Config.JWT_SECRET_KEY, ADMIN_USER_IDS={ADMIN}, PROFILE_ENABLED=True,
+                          PROFILE_SAMPLE_EVERY=0, PROFILE_INTERVAL_MS=1, PROFILE_DIR=str(tmp_path / "profiles"),
+                          PROFILE_MAX_FILES=200)
+        app.config.update(config)
+        JWTManager(app)
+        init_profiler(app)
+        app.add_url_rule("/slow", view_func=slow_view)
+
+        @app.get("/boom")
+        def boom():
+            raise RuntimeError("boom")
+
+        app.register_blueprint(ops_bp)
+        return app
+    return make
+
+
+def auth(app, user_id):
+    if user_id is None:
+        return {}
+    with app.app_context():
+        return {"Authorization": f"Bearer {create_access_token(identity=str(user_id))}"}
+
+
+def test_admin_gets_a_collapsed_stack_profile(profiled):
+    app = profiled()
+    client = app.test_client()
+    r = client.get("/slow?profile=1", headers=auth(app, ADMIN))
+    name = r.headers["X-Profile-Id"]
+    assert "_ondemand_slow_view_" in name and int(r.headers["X-Profile-Samples"]) > 0
+
+    stacks = client.get(f"/ops/profiles/{name}", headers=auth(app, ADMIN)).get_data(as_text=True)
+    assert stacks
+    for line in stacks.splitlines():
+        _, count = line.rsplit(" ", 1)
+        assert int(count) > 0
+    assert any("slow_view (tests/test_profiler.py:" in line for line in stacks.splitlines())
+    assert client.get("/ops/profiles", headers=auth(app, ADMIN)).json == {"profiles": [name]}
+
+
+@pytest.mark.parametrize("who", [USER, None])
+def test_only_admins_can_ask_for_a_profile(profiled, who):
+    app = profiled()
+    client = app.test_client()
+    headers = {**auth(app, who), "X-Profile": "1"}
+    assert "X-Profile-Id" not in client.get("/slow", headers=headers).headers
+    assert client.get("/ops/profiles", headers=auth(app, who)).status_code == 403
+
+
+def test_rolling_mode_profiles_every_nth_request(profiled):
+    app = profiled(PROFILE_SAMPLE_EVERY=3)
+    client = app.test_client()
+    names = [client.get("/slow").headers.get("X-Profile-Id") for _ in range(6)]
+    assert [name is not None for name in names] == [False, False, True, False, False, True]
+    assert all("_rolling_" in name for name in names if name)
+
+
+def test_store_keeps_only_the_newest_files(profiled):
+    app = profiled(PROFILE_MAX_FILES=2)
+    client = app.test_client()
+    names = [client.get("/slow?profile=1", headers=auth(app, ADMIN)).headers["X-Profile-Id"] for _ in range(3)]
+    assert app.extensions["profile_store"].names() == names[:0:-1]
+
+
+def test_profile_names_cannot_leave_the_directory(profiled):
+    app = profiled()
+    client = app.test_client()
+    for name in ("..%2Fconfig.py", "missing.folded"):
+        assert client.get(f"/ops/profiles/{name}", headers=auth(app, ADMIN)).status_code == 404
+
+
+def test_a_raising_view_stops_its_profile(profiled):
+    app = profiled(TESTING=True)                         # The error propagates; after_request never runs
+    client = app.test_client()
+    with pytest.raises(RuntimeError):
+        client.get("/boom?profile=1", headers=auth(app, ADMIN))
+    assert get_sampler(app)._active == {}
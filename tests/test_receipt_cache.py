@@ -0,0 +1,10 @@
+"""Byte accounting of the on-disk receipt cache (utils/receipt_cache.py)."""
+from utils.receipt_cache import ReceiptCache
+
+
+def test_overwriting_a_key_does_not_grow_the_size(tmp_path):
+    cache = ReceiptCache(str(tmp_path), 1024 * 1024)
+    key = "a" * 64
+    for size in (100, 100, 40):
+        cache.put(key, "json", b"x" * size)
+    assert cache._size == 40
@@ -0,0 +1,37 @@
+"""Template-stamped receipt PDFs (utils/receipt_engine.py)."""
+import io
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+from utils.receipt_engine import render_receipt_pdf, write_receipts
+
+pypdf = pytest.importorskip("pypdf")
+
+
+def txn(id, amount="12.50", transaction_type="deposit"):
+    return SimpleNamespace(id=id, user_id=7, account_id=42, transaction_type=transaction_type,
+                           amount=Decimal(amount), date_added=datetime(2026, 3, 1, 12, 30))
+
+
+def test_receipt_is_a_valid_pdf_with_the_transaction_fields():
+    reader = pypdf.PdfReader(io.BytesIO(render_receipt_pdf(txn(3, transaction_type="transfer (out)"))), strict=True)
+    assert len(reader.pages) == 1
+    lines = reader.pages[0].extract_text().splitlines()   # Labels are drawn first, then the values
+    assert lines == ["Transaction Receipt", "Transaction ID: ", "User ID: ", "Account ID: ", "Type: ",
+                     "Amount: ", "Date: ", "3", "7", "42", "transfer (out)", "$12.50", "2026-03-01 12:30:00"]
+
+
+def test_rendering_is_deterministic():
+    assert render_receipt_pdf(txn(1)) == render_receipt_pdf(txn(1))
+    assert render_receipt_pdf(txn(1)) != render_receipt_pdf(txn(1, amount="12.51"))
+
+
+def test_write_receipts(tmp_path):
+    paths = write_receipts([txn(1), txn(22, amount="1000000.00")], str(tmp_path / "out"))
+    assert [p.rsplit("/", 1)[1] for p in paths] == ["transaction_1.pdf", "transaction_22.pdf"]
+    with open(paths[1], "rb") as f:
+        lines = pypdf.PdfReader(f, strict=True).pages[0].extract_text().splitlines()
+    assert lines[7:] == ["22", "7", "42", "deposit", "$1000000.00", "2026-03-01 12:30:00"]
@@ -0,0 +1,71 @@
+"""Receipt job queue and worker (utils/receipt_worker.py)."""
+from datetime import datetime, timedelta
+
+from models import db, ReceiptJob
+from utils import receipt_worker
+from utils.receipt_worker import process_pending_jobs
+
+
+def deposit(client, make_user):
+    _, (acct,) = make_user("ann", balances=["10.00"])
+    r = client.post("/transactions/deposit", json={"account_id": acct, "amount": "5"})
+    return r.json["transaction"]["transaction_id"]
+
+
+def test_status_request_queues_one_job_and_the_worker_renders_it(app, client, make_user):
+    txn_id = deposit(client, make_user)
+
+    first = client.get(f"/transactions/{txn_id}/receipt")
+    again = client.get(f"/transactions/{txn_id}/receipt")
+    assert first.status_code == again.status_code == 202
+    assert first.json["status"] == "pending"
+    assert again.json["job"]["job_id"] == first.json["job"]["job_id"]   # No duplicate while in flight
+
+    assert process_pending_jobs(app) == 1
+    r = client.get(f"/transactions/{txn_id}/receipt")
+    assert r.status_code == 200
+    assert r.json["status"] == "ready"
+    with app.app_context():
+        job = db.session.get(ReceiptJob, first.json["job"]["job_id"])
+        assert (job.status, job.attempts) == ("done", 1)
+        assert job.receipt_pdf.endswith(".pdf")
+
+
+def test_stale_running_job_is_reclaimed(app, client, make_user):
+    txn_id = deposit(client, make_user)
+    job_id = client.get(f"/transactions/{txn_id}/receipt").json["job"]["job_id"]
+    with app.app_context():                            # A worker claimed it, then died
+        job = db.session.get(ReceiptJob, job_id)
+        job.status, job.attempts = "running", 1
+        job.date_updated = datetime.utcnow() - timedelta(seconds=app.config["RECEIPT_JOB_TIMEOUT"] + 1)
+        db.session.commit()
+
+    assert process_pending_jobs(app) == 1
+    with app.app_context():
+        job = db.session.get(ReceiptJob, job_id)
+        assert (job.status, job.attempts) == ("done", 2)
+
+
+def test_running_job_is_not_claimed_twice(app, client, make_user):
+    txn_id = deposit(client, make_user)
+    job_id = client.get(f"/transactions/{txn_id}/receipt").json["job"]["job_id"]
+    with app.app_context():
+        job = db.session.get(ReceiptJob, job_id)
+        job.status, job.date_updated = "running", datetime.utcnow()
+        db.session.commit()
+
+    assert process_pending_jobs(app) == 0
+
+
+def test_failing_job_is_retried_then_marked_failed(app, client, make_user, monkeypatch):
+    def broken(txn, cache):
+        raise RuntimeError("renderer down")
+
+    monkeypatch.setattr(receipt_worker, "generate_receipts", broken)
+    txn_id = deposit(client, make_user)
+    job_id = client.get(f"/transactions/{txn_id}/receipt").json["job"]["job_id"]
+
+    assert process_pending_jobs(app) == app.config["RECEIPT_MAX_ATTEMPTS"]
+    with app.app_context():
+        job = db.session.get(ReceiptJob, job_id)
+        assert (job.status, job.attempts, job.error) == ("failed", app.config["RECEIPT_MAX_ATTEMPTS"], "renderer down")
@@ -0,0 +1,87 @@
+"""Host-wide shared-memory cache (utils/shm_cache.py)."""
+import multiprocessing
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from utils.shm_cache import Namespace, SharedMemoryCache
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "cache")
+
+
+def test_values_round_trip_with_their_types(path):
+    cache = SharedMemoryCache(path, slots=64)
+    value = {"balance": Decimal("10.50"), "dob": date(1990, 1, 2), "at": datetime(2026, 1, 1, 9, 30), "n": [1, None]}
+    cache.set("k", value)
+    assert cache.get("k") == value
+    assert cache.get("missing", "default") == "default"
+
+
+def test_lru_eviction_stays_within_a_set(path):
+    cache = SharedMemoryCache(path, slots=2, ways=2)   # One set of two slots
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")                                     # b is now least recently used
+    cache.set("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+    assert cache.evictions == 1
+
+
+def test_expired_and_oversized_entries_are_misses(path):
+    cache = SharedMemoryCache(path, slots=8, slot_size=128)
+    cache.set("old", 1, ttl=-1)
+    cache.set("big", "x" * 200)
+    assert cache.get("old") is None and cache.get("big") is None
+    assert len(cache) == 0
+
+
+def test_delete_and_namespaced_clear(path):
+    shared = SharedMemoryCache(path, slots=64)
+    model, tokens = Namespace(shared, "model", 60), Namespace(shared, "tokens", 60)
+    model.set("users:1", "u")
+    model.set("users:2", "v")
+    tokens.set("users:1", "t")
+    model.delete("users:2")
+    assert model.get("users:2") is None
+    model.clear()
+    assert (model.get("users:1"), tokens.get("users:1")) == (None, "t")
+
+
+def test_file_with_another_layout_is_refused(path):
+    SharedMemoryCache(path, slots=64)
+    with pytest.raises(ValueError, match="different layout"):
+        SharedMemoryCache(path, slots=128)
+
+
+def _writer(path, n, rounds):
+    cache = SharedMemoryCache(path, slots=16, ways=8)  # Far fewer slots than keys: constant eviction
+    for i in range(rounds):
+        cache.set(f"w{n}:{i % 40}", {"writer": n, "i": i % 40, "pad": "x" * (i % 300)})
+        cache.get(f"w{(n + 1) % 4}:{i % 40}")
+    SharedMemoryCache(path + ".done", slots=64).set(f"done:{n}", rounds)
+
+
+def test_processes_share_entries_without_torn_reads(path):
+    cache = SharedMemoryCache(path, slots=16, ways=8)
+    ctx = multiprocessing.get_context("fork")
+    writers = [ctx.Process(target=_writer, args=(path, n, 2000)) for n in range(4)]
+    for p in writers:
+        p.start()
+    seen = 0
+    while any(p.is_alive() for p in writers):         # Read while the other processes write
+        for n in range(4):
+            for i in range(40):
+                value = cache.get(f"w{n}:{i}")
+                if value is not None:
+                    assert (value["writer"], value["i"]) == (n, i)
+                    seen += 1
+    for p in writers:
+        p.join()
+        assert p.exitcode == 0
+    assert seen
+    done = SharedMemoryCache(path + ".done", slots=64)  # Written by the children, read here
+    assert [done.get(f"done:{n}") for n in range(4)] == [2000] * 4
@@ -0,0 +1,43 @@
+"""SQLite profile and single writer (utils/sqlite_tuning.py)."""
+import pytest
+from sqlalchemy import create_engine, text
+
+from models import db
+from utils.sqlite_tuning import configure_sqlite, get_writer
+
+
+def journal_mode(engine):
+    with engine.connect() as conn:
+        return conn.execute(text("PRAGMA journal_mode")).scalar()
+
+
+def busy_timeout(engine):
+    with engine.connect() as conn:
+        return conn.execute(text("PRAGMA busy_timeout")).scalar()
+
+
+def test_pragmas_apply_to_the_apps_engine_only(app, tmp_path):
+    with app.app_context():
+        assert journal_mode(db.engine) == "wal"
+        assert busy_timeout(db.engine) == app.config["SQLITE_BUSY_TIMEOUT_MS"]
+
+    other = create_engine(f"sqlite:///{tmp_path}/other.db")
+    assert journal_mode(other) == "delete"              # Not touched by the app's profile
+    other.dispose()
+
+
+def test_configure_is_idempotent(app):
+    listeners = app.extensions["sqlite_tuning"]
+    configure_sqlite(app)
+    assert app.extensions["sqlite_tuning"] is listeners
+
+
+@pytest.mark.parametrize("uri, single_writer, expected", [
+    ("sqlite:///x.db", True, True),
+    ("sqlite:///x.db", False, False),
+    ("postgresql+psycopg://db/bank", True, False),
+])
+def test_writer_only_for_sqlite(app, monkeypatch, uri, single_writer, expected):
+    monkeypatch.setitem(app.config, "SQLALCHEMY_DATABASE_URI", uri)
+    monkeypatch.setitem(app.config, "SQLITE_SINGLE_WRITER", single_writer)
+    assert (get_writer(app) is not None) == expected
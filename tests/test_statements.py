@@ -0,0 +1,77 @@
+"""Monthly PDF statements (utils/statement_generator.py)."""
+import io
+import os
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from flask import Flask
+
+from models import db, Account, Transaction, User
+from utils import statement_generator
+from utils.statement_generator import generate_all_statements, generate_statement, month_bounds
+
+pypdf = pytest.importorskip("pypdf")
+
+START, END = month_bounds("2026-09")
+
+
+@pytest.fixture
+def other_app(tmp_path):
+    """An app on its own database, not the one the global ``app`` module uses."""
+    other = Flask(__name__)
+    other.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path}/statements.db"
+    db.init_app(other)
+    with other.app_context():
+        db.create_all()
+        user = User(username="sam", name="Sam", dob=date(1990, 1, 1), email="sam@example.com", password_hash="x")
+        db.session.add(user)
+        db.session.flush()
+        busy, quiet = Account(user_id=user.id, balance=Decimal("145.00")), Account(user_id=user.id, balance=0)
+        db.session.add_all([busy, quiet])
+        db.session.flush()
+        db.session.add_all(
+            [Transaction(user_id=user.id, account_id=busy.id, amount=Decimal("1.00"), transaction_type="deposit",
+                         date_added=START + timedelta(hours=i)) for i in range(45)]
+            + [Transaction(user_id=user.id, account_id=busy.id, amount=Decimal("5.00"),
+                           transaction_type="withdrawal", date_added=END + timedelta(days=1))])
+        db.session.commit()
+        yield other
+        db.engine.dispose()
+
+
+def read(path):
+    with open(path, "rb") as f:
+        reader = pypdf.PdfReader(io.BytesIO(f.read()), strict=True)
+    return [page.extract_text() for page in reader.pages]
+
+
+def test_batch_renders_from_the_given_apps_database(other_app, tmp_path):
+    paths = generate_all_statements(other_app, START, END, str(tmp_path / "out"), workers=2)
+    assert [os.path.basename(p) for p in paths] == ["account_1.pdf", "account_2.pdf"]
+
+    busy = read(paths[0])
+    assert len(busy) == 2                              # 45 rows at 40 per page
+    assert "Opening balance: $105.00" in busy[0]       # 145 now, +45 in September, -5 in October
+    assert "Closing balance: $150.00    Transactions: 45" in busy[1]
+
+    quiet = read(paths[1])
+    assert len(quiet) == 1
+    assert "Closing balance: $0.00    Transactions: 0" in quiet[0]
+
+
+def test_failed_render_leaves_no_temp_file(other_app, tmp_path, monkeypatch):
+    def broken(self, content):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(statement_generator.StatementWriter, "add_page", broken)
+    path = str(tmp_path / "out" / "account_1.pdf")
+    with other_app.app_context(), pytest.raises(OSError):
+        generate_statement(1, START, END, path)
+    assert os.listdir(tmp_path / "out") == []
+
+
+def test_pool_is_sized_to_the_cpus_this_process_may_use(monkeypatch):
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: {0, 3}, raising=False)
+    monkeypatch.setattr(os, "cpu_count", lambda: 64)
+    assert statement_generator.available_cpus() == 2
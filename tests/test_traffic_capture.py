@@ -0,0 +1,92 @@
+"""Traffic capture writer and its replay (utils/traffic_capture.py, benchmarks/replay.py)."""
+import fcntl
+import json
+import os
+import threading
+import time
+
+import pytest
+from flask import Flask, jsonify, request
+
+from benchmarks.replay import target_path
+from utils.traffic_capture import CaptureWriter, init_capture
+
+
+def lines(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "requests.jsonl")
+
+
+def test_full_buffer_is_written_by_the_background_thread(path):
+    writer = CaptureWriter(path, max_bytes=1 << 20, backups=1, buffer_size=3, flush_interval=60)
+    for i in range(3):
+        writer.write({"i": i})
+    wait_for(lambda: len(lines(path)) == 3)
+    assert [r["i"] for r in lines(path)] == [0, 1, 2]
+
+
+def test_partial_buffer_is_written_after_the_interval(path):
+    writer = CaptureWriter(path, max_bytes=1 << 20, backups=1, buffer_size=1000, flush_interval=0.05)
+    writer.write({"i": 0})
+    wait_for(lambda: len(lines(path)) == 1)
+
+
+def test_write_does_not_wait_for_the_file_lock(path):
+    writer = CaptureWriter(path, max_bytes=1 << 20, backups=1, buffer_size=1, flush_interval=60)
+    with open(path + ".lock", "a") as held:             # Another process's flush in progress
+        fcntl.flock(held, fcntl.LOCK_EX)
+        senders = threading.Thread(target=lambda: [writer.write({"i": i}) for i in range(50)], daemon=True)
+        senders.start()
+        senders.join(timeout=2)
+        blocked = senders.is_alive()
+        fcntl.flock(held, fcntl.LOCK_UN)
+    assert not blocked
+    wait_for(lambda: len(lines(path)) == 50)
+
+
+def test_file_rotates_past_max_bytes(path):
+    writer = CaptureWriter(path, max_bytes=100, backups=2, buffer_size=1000, flush_interval=60)
+    for i in range(3):
+        writer.write({"pad": "x" * 60, "i": i})
+        writer.flush()
+    assert [r["i"] for r in lines(path)] == [2]
+    assert [r["i"] for r in lines(path + ".1")] == [1]
+    assert [r["i"] for r in lines(path + ".2")] == [0]
+
+
+def test_requests_are_captured_sanitized(path):
+    app = Flask(__name__)
+    app.config.update(CAPTURE_ENABLED=True, CAPTURE_PATH=path, CAPTURE_MAX_BYTES=1 << 20, CAPTURE_BACKUPS=1,
+                      CAPTURE_BUFFER_RECORDS=1000, CAPTURE_FLUSH_INTERVAL=60)
+    init_capture(app)
+
+    @app.post("/login")
+    def login():
+        return jsonify(ok=bool(request.json))
+
+    app.test_client().post("/login?limit=5&q=secret", json={"username": "ann", "password": "pw", "amount": "1.50"})
+    app.extensions["traffic_capture"].flush()
+    (record,) = lines(path)
+    assert record["body"] == {"username": "<redacted>", "password": "<redacted>", "amount": "1.50"}
+    assert record["query"] == {"limit": "5", "q": "<redacted>"}
+    assert (record["route"], record["status"]) == ("/login", 200)
+
+
+def test_replayed_query_is_url_encoded():
+    record = {"path": "/transactions/export", "route": "/transactions/export",
+              "query": {"cursor": "a b&c=d", "from": "2026-01-01", "q": "<redacted>"}}
+    assert target_path(record) == "/transactions/export?cursor=a+b%26c%3Dd&from=2026-01-01"
@@ -0,0 +1,82 @@
+"""Per-account cash-flow totals, aggregated in SQL.
+
+``account_summary()`` runs one ``GROUP BY (bucket, transaction_type)`` query
+over ``transactions`` filtered on ``account_id`` and a ``date_added`` range,
+which is exactly the ``ix_transactions_account_id_date_added`` index. It
+returns one row per bucket and type, so the response size depends on the
+number of buckets and never on the number of transactions.
+
+Buckets are calendar days, ISO weeks (starting Monday) or months, labelled
+by their first day. Bucketing is dialect-specific: ``date()`` and
+``strftime()`` on SQLite, ``date_trunc()`` elsewhere (Postgres).
+"""
+from decimal import Decimal
+
+from sqlalchemy import Date, cast, func, literal_column
+
+from models import db, Transaction
+
+BUCKETS = ("day", "week", "month")
+INFLOWS = ("deposit", "transfer_in")
+OUTFLOWS = ("withdrawal", "transfer_out")
+ZERO = Decimal("0.00")
+
+
+class SummaryTooLarge(ValueError):
+    """The range holds more buckets than SUMMARY_MAX_BUCKETS."""
+
+
+def bucket_expr(dialect, bucket):
+    column = Transaction.date_added
+    if dialect == "sqlite":
+        if bucket == "day":
+            return func.date(column)
+        if bucket == "week":                           # Next Sunday (or today), then back to Monday
+            return func.date(column, "weekday 0", "-6 days")
+        return func.strftime("%Y-%m-01", column)
+    # Literal, not a bind parameter: Postgres only matches the SELECT and GROUP BY
+    # expressions when they are identical (bucket is one of BUCKETS)
+    return cast(func.date_trunc(literal_column(f"'{bucket}'"), column), Date)
+
+
+def _empty():
+    return {t: {"count": 0, "total": ZERO} for t in INFLOWS + OUTFLOWS}
+
+
+def _add_net(entry):
+    entry["net"] = sum(entry[t]["total"] for t in INFLOWS) - sum(entry[t]["total"] for t in OUTFLOWS)
+    return entry
+
+
+def account_summary(account_id, start, end, bucket, max_buckets):
+    """{"buckets": [{"start", <type>: {"count", "total"}, "net"}...], "totals": {...}}, oldest bucket first."""
+    label = bucket_expr(db.session.get_bind().dialect.name, bucket).label("bucket")
+    stmt = (
+        db.select(label, Transaction.transaction_type,
+                  func.count(Transaction.id), func.sum(Transaction.amount))
+        .where(Transaction.account_id == account_id)
+        .group_by(label, Transaction.transaction_type)
+        .order_by(label)
+    )
+    if start:
+        stmt = stmt.where(Transaction.date_added >= start)
+    if end:
+        stmt = stmt.where(Transaction.date_added < end)
+
+    buckets, totals = {}, _empty()
+    for key, txn_type, count, total in db.session.execute(stmt):
+        key = str(key)                                 # str on SQLite, date on Postgres
+        if key not in buckets:
+            if len(buckets) == max_buckets:
+                raise SummaryTooLarge(f"More than {max_buckets} {bucket}s in range; narrow from/to "
+                                      "or use a larger bucket")
+            buckets[key] = {"start": key, **_empty()}
+        total = total if total is not None else ZERO
+        for entry in (buckets[key], totals):
+            cell = entry.setdefault(txn_type, {"count": 0, "total": ZERO})
+            cell["count"] += count
+            cell["total"] += total
+    return {
+        "buckets": [_add_net(entry) for entry in buckets.values()],
+        "totals": _add_net(totals),
+    }
@@ -0,0 +1,76 @@
+"""Read-replica routing for the SQLAlchemy session.
+
+Replicas are configured as ``SQLALCHEMY_BINDS`` entries named ``replica_<n>``
+(see ``DATABASE_REPLICA_URLS`` in config.py). GET handlers decorated with
+``@read_replica`` get one replica per request, picked round-robin, and their
+plain SELECTs run there. Everything else goes to the primary: writes,
+flushes, ``SELECT ... FOR UPDATE``, undecorated routes, and code wrapped in
+``use_primary()``. Without replicas configured nothing changes.
+"""
+from contextlib import contextmanager
+from functools import wraps
+from itertools import count
+
+from flask import g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Select
+
+REPLICA_PREFIX = "replica_"
+
+_round_robin = count()
+
+
+def replica_engines(db):
+    return [engine for key, engine in sorted(db.engines.items(), key=lambda kv: str(kv[0]))
+            if isinstance(key, str) and key.startswith(REPLICA_PREFIX)]
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that sends read-only route SELECTs to a replica."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._use_replica(clause):
+            replicas = replica_engines(self._db)
+            if replicas:
+                return replicas[g.db_replica % len(replicas)]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _use_replica(self, clause):
+        return (has_app_context() and g.get("db_replica") is not None and not g.get("db_primary")
+                and not self._flushing and isinstance(clause, Select) and clause._for_update_arg is None)
+
+
+def read_replica(view):
+    """Run this (read-only) view's SELECTs on a replica."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.db_replica = next(_round_robin)
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@contextmanager
+def use_primary():
+    """Force reads inside the block onto the primary (e.g. data that must not lag)."""
+    previous = g.get("db_primary")
+    g.db_primary = True
+    try:
+        yield
+    finally:
+        g.db_primary = previous
+
+
+def pool_stats(db):
+    """Checked-out connections and saturation for the primary and every replica pool."""
+    stats = {}
+    for key, engine in db.engines.items():
+        pool = engine.pool
+        entry = {"pool": type(pool).__name__, "status": pool.status()}
+        if hasattr(pool, "checkedout"):
+            size, max_overflow = pool.size(), pool._max_overflow
+            entry.update(size=size, max_overflow=max_overflow, checked_in=pool.checkedin(),
+                         checked_out=pool.checkedout(), overflow=pool.overflow())
+            if max_overflow >= 0 and size + max_overflow:
+                entry["saturation"] = round(pool.checkedout() / (size + max_overflow), 3)
+        stats["primary" if key is None else key] = entry
+    return stats
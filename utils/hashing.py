@@ -0,0 +1,70 @@
+"""Bounded executor for password hashing.
+
+werkzeug's KDFs (scrypt / pbkdf2 via hashlib) are deliberately slow, but they
+release the GIL, so a small thread pool runs them in parallel without tying
+up every request thread. At most ``workers + queue_size`` hashes may be
+running or waiting; beyond that ``HashingBusy`` is raised right away and the
+caller answers 503 instead of stalling. A hash that doesn't finish within
+``timeout`` seconds raises ``HashingBusy`` too.
+"""
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from functools import lru_cache
+
+from werkzeug.security import generate_password_hash
+
+DEFAULT_METHOD = "scrypt:32768:8:1"                    # werkzeug's default scrypt parameters
+
+
+class HashingBusy(Exception):
+    """The hashing executor and its queue are full, or a hash timed out."""
+
+
+class PasswordHasher:
+    def __init__(self, workers, queue_size, timeout):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._timeout = timeout
+
+    def run(self, fn, *args):
+        """Run ``fn(*args)`` on the pool and wait for it; raises HashingBusy when saturated or too slow."""
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            # copy_context: the pool thread sees the caller's app context (PASSWORD_HASH_METHOD)
+            future = self._pool.submit(contextvars.copy_context().run, fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self._timeout)
+        except TimeoutError:
+            future.cancel()                            # Still queued: don't run it at all
+            raise HashingBusy()
+
+
+_hasher = None
+_hasher_pid = None
+_lock = threading.Lock()
+
+
+def get_hasher(app):
+    """Return this process's hasher (rebuilt after fork, since threads don't survive it)."""
+    global _hasher, _hasher_pid
+    if _hasher_pid != os.getpid():
+        with _lock:
+            if _hasher_pid != os.getpid():
+                _hasher = PasswordHasher(app.config["PASSWORD_HASH_WORKERS"],
+                                         app.config["PASSWORD_HASH_QUEUE"],
+                                         app.config["PASSWORD_HASH_TIMEOUT"])
+                _hasher_pid = os.getpid()
+    return _hasher
+
+
+@lru_cache(maxsize=8)
+def method_prefix(method):
+    """Normalized method string as stored in hashes ("scrypt" -> "scrypt:32768:8:1")."""
+    return generate_password_hash("", method=method).split("$", 1)[0]
@@ -0,0 +1,179 @@
+"""``Idempotency-Key`` support for the money-moving endpoints.
+
+The first request with a given key claims it by inserting an ``in_progress``
+row, runs the view, then stores the response. Keys are scoped per caller (the
+JWT identity, if any) and per endpoint, so one user's key never replays
+another user's response. Retries with the same key and body get the stored
+response back (``Idempotency-Replayed: true``) without touching balances.
+Completed responses are also kept in an in-process LRU so hot retries skip
+the database. Keys expire after ``IDEMPOTENCY_TTL`` seconds.
+
+A claim is a lease: if the worker holding it dies (OOM, SIGKILL, timeout)
+the row stays ``in_progress``, and after ``IDEMPOTENCY_LEASE`` seconds a
+retry with the same body takes it over with a conditional UPDATE instead of
+getting 409 until the key expires.
+"""
+import hashlib
+import random
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import current_app, jsonify, make_response, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+
+from models import db, IdempotencyKey
+from utils.cache import TTLCache
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+PURGE_PROBABILITY = 0.01                               # Share of claims that also purge expired keys
+
+_cache = None
+
+
+def _get_cache():
+    global _cache
+    if _cache is None:
+        _cache = TTLCache(current_app.config["IDEMPOTENCY_CACHE_SIZE"], current_app.config["IDEMPOTENCY_TTL"])
+    return _cache
+
+
+def _replay(stored):
+    request_hash, status_code, body, mimetype = stored
+    response = make_response(body, status_code)
+    response.mimetype = mimetype
+    response.headers["Idempotency-Replayed"] = "true"
+    return response
+
+
+def _stored(row):
+    return row.request_hash, row.status_code, row.response_body, row.mimetype
+
+
+def purge_expired():
+    db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= datetime.utcnow()))
+    db.session.commit()
+
+
+def _caller():
+    """JWT identity of the request, or "" for anonymous requests (and unusable tokens)."""
+    try:
+        verify_jwt_in_request(optional=True)
+        return get_jwt_identity() or ""
+    except Exception:                                   # Expired / malformed token: anonymous
+        return ""
+
+
+def _lookup(caller, key, endpoint):
+    return IdempotencyKey.query.filter(
+        IdempotencyKey.caller == caller,
+        IdempotencyKey.key == key,
+        IdempotencyKey.endpoint == endpoint,
+        IdempotencyKey.expires_at > datetime.utcnow()
+    ).first()
+
+
+def _existing_response(row, request_hash):
+    if row.request_hash != request_hash:
+        return jsonify({"error": "Idempotency-Key was already used with a different request body"}), 422
+    if row.status != "completed":
+        return jsonify({"error": "A request with this Idempotency-Key is still in progress"}), 409
+    _get_cache().set((row.caller, row.endpoint, row.key), _stored(row))
+    return _replay(_stored(row))
+
+
+def _take_over(row):
+    """Reclaim an ``in_progress`` claim whose lease ran out; True if this request now holds it."""
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=current_app.config["IDEMPOTENCY_LEASE"])
+    taken = db.session.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.id == row.id, IdempotencyKey.status == "in_progress",
+               IdempotencyKey.date_added < stale)
+        .values(date_added=now)                        # Restart the lease; one retry wins
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    return taken == 1
+
+
+def _claim(caller, key, endpoint, request_hash):
+    """Claim the key before doing any work; returns (claim id, None) or (None, response to send)."""
+    row = _lookup(caller, key, endpoint)
+    if row is None:
+        if random.random() < PURGE_PROBABILITY:
+            purge_expired()
+        db.session.execute(delete(IdempotencyKey).where(   # An expired row would block the unique key
+            IdempotencyKey.caller == caller, IdempotencyKey.key == key, IdempotencyKey.endpoint == endpoint,
+            IdempotencyKey.expires_at <= datetime.utcnow()))
+        claim = IdempotencyKey(
+            caller=caller, key=key, endpoint=endpoint, request_hash=request_hash, status="in_progress",
+            expires_at=datetime.utcnow() + timedelta(seconds=current_app.config["IDEMPOTENCY_TTL"]))
+        db.session.add(claim)
+        try:
+            db.session.commit()
+            return claim.id, None
+        except IntegrityError:                          # A concurrent request claimed it first
+            db.session.rollback()
+            row = _lookup(caller, key, endpoint)
+            if row is None:
+                return None, (jsonify({"error": "A request with this Idempotency-Key is still in progress"}), 409)
+
+    if row.request_hash == request_hash and row.status == "in_progress" and _take_over(row):
+        return row.id, None
+    return None, _existing_response(row, request_hash)
+
+
+def idempotent(view):
+    """Honor an optional Idempotency-Key header on a view that moves money."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({"error": f"{HEADER} must be at most {MAX_KEY_LENGTH} characters"}), 400
+
+        caller = _caller()
+        endpoint = request.path
+        request_hash = hashlib.sha256(request.get_data()).hexdigest()
+
+        # 1. In-process LRU front
+        stored = _get_cache().get((caller, endpoint, key))
+        if stored:
+            if stored[0] != request_hash:
+                return jsonify({"error": "Idempotency-Key was already used with a different request body"}), 422
+            return _replay(stored)
+
+        # 2. Database: replay a stored response, or claim the key
+        claim_id, existing = _claim(caller, key, endpoint, request_hash)
+        if existing is not None:
+            return existing
+
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception:
+            _release(claim_id)
+            raise
+
+        if response.status_code >= 500:                 # Server errors are not final; allow a retry
+            _release(claim_id)
+            return response
+
+        claim = db.session.get(IdempotencyKey, claim_id)
+        claim.status = "completed"
+        claim.status_code = response.status_code
+        claim.response_body = response.get_data(as_text=True)
+        claim.mimetype = response.mimetype
+        db.session.commit()
+        _get_cache().set((caller, endpoint, key), _stored(claim))
+        return response
+    return wrapper
+
+
+def _release(claim_id):
+    db.session.rollback()
+    db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.id == claim_id))
+    db.session.commit()
@@ -0,0 +1,70 @@
+"""Flask JSON provider: orjson when installed, the stdlib json module otherwise.
+
+Both backends encode the same way:
+
+* ``Decimal`` -> string with the exact value (``"10.50"``), so balances and
+  amounts never pass through a binary float;
+* ``datetime`` / ``date`` -> ISO-8601 (``"2024-05-01T12:30:00"``) instead
+  of Flask's default RFC 822 strings;
+* objects with a ``to_dict()`` (the models) -> that dict, so a route can
+  ``jsonify`` rows directly;
+* keys keep insertion order and output is compact.
+
+``JSON_BACKEND`` is "auto" (orjson if importable), "orjson" or "json".
+"""
+import dataclasses
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:                                     # Optional: pip install orjson
+    orjson = None
+
+
+def default(o):
+    """Encode the types neither backend handles natively."""
+    if isinstance(o, Decimal):
+        return str(o)
+    if isinstance(o, (datetime, date)):                 # Only reached on the stdlib backend
+        return o.isoformat()
+    if hasattr(o, "to_dict"):
+        return o.to_dict()
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class FastJSONProvider(JSONProvider):
+    mimetype = "application/json"
+
+    def __init__(self, app):
+        super().__init__(app)
+        backend = app.config.get("JSON_BACKEND", "auto")
+        if backend == "orjson" and orjson is None:
+            raise RuntimeError("JSON_BACKEND=orjson but orjson is not installed")
+        self.use_orjson = orjson is not None and backend != "json"
+
+    def dumps(self, obj, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS).decode()
+        kwargs.setdefault("default", default)
+        kwargs.setdefault("separators", (",", ":"))
+        kwargs.setdefault("ensure_ascii", False)
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if self.use_orjson:                             # Skip the str round trip: orjson returns bytes
+            body = orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS)
+        else:
+            body = self.dumps(obj)
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -0,0 +1,323 @@
+"""Atomic balance changes for deposit / withdraw / transfer.
+
+Balances are never read into Python and written back. Every change is a
+single conditional UPDATE, e.g.
+
+    UPDATE accounts SET balance = balance - :amt
+    WHERE id = :id AND balance >= :amt
+    RETURNING user_id, balance
+
+so concurrent workers cannot lose updates or overdraw an account. Credits are
+guarded the same way against the Numeric(10, 2) limit. Transfers touch their
+two rows in ascending id order (the order row locks are taken), which rules
+out lock-order deadlocks between opposing transfers. Serialization
+failures, deadlocks and "database is locked" errors roll back and retry a
+bounded number of times. On SQLite, transactions are handed to a single
+writer thread (utils/sqlite_tuning.py) so they don't contend for the file lock.
+
+``apply_batch`` applies many operations in one DB transaction: it checks them
+against balances read once (row-locked where the database supports it),
+applies the net change per account with one executemany UPDATE, inserts all
+``Transaction`` rows with one bulk INSERT and commits once.
+"""
+import random
+import time
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from flask import current_app
+from sqlalchemy import bindparam, insert, select, update
+from sqlalchemy.exc import DBAPIError
+
+from models import db, Account, Transaction
+from utils.model_cache import mark_stale
+from utils.receipts import build_json_receipt
+from utils.sqlite_tuning import get_writer
+
+MAX_ATTEMPTS = 5
+RETRYABLE_SQLSTATES = {"40001", "40P01"}               # serialization_failure, deadlock_detected
+CENT = Decimal("0.01")
+MAX_AMOUNT = Decimal("99999999.99")                    # Largest value of Numeric(10, 2)
+
+
+class LedgerError(Exception):
+    status_code = 400
+
+
+class AccountNotFound(LedgerError):
+    status_code = 404
+
+
+class InsufficientFunds(LedgerError):
+    status_code = 400
+
+
+class BalanceLimitExceeded(LedgerError):
+    status_code = 400
+
+
+class BatchRejected(LedgerError):
+    """All-or-nothing batch stopped at a failing operation; nothing was applied."""
+
+    def __init__(self, results):
+        super().__init__("Batch rejected; no operations were applied")
+        self.results = results
+
+
+class ConcurrentUpdate(Exception):
+    """A guarded bulk UPDATE matched fewer rows than expected; the batch is retried."""
+
+
+# ============================================================
+# Helpers
+# ============================================================
+
+
+def parse_amount(value):
+    """Return a positive Decimal with exactly 2 decimal places that fits the column; raises ValueError."""
+    if isinstance(value, bool) or value is None:
+        raise ValueError("amount must be a number")
+    try:
+        amount = Decimal(str(value))
+    except InvalidOperation:
+        raise ValueError("amount must be a number")
+    if not amount.is_finite():
+        raise ValueError("amount must be a number")
+    if amount <= 0:
+        raise ValueError("Amount must be positive")
+    if amount.as_tuple().exponent < -2:
+        raise ValueError("amount must have at most 2 decimal places")
+    if amount > MAX_AMOUNT:
+        raise ValueError(f"amount must be at most {MAX_AMOUNT}")
+    return amount.quantize(CENT)                       # "1E+3" / 5 -> 1000.00 / 5.00, as stored
+
+
+def _is_retryable(exc):
+    orig = getattr(exc, "orig", None)
+    sqlstate = getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+    return sqlstate in RETRYABLE_SQLSTATES or "database is locked" in str(orig)
+
+
+def run_transaction(fn, *args):
+    """Run ``fn(*args)`` and commit, retrying on serialization failures.
+
+    On SQLite the whole attempt loop runs on the process's single writer thread.
+    """
+    writer = get_writer(current_app._get_current_object())
+    if writer is not None:
+        return writer.run(_run_transaction, fn, *args)
+    return _run_transaction(fn, *args)
+
+
+def _run_transaction(fn, *args):
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            result = fn(*args)
+            db.session.commit()
+            return result
+        except (DBAPIError, ConcurrentUpdate) as exc:
+            db.session.rollback()
+            if attempt == MAX_ATTEMPTS or not (isinstance(exc, ConcurrentUpdate) or _is_retryable(exc)):
+                raise
+            time.sleep(random.uniform(0, 0.01 * 2 ** attempt))   # Jittered exponential backoff
+        except Exception:
+            db.session.rollback()
+            raise
+
+
+def _credit(account_id, amount):
+    # Guarded like _debit: past the column's limit Postgres raises DataError (a 500)
+    row = db.session.execute(
+        update(Account)
+        .where(Account.id == account_id, Account.balance + amount <= MAX_AMOUNT)
+        .values(balance=Account.balance + amount)
+        .returning(Account.user_id, Account.balance)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if row is None:
+        if db.session.get(Account, account_id) is None:
+            raise AccountNotFound("Account not found")
+        raise BalanceLimitExceeded(f"Balance would exceed {MAX_AMOUNT}")
+    mark_stale(db.session, Account, account_id)        # Core UPDATE; the ORM events don't see it
+    return row
+
+
+def _debit(account_id, amount):
+    row = db.session.execute(
+        update(Account)
+        .where(Account.id == account_id, Account.balance >= amount)
+        .values(balance=Account.balance - amount)
+        .returning(Account.user_id, Account.balance)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if row is None:
+        if db.session.get(Account, account_id) is None:
+            raise AccountNotFound("Account not found")
+        raise InsufficientFunds("Insufficient funds")
+    mark_stale(db.session, Account, account_id)
+    return row
+
+
+def _log(user_id, account_id, amount, txn_type):
+    txn = Transaction(
+        user_id=user_id,
+        account_id=account_id,
+        amount=amount,
+        transaction_type=txn_type,
+        date_added=datetime.utcnow()
+    )
+    db.session.add(txn)
+    db.session.flush()          # Assign the ID so the receipt can be built before commit
+    return build_json_receipt(txn)
+
+
+# ============================================================
+# Operations (each returns plain data, safe to use after commit)
+# ============================================================
+
+
+def _deposit(account_id, amount):
+    user_id, balance = _credit(account_id, amount)
+    return {"new_balance": balance, "transaction": _log(user_id, account_id, amount, "deposit")}
+
+
+def _withdraw(account_id, amount):
+    user_id, balance = _debit(account_id, amount)
+    return {"new_balance": balance, "transaction": _log(user_id, account_id, amount, "withdrawal")}
+
+
+def _transfer(from_id, to_id, amount):
+    # Touch rows in ascending id order so opposing transfers can't deadlock
+    if from_id < to_id:
+        from_row = _debit(from_id, amount)
+        to_row = _credit(to_id, amount)
+    else:
+        to_row = _credit(to_id, amount)
+        from_row = _debit(from_id, amount)
+    return {
+        "from_account_balance": from_row.balance,
+        "to_account_balance": to_row.balance,
+        "outgoing": _log(from_row.user_id, from_id, amount, "transfer_out"),
+        "incoming": _log(to_row.user_id, to_id, amount, "transfer_in"),
+    }
+
+
+def deposit(account_id, amount):
+    return run_transaction(_deposit, account_id, amount)
+
+
+def withdraw(account_id, amount):
+    return run_transaction(_withdraw, account_id, amount)
+
+
+def transfer(from_id, to_id, amount):
+    if from_id == to_id:
+        raise LedgerError("Cannot transfer to the same account")
+    return run_transaction(_transfer, from_id, to_id, amount)
+
+
+# ============================================================
+# Batch operations (one DB transaction, bulk statements)
+# ============================================================
+
+# (account field, signed multiplier, transaction type) rows each operation type produces
+BATCH_LEGS = {
+    "deposit": [("account_id", 1, "deposit")],
+    "withdraw": [("account_id", -1, "withdrawal")],
+    "transfer": [("from_account_id", -1, "transfer_out"), ("to_account_id", 1, "transfer_in")],
+}
+
+
+def _apply_batch(operations, atomic):
+    account_ids = sorted({op[field] for op in operations for field, _, _ in BATCH_LEGS[op["type"]]})
+
+    # One read of every involved account, locked in id order where supported
+    accounts = {
+        row.id: row for row in db.session.execute(
+            select(Account.id, Account.user_id, Account.balance)
+            .where(Account.id.in_(account_ids)).order_by(Account.id).with_for_update()
+        )
+    }
+    balances = {aid: row.balance for aid, row in accounts.items()}
+
+    # Check each operation in order against the running balances
+    results, rows = [], []
+    legs_applied = []                                  # Transaction rows per successful operation
+    deltas = {}
+    for op in operations:
+        legs = BATCH_LEGS[op["type"]]
+        amount = op["amount"]
+        missing = [op[field] for field, _, _ in legs if op[field] not in accounts]
+        error = None
+        if missing:
+            error = "Account not found"
+        elif any(sign < 0 and balances[op[field]] < amount for field, sign, _ in legs):
+            error = "Insufficient funds"
+        elif any(sign > 0 and balances[op[field]] + amount > MAX_AMOUNT for field, sign, _ in legs):
+            error = f"Balance would exceed {MAX_AMOUNT}"
+        if error:
+            results.append({"index": op["index"], "status": "failed", "error": error})
+            if atomic:
+                for r in results[:-1]:
+                    r["status"] = "rolled_back"
+                raise BatchRejected(results)
+            continue
+
+        for field, sign, txn_type in legs:
+            account_id = op[field]
+            balances[account_id] += sign * amount
+            deltas[account_id] = deltas.get(account_id, 0) + sign * amount
+            rows.append({
+                "user_id": accounts[account_id].user_id,
+                "account_id": account_id,
+                "amount": amount,
+                "transaction_type": txn_type,
+                "date_added": datetime.utcnow(),
+            })
+        results.append({"index": op["index"], "status": "ok"})
+        legs_applied.append(len(legs))
+
+    # Net balance change per account in one executemany UPDATE; the guard catches
+    # writers that slipped in between our read and write (e.g. SQLite, no row locks)
+    params = [{"acct_id": aid, "delta": delta} for aid, delta in sorted(deltas.items()) if delta]
+    if params:
+        table = Account.__table__
+        matched = db.session.execute(
+            update(table)
+            .where(table.c.id == bindparam("acct_id"),
+                   (table.c.balance + bindparam("delta")).between(0, MAX_AMOUNT))
+            .values(balance=table.c.balance + bindparam("delta")),
+            params
+        ).rowcount
+        if db.engine.dialect.supports_sane_multi_rowcount and matched != len(params):
+            raise ConcurrentUpdate()
+        for param in params:
+            mark_stale(db.session, Account, param["acct_id"])
+
+    # All Transaction rows in one bulk INSERT
+    txn_ids = []
+    if rows:
+        if db.engine.dialect.name == "sqlite":
+            # SQLite can't batch an ordered RETURNING (it falls back to one INSERT per row).
+            # Under the write lock this transaction holds, rowids rise in VALUES order, so
+            # sorting the returned ids restores the parameter order
+            txn_ids = sorted(db.session.scalars(insert(Transaction).returning(Transaction.id), rows).all())
+        else:
+            txn_ids = db.session.scalars(
+                insert(Transaction).returning(Transaction.id, sort_by_parameter_order=True), rows
+            ).all()
+    ids = iter(txn_ids)
+    legs = iter(legs_applied)
+    for result in results:
+        if result["status"] == "ok":
+            result["transaction_ids"] = [next(ids) for _ in range(next(legs))]
+
+    final = dict(db.session.execute(
+        select(Account.id, Account.balance).where(Account.id.in_(list(deltas)))
+    ).all()) if deltas else {}
+    return {"results": results, "balances": final}
+
+
+def apply_batch(operations, atomic=True):
+    """Apply validated operations (dicts with index, type, account ids, amount)."""
+    return run_transaction(_apply_batch, operations, atomic)
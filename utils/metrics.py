@@ -0,0 +1,277 @@
+"""Request, SQL and receipt-rendering metrics in Prometheus text format.
+
+What's recorded (all cheap enough to leave on):
+
+* ``http_request_duration_seconds{endpoint,method}``: latency histogram per
+  Flask endpoint, plus ``http_requests_total{endpoint,method,status}``.
+* ``db_statements_per_request{endpoint}`` and
+  ``db_seconds_per_request{endpoint}``: per-request histograms fed by
+  SQLAlchemy's ``before/after_cursor_execute`` events. Process-wide totals go
+  to ``db_statements_total`` and ``db_seconds_total``.
+* ``receipt_generate_seconds`` and ``receipt_render_seconds{format}``: time
+  spent in utils/receipts.py.
+
+Each process keeps its numbers in memory. With a metrics directory, every
+worker also snapshots them to ``<dir>/metrics_<pid>.json`` (at most every
+``METRICS_FLUSH_INTERVAL`` seconds, and at exit), and ``/metrics`` sums all
+snapshots. That way a scrape that hits any gunicorn worker sees the whole
+host. Files of exited workers are kept so counters never go backwards.
+
+The directory is ``METRICS_DIR`` if set (clear it on deploy, like
+prometheus_client's multiprocess mode). Under gunicorn it otherwise defaults
+to a temp directory per process group, i.e. per master, so one deploy never
+sums another's files. Without either, ``/metrics`` covers the serving process
+only and says so in a comment line.
+"""
+import atexit
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+METRICS = {                                            # name -> (type, help, buckets)
+    "http_requests_total": ("counter", "HTTP requests by endpoint, method and status.", None),
+    "http_request_duration_seconds": ("histogram", "HTTP request latency.", LATENCY_BUCKETS),
+    "db_statements_per_request": ("histogram", "SQL statements executed per request.", COUNT_BUCKETS),
+    "db_seconds_per_request": ("histogram", "Time spent in SQL per request.", LATENCY_BUCKETS),
+    "db_statements_total": ("counter", "SQL statements executed.", None),
+    "db_seconds_total": ("counter", "Time spent executing SQL.", None),
+    "receipt_generate_seconds": ("histogram", "Time spent in generate_receipts.", LATENCY_BUCKETS),
+    "receipt_render_seconds": ("histogram", "Time to render one receipt.", LATENCY_BUCKETS),
+}
+
+# [statements, seconds] for the current request; a ContextVar so work handed to
+# another thread with copy_context() (the SQLite single writer) still counts
+_request_sql = ContextVar("request_sql", default=None)
+
+
+class Registry:
+    def __init__(self):
+        self.counters = {}                             # (name, labels) -> value
+        self.histograms = {}                           # (name, labels) -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def inc(self, name, labels=(), value=1):
+        key = (name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, labels=()):
+        buckets = METRICS[name][2]
+        key = (name, labels)
+        with self._lock:
+            h = self.histograms.get(key)
+            if h is None:
+                h = self.histograms[key] = [0] * (len(buckets) + 2)
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    h[i] += 1
+                    break
+            h[-2] += value
+            h[-1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "counters": [[n, list(map(list, l)), v] for (n, l), v in self.counters.items()],
+                "histograms": [[n, list(map(list, l)), list(h)] for (n, l), h in self.histograms.items()],
+            }
+
+
+def merge(snapshots):
+    counters, histograms = {}, {}
+    for snap in snapshots:
+        for name, labels, value in snap["counters"]:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, h in snap["histograms"]:
+            key = (name, tuple(map(tuple, labels)))
+            total = histograms.setdefault(key, [0] * len(h))
+            for i, v in enumerate(h):
+                total[i] += v
+    return counters, histograms
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}" if pairs else ""
+
+
+def render(counters, histograms):
+    """Prometheus text exposition (format 0.0.4)."""
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        series = sorted((l, v) for (n, l), v in (counters if kind == "counter" else histograms).items()
+                        if n == name)
+        if not series:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in series:
+            if kind == "counter":
+                lines.append(f"{name}{_labels(labels)} {value}")
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets, value):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_bucket{_labels(labels, [('le', '+Inf')])} {value[-1]}")
+            lines.append(f"{name}_sum{_labels(labels)} {value[-2]}")
+            lines.append(f"{name}_count{_labels(labels)} {value[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+class SnapshotWriter:
+    """Writes this process's registry to METRICS_DIR for cross-worker aggregation."""
+
+    def __init__(self, directory, interval):
+        self.directory = directory
+        self.interval = interval
+        self._last = 0.0
+        os.makedirs(directory, exist_ok=True)
+        atexit.register(self.write)
+
+    def maybe_write(self):
+        if time.monotonic() - self._last >= self.interval:
+            self.write()
+
+    def write(self):
+        self._last = time.monotonic()
+        path = os.path.join(self.directory, f"metrics_{os.getpid()}.json")
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(registry.snapshot(), f)
+        os.replace(tmp, path)                          # Readers never see a half-written file
+
+    def read_all(self):
+        snapshots = []
+        for name in os.listdir(self.directory):
+            if not (name.startswith("metrics_") and name.endswith(".json")):
+                continue
+            if name == f"metrics_{os.getpid()}.json":
+                continue                               # Use our live numbers instead
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue                               # Racing with a rename or a dying worker
+        return snapshots
+
+
+def metrics_dir(app):
+    """METRICS_DIR, else a per-master temp directory under gunicorn, else None (per-process)."""
+    if app.config["METRICS_DIR"]:
+        return app.config["METRICS_DIR"]
+    if "gunicorn" in sys.modules:                      # Master and workers share a process group
+        return os.path.join(tempfile.gettempdir(), f"bank-backend-metrics-{os.getpgrp()}")
+    return None
+
+
+def exposition(app):
+    writer = app.extensions.get("metrics_writer")
+    if writer is None:
+        header = f"# Metrics of process {os.getpid()} only; set METRICS_DIR to aggregate workers\n"
+        return header + render(*merge([registry.snapshot()]))
+    return render(*merge([registry.snapshot()] + writer.read_all()))
+
+
+# ============================================================
+# Instrumentation
+# ============================================================
+
+
+def timed(name, **labels):
+    """Decorator: observe the call's duration in histogram ``name``."""
+    label_items = tuple(sorted(labels.items()))
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                registry.observe(name, time.perf_counter() - started, label_items)
+        return wrapper
+    return decorator
+
+
+# The start time lives on the statement's execution context, not the connection: a
+# statement that fails never reaches after_cursor_execute and must not leave state behind
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "metrics_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    registry.inc("db_statements_total")
+    registry.inc("db_seconds_total", value=elapsed)
+    current = _request_sql.get()
+    if current is not None:
+        current[0] += 1
+        current[1] += elapsed
+
+
+def init_metrics(app):
+    """Register request hooks and SQL events (no-op unless METRICS_ENABLED)."""
+    if not app.config["METRICS_ENABLED"]:
+        return
+    directory = metrics_dir(app)
+    if directory:
+        app.extensions["metrics_writer"] = SnapshotWriter(directory, app.config["METRICS_FLUSH_INTERVAL"])
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+    @app.before_request
+    def _metrics_start():
+        request.environ["metrics.started"] = time.perf_counter()
+        request.environ["metrics.sql_token"] = _request_sql.set([0, 0.0])
+
+    @app.after_request
+    def _metrics_status(response):
+        request.environ["metrics.status"] = response.status_code
+        return response
+
+    # Recorded at teardown, which also runs when the view raised and no
+    # after_request hook did; the status is then a 500
+    @app.teardown_request
+    def _metrics_end(exc):
+        started = request.environ.pop("metrics.started", None)
+        token = request.environ.pop("metrics.sql_token", None)
+        if started is None:
+            return
+        status = request.environ.pop("metrics.status", 500)
+        endpoint = request.endpoint or "unmatched"
+        labels = (("endpoint", endpoint), ("method", request.method))
+        registry.observe("http_request_duration_seconds", time.perf_counter() - started, labels)
+        registry.inc("http_requests_total", labels + (("status", str(status)),))
+        statements, seconds = _request_sql.get()
+        registry.observe("db_statements_per_request", statements, (("endpoint", endpoint),))
+        registry.observe("db_seconds_per_request", seconds, (("endpoint", endpoint),))
+        _request_sql.reset(token)
+        writer = app.extensions.get("metrics_writer")
+        if writer:
+            writer.maybe_write()
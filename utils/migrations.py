@@ -0,0 +1,82 @@
+"""Minimal schema migrations for databases created before a model change.
+
+``db.create_all()`` only creates missing tables; it never alters existing
+ones. Each migration below is applied once, in order, and recorded in the
+``schema_migrations`` table. Index migrations use the ``Index`` objects
+declared on the models with ``checkfirst``, so they are no-ops on databases
+that ``create_all()`` already built with the indexes.
+
+Run with:  flask --app app migrate   (or python -m utils.migrations)
+"""
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, select
+
+from models import db, Account, IdempotencyKey, Transaction
+
+# Kept out of db.metadata so drop_all()/create_all() never touch it
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations", _metadata,
+    Column("version", String, primary_key=True),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def _index(model, name):
+    return next(ix for ix in model.__table__.indexes if ix.name == name)
+
+
+def _create_indexes(*indexes):
+    def apply(conn):
+        for index in indexes:
+            index.create(conn, checkfirst=True)
+    return apply
+
+
+def _recreate(model):
+    # For short-lived tables whose constraints changed: SQLite can't alter a
+    # constraint in place, and the rows are only worth keeping for hours
+    def apply(conn):
+        model.__table__.drop(conn, checkfirst=True)
+        model.__table__.create(conn)
+    return apply
+
+
+# Ordered list of (version, apply(connection)); never edit an applied entry, append a new one
+MIGRATIONS = [
+    ("0001_hot_lookup_indexes", _create_indexes(
+        _index(Transaction, "ix_transactions_account_id_date_added"),
+        _index(Transaction, "ix_transactions_user_id_date_added"),
+        _index(Account, "ix_accounts_user_id"),
+    )),
+    # Keys scoped per caller: new column and unique constraint (in-flight keys are dropped)
+    ("0002_idempotency_keys_per_caller", _recreate(IdempotencyKey)),
+]
+
+
+def run_migrations(engine=None):
+    """Create missing tables, then apply pending migrations; returns the versions applied."""
+    engine = engine or db.engine
+    db.metadata.create_all(engine)
+    _metadata.create_all(engine)
+
+    applied = []
+    for version, apply in MIGRATIONS:
+        with engine.begin() as conn:                   # One transaction per migration
+            done = conn.execute(
+                select(schema_migrations.c.version).where(schema_migrations.c.version == version)
+            ).first()
+            if done:
+                continue
+            apply(conn)
+            conn.execute(schema_migrations.insert().values(version=version, applied_at=datetime.utcnow()))
+        applied.append(version)
+    return applied
+
+
+if __name__ == "__main__":
+    from app import app
+    with app.app_context():
+        applied = run_migrations()
+        print("Applied:", ", ".join(applied) if applied else "nothing (up to date)")
@@ -0,0 +1,113 @@
+"""Read-through cache for single-row lookups of users, accounts and transactions.
+
+``get_cached(Model, pk, serialize)`` returns the serialized row from a TTL/LRU
+cache, loading it with ``db.session.get`` on a miss. Writes invalidate it:
+
+* ORM changes are picked up from SQLAlchemy session events: keys are dropped
+  right after the flush and again after the commit.
+* Core UPDATEs that bypass the ORM (utils/ledger.py) call ``mark_stale``.
+
+A miss that started loading before an invalidation does not store its
+(possibly old) result, so a balance read after a commit is never stale.
+With ``CACHE_BACKEND = "shared"`` both the entries and the invalidation
+times live in the host-wide cache, so this holds across worker processes.
+With the per-process "memory" backend it only holds within one process,
+which is why the cache is off by default unless the backend is shared.
+"""
+import time
+from itertools import chain
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import db, Account, Transaction, User
+from utils.cache import make_cache
+from utils.db_routing import use_primary
+
+CACHED_MODELS = (User, Account, Transaction)
+SESSION_KEY = "model_cache_stale"                      # session.info entry with keys to drop on commit
+
+_cache = None
+_invalidated = None                                    # key -> time it was last invalidated
+
+
+def cache_key(model, pk):
+    return f"{model.__tablename__}:{pk}"
+
+
+def _get_cache():
+    global _cache, _invalidated
+    if _cache is None and current_app.config.get("MODEL_CACHE_ENABLED"):   # Off for apps without the setting
+        size, ttl = current_app.config["MODEL_CACHE_SIZE"], current_app.config["MODEL_CACHE_TTL"]
+        _invalidated = make_cache(current_app, "model-invalidated", size, ttl)
+        _cache = make_cache(current_app, "model", size, ttl)
+    return _cache
+
+
+def get_cached(model, pk, serialize):
+    """Serialized row for ``model`` with primary key ``pk``, or None if it doesn't exist."""
+    cache = _get_cache()
+    if cache is None:
+        obj = db.session.get(model, pk)
+        return serialize(obj) if obj is not None else None
+
+    key = cache_key(model, pk)
+    payload = cache.get(key)
+    if payload is not None:
+        return payload
+
+    started = time.time()
+    with use_primary():                                # A lagging replica could refill the cache with old rows
+        obj = db.session.get(model, pk)
+        if obj is None:
+            return None
+        payload = serialize(obj)
+    last_invalidated = _invalidated.get(key)
+    if last_invalidated is None or last_invalidated < started:
+        cache.set(key, payload)
+    return payload
+
+
+def invalidate(key):
+    # Open the cache even if this process never read through it: with the shared
+    # backend other workers may hold the entry
+    cache = _get_cache() if has_app_context() else _cache
+    if cache is not None:
+        cache.delete(key)
+        _invalidated.set(key, time.time())
+
+
+def mark_stale(session, model, pk):
+    """Drop ``model``/``pk`` now and again when ``session`` commits (for Core UPDATEs)."""
+    key = cache_key(model, pk)
+    session.info.setdefault(SESSION_KEY, set()).add(key)
+    invalidate(key)
+
+
+def stats():
+    return _cache.stats() if _cache is not None else {"enabled": False}
+
+
+# ============================================================
+# Session events (registered for every Session)
+# ============================================================
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed(session, flush_context):
+    # new/dirty/deleted still describe what this flush wrote
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, CACHED_MODELS):
+            mark_stale(session, type(obj), obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    for key in session.info.pop(SESSION_KEY, ()):
+        invalidate(key)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back(session):
+    session.info.pop(SESSION_KEY, None)
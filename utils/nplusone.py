@@ -0,0 +1,148 @@
+"""Opt-in N+1 query detector for development and CI.
+
+Every SQL statement run while detection is active is normalized to its
+shape: literals and bind parameters become ``?``, IN-lists collapse and
+whitespace/case is folded. When one shape runs ``NPLUSONE_THRESHOLD`` times
+within a request, the detector either logs a warning or raises
+``NPlusOneDetected``, each with the application stack that issued the
+statement. It is typically a lazy-loaded relationship or a query inside a
+loop.
+
+* ``NPLUSONE_ENABLED=1`` turns it on for every request (``NPLUSONE_ACTION``
+  is "log" or "raise").
+* ``nplusone_scope()`` turns it on for the requests handled inside a block
+  (each request still gets its own counts); utils/pytest_nplusone.py is the
+  pytest plugin built on it.
+* ``detect_nplusone()`` counts everything inside a block as one unit, for
+  scripts that query outside a request.
+"""
+import logging
+import re
+import sysconfig
+import traceback
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+LIBRARY_PATHS = tuple({sysconfig.get_paths()["stdlib"], sysconfig.get_paths()["purelib"]})
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM = re.compile(r"%\(\w+\)s|:\w+|\$\d+|\(__\[POSTCOMPILE_\w+\]\)")
+_IN_LIST = re.compile(r"\bin\s*\((?:\s*\?\s*,?)+\)")
+_SPACE = re.compile(r"\s+")
+
+_tracker = ContextVar("nplusone_tracker", default=None)
+_scope = ContextVar("nplusone_scope", default=None)
+
+
+class NPlusOneDetected(Exception):
+    """The same query shape ran too many times in one request."""
+
+
+def normalize(statement):
+    shape = _STRING.sub("?", statement)
+    shape = _PARAM.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    shape = _SPACE.sub(" ", shape).strip().lower()
+    return _IN_LIST.sub("in (?)", shape)
+
+
+def app_stack():
+    """Formatted stack without library frames (falls back to the full stack)."""
+    frames = traceback.extract_stack()[:-2]
+    own = [f for f in frames if not f.filename.startswith(LIBRARY_PATHS) and not f.filename.startswith("<")
+           and "site-packages" not in f.filename and not f.filename.endswith("nplusone.py")]
+    return "".join(traceback.format_list(own or frames))
+
+
+class Tracker:
+    def __init__(self, threshold, action, reported=None):
+        self.threshold = threshold
+        self.action = action
+        self.counts = {}
+        self.reported = reported if reported is not None else []   # (shape, count, stack)
+
+    def record(self, statement):
+        shape = normalize(statement)
+        count = self.counts.get(shape, 0) + 1
+        self.counts[shape] = count
+        if count != self.threshold:
+            return
+        stack = app_stack()
+        self.reported.append((shape, count, stack))
+        message = f"Possible N+1: query ran {count} times in one request:\n  {shape}\nIssued from:\n{stack}"
+        if self.action == "raise":
+            raise NPlusOneDetected(message)
+        logger.warning(message)
+
+
+class Scope:
+    """Detection settings for requests started inside ``nplusone_scope()``; collects their reports."""
+
+    def __init__(self, threshold, action):
+        self.threshold = threshold
+        self.action = action
+        self.reported = []                             # (shape, count, stack) from every request
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    tracker = _tracker.get()
+    if tracker is not None:
+        tracker.record(statement)
+
+
+def _listen():
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+
+
+@contextmanager
+def nplusone_scope(threshold=5, action="raise"):
+    """Check every request handled inside the block, each with its own counts; yields the Scope."""
+    _listen()
+    scope = Scope(threshold, action)
+    token = _scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _scope.reset(token)
+
+
+@contextmanager
+def detect_nplusone(threshold=5, action="raise"):
+    """Track queries inside the block as one unit (scripts); yields the Tracker (``.counts``, ``.reported``)."""
+    _listen()
+    tracker = Tracker(threshold, action)
+    token = _tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _tracker.reset(token)
+
+
+def init_nplusone(app):
+    """Give every request its own tracker when NPLUSONE_ENABLED or inside nplusone_scope()."""
+    _listen()
+    from flask import g
+
+    @app.before_request
+    def _nplusone_start():
+        scope = _scope.get()
+        if scope is not None:                          # A test decides the mode and collects reports
+            tracker = Tracker(scope.threshold, scope.action, scope.reported)
+        elif app.config["NPLUSONE_ENABLED"]:
+            tracker = Tracker(app.config["NPLUSONE_THRESHOLD"], app.config["NPLUSONE_ACTION"])
+        else:
+            return
+        g.nplusone_token = _tracker.set(tracker)
+
+    @app.teardown_request
+    def _nplusone_end(exc):
+        token = g.pop("nplusone_token", None)
+        if token is not None:
+            _tracker.reset(token)
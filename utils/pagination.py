@@ -0,0 +1,53 @@
+"""Keyset (cursor) pagination for the list endpoints.
+
+Pages are ``WHERE id > :last_id ORDER BY id LIMIT :limit`` on the primary
+key, so page N costs the same as page 1 (no OFFSET scan). The cursor handed to
+clients is opaque: URL-safe base64 of a small JSON object.
+"""
+import base64
+import json
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+def encode_cursor(last_id):
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded))["id"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(last_id, int):
+        raise ValueError("Invalid cursor")
+    return last_id
+
+
+def page_args(args):
+    """Parse ``limit`` and ``cursor`` query parameters; raises ValueError on bad input."""
+    try:
+        limit = int(args.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_LIMIT}")
+
+    cursor = args.get("cursor")
+    return limit, decode_cursor(cursor) if cursor else None
+
+
+def keyset_page(query, id_column, limit, after_id=None):
+    """Return (rows, next_cursor) for one page of ``query`` ordered by ``id_column``."""
+    if after_id is not None:
+        query = query.filter(id_column > after_id)
+    rows = query.order_by(id_column).limit(limit + 1).all()   # One extra row tells us if there's more
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(getattr(rows[-1], id_column.key))
+    return rows, next_cursor
@@ -0,0 +1,207 @@
+"""On-demand sampling profiler for single requests.
+
+A request is profiled when either:
+
+* an admin (``ADMIN_USER_IDS``, checked against the request's access token)
+  sends ``?profile=1`` or an ``X-Profile: 1`` header, or
+* rolling mode is on (``PROFILE_SAMPLE_EVERY=N``) and it is this process's
+  Nth request since the last sampled one.
+
+One background thread per process samples the stacks of the threads that are
+serving profiled requests via ``sys._current_frames()`` every
+``PROFILE_INTERVAL_MS``. The request thread itself does no extra work
+besides registering and unregistering, and the sampler sleeps when nothing is
+being profiled.
+
+Each profile is written in collapsed-stack format (``frame;frame;frame count``
+per line, root first), the input of flamegraph.pl, speedscope and
+inferno. It goes to ``PROFILE_DIR``, which is a ring capped at
+``PROFILE_MAX_FILES`` (oldest removed first). The response carries the file
+name in ``X-Profile-Id``. Admins list and download profiles via
+``/ops/profiles``.
+"""
+import itertools
+import os
+import sys
+import threading
+import time
+
+from flask import current_app, g, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+SUFFIX = ".folded"
+
+
+def is_admin():
+    """True when the request carries a valid access token of a user in ADMIN_USER_IDS."""
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+        return identity is not None and int(identity) in current_app.config["ADMIN_USER_IDS"]
+    except Exception:                                   # Expired / malformed token: not an admin
+        return False
+
+
+def frame_label(code):
+    filename = code.co_filename
+    if filename.startswith(ROOT):
+        filename = filename[len(ROOT):]
+    elif "site-packages" + os.sep in filename:
+        filename = filename.split("site-packages" + os.sep, 1)[1]
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+def collapse(frame):
+    """Root-first ``;``-joined stack of ``frame``."""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class Profile:
+    def __init__(self, thread_id):
+        self.thread_id = thread_id
+        self.stacks = {}                                # collapsed stack -> samples
+        self.samples = 0
+        self.started = time.perf_counter()
+
+    def folded(self):
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+
+class Sampler:
+    """Background thread sampling every registered request thread."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._active = {}                               # thread id -> Profile
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+
+    def start(self):
+        profile = Profile(threading.get_ident())
+        with self._lock:
+            self._active[profile.thread_id] = profile
+        self._wake.set()
+        return profile
+
+    def stop(self, profile):
+        with self._lock:
+            self._active.pop(profile.thread_id, None)
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            with self._lock:
+                active = list(self._active.values())
+                if not active:
+                    self._wake.clear()
+                    continue
+            frames = sys._current_frames()
+            sampled = [(p, collapse(frames[p.thread_id])) for p in active if p.thread_id in frames]
+            del frames                                  # Don't keep other threads' frames alive
+            with self._lock:
+                for profile, stack in sampled:
+                    if self._active.get(profile.thread_id) is profile:   # Not stopped meanwhile
+                        profile.stacks[stack] = profile.stacks.get(stack, 0) + 1
+                        profile.samples += 1
+            time.sleep(self.interval)
+
+
+_sampler = None
+_sampler_pid = None
+_lock = threading.Lock()
+
+
+def get_sampler(app):
+    """This process's sampler thread (restarted after fork)."""
+    global _sampler, _sampler_pid
+    if _sampler_pid != os.getpid():
+        with _lock:
+            if _sampler_pid != os.getpid():
+                _sampler = Sampler(app.config["PROFILE_INTERVAL_MS"] / 1000)
+                _sampler_pid = os.getpid()
+    return _sampler
+
+
+class ProfileStore:
+    """Capped ring of collapsed-stack files in one directory."""
+
+    def __init__(self, directory, max_files):
+        self.directory = directory
+        self.max_files = max_files
+
+    def names(self):
+        """Profile file names, newest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted((n for n in os.listdir(self.directory) if n.endswith(SUFFIX)), reverse=True)
+
+    def path(self, name):
+        if os.path.basename(name) != name or not name.endswith(SUFFIX):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+    def save(self, profile, endpoint, reason):
+        elapsed_ms = int((time.perf_counter() - profile.started) * 1000)
+        # Sortable by time; endpoint and duration are visible in a directory listing
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{time.time_ns()}_{os.getpid()}_{reason}_{endpoint}_{elapsed_ms}ms{SUFFIX}"
+        tmp = os.path.join(self.directory, f".{name}.tmp")
+        with open(tmp, "w") as f:
+            f.write(profile.folded())
+        os.replace(tmp, os.path.join(self.directory, name))
+        for old in self.names()[self.max_files:]:
+            try:
+                os.remove(os.path.join(self.directory, old))
+            except FileNotFoundError:
+                pass                                    # Another worker pruned it first
+        return name
+
+
+def _requested():
+    return request.args.get("profile") == "1" or request.headers.get("X-Profile") == "1"
+
+
+def init_profiler(app):
+    """Register the request hooks (no-op unless PROFILE_ENABLED)."""
+    if not app.config["PROFILE_ENABLED"]:
+        return
+    store = app.extensions["profile_store"] = ProfileStore(app.config["PROFILE_DIR"],
+                                                           app.config["PROFILE_MAX_FILES"])
+    every = app.config["PROFILE_SAMPLE_EVERY"]
+    counter = itertools.count(1)                        # next() is atomic under the GIL
+
+    @app.before_request
+    def _profile_start():
+        if _requested() and is_admin():
+            reason = "ondemand"
+        elif every and next(counter) % every == 0:
+            reason = "rolling"
+        else:
+            return
+        g.profile = (get_sampler(app).start(), reason)
+
+    @app.after_request
+    def _profile_end(response):
+        started = g.pop("profile", None)
+        if started is None:
+            return response
+        profile, reason = started
+        get_sampler(app).stop(profile)
+        endpoint = (request.endpoint or "unmatched").replace(".", "-")
+        response.headers["X-Profile-Id"] = store.save(profile, endpoint, reason)
+        response.headers["X-Profile-Samples"] = str(profile.samples)
+        return response
+
+    @app.teardown_request
+    def _profile_abort(exc):
+        started = g.pop("profile", None)               # after_request didn't run (unhandled error)
+        if started is not None:
+            get_sampler(app).stop(started[0])
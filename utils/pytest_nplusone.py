@@ -0,0 +1,65 @@
+"""pytest plugin: fail tests whose requests trigger N+1 queries.
+
+Enable it with ``-p utils.pytest_nplusone`` or
+``pytest_plugins = ["utils.pytest_nplusone"]`` in a conftest (tests/conftest.py
+does), then either:
+
+* request the ``nplusone`` fixture in a test (it yields the Scope, so a
+  test can also assert on ``scope.reported``), or
+* pass ``--nplusone`` to check every test.
+
+Each request made by the test is counted on its own, so a test that calls
+the same endpoint many times is not an N+1. Tests marked
+``@pytest.mark.nplusone_allowed`` are exempt. The threshold comes from
+``--nplusone-threshold`` (default 5).
+"""
+import pytest
+
+from utils.nplusone import nplusone_scope
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("nplusone")
+    group.addoption("--nplusone", action="store_true", help="fail any test that triggers an N+1 query")
+    group.addoption("--nplusone-threshold", type=int, default=5,
+                    help="repeats of one query shape that count as N+1 (default 5)")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "nplusone_allowed: don't check this test for N+1 queries")
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_makereport(item, call):
+    report = yield
+    if report.when == "call":
+        item.nplusone_call_failed = report.failed
+    return report
+
+
+def _fail_on_reports(request, scope):
+    # The request may have swallowed the exception into a 500; fail the test anyway
+    if scope.reported and not getattr(request.node, "nplusone_call_failed", False):
+        shape, count, stack = scope.reported[0]
+        pytest.fail(f"N+1 query ({count}x): {shape}\nIssued from:\n{stack}", pytrace=False)
+
+
+@pytest.fixture
+def nplusone(request):
+    if request.node.get_closest_marker("nplusone_allowed"):
+        with nplusone_scope(request.config.getoption("--nplusone-threshold"), action="log") as scope:
+            yield scope                                 # Collect only
+        return
+    with nplusone_scope(request.config.getoption("--nplusone-threshold"), action="raise") as scope:
+        yield scope
+    _fail_on_reports(request, scope)
+
+
+@pytest.fixture(autouse=True)
+def _nplusone_everywhere(request):
+    if not request.config.getoption("--nplusone") or request.node.get_closest_marker("nplusone_allowed"):
+        yield None
+        return
+    with nplusone_scope(request.config.getoption("--nplusone-threshold"), action="raise") as scope:
+        yield scope
+    _fail_on_reports(request, scope)
@@ -0,0 +1,118 @@
+"""Bounded, content-addressed on-disk cache for rendered receipts.
+
+Receipts are rendered lazily from the ``Transaction`` row the first time they
+are requested. The file name is the SHA-256 of the receipt contents plus the
+renderer version, so an evicted receipt re-renders to the same name and the
+same bytes. Hits refresh the file's mtime; when the directory grows past
+``max_bytes`` the least recently used files are deleted.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+RENDER_VERSION = "2"                                   # Bump when the receipt layout changes
+FORMATS = {"json": "application/json", "pdf": "application/pdf"}
+
+
+class ReceiptCache:
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._size = sum(size for _, size, _ in self._entries())
+
+    # --------------------------
+    # Keys and paths
+    # --------------------------
+    @staticmethod
+    def key_for(payload, fmt):
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(f"{RENDER_VERSION}:{fmt}:{canonical}".encode()).hexdigest()
+
+    def path_for(self, key, fmt):
+        return os.path.join(self.root, key[:2], f"{key}.{fmt}")
+
+    # --------------------------
+    # Lookups
+    # --------------------------
+    def open(self, key, fmt):
+        """Return an open binary file for a cached receipt, or None on a miss."""
+        path = self.path_for(key, fmt)
+        try:
+            f = open(path, "rb")                       # Still readable if evicted after this point
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)                             # Mark as recently used
+        except FileNotFoundError:
+            pass
+        return f
+
+    def contains(self, key, fmt):
+        return os.path.exists(self.path_for(key, fmt))
+
+    # --------------------------
+    # Inserts and eviction
+    # --------------------------
+    def put(self, key, fmt, data):
+        path = self.path_for(key, fmt)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file and rename so readers never see a partial receipt
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        try:
+            previous = os.path.getsize(path)           # Overwriting: don't count the old copy twice
+        except FileNotFoundError:
+            previous = 0
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._size += len(data) - previous
+            if self._size > self.max_bytes:
+                self._evict()
+        return path
+
+    def _entries(self):
+        for shard in os.scandir(self.root):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".tmp"):
+                    continue
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:              # Evicted by another worker meanwhile
+                    continue
+                yield entry.path, st.st_size, st.st_mtime
+
+    def _evict(self):
+        # Rescan so files written by other worker processes are accounted for
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)             # Evict below the cap to avoid thrashing
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._size = total
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_receipt_cache(app):
+    """Return the process-wide cache for this app's configured directory."""
+    root = app.config["RECEIPT_DIR"]
+    with _caches_lock:
+        if root not in _caches:
+            _caches[root] = ReceiptCache(root, app.config["RECEIPT_CACHE_MAX_BYTES"])
+        return _caches[root]
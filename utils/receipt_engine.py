@@ -0,0 +1,158 @@
+"""Template-stamped PDF receipt engine.
+
+``generate_pdf_receipt`` builds a reportlab canvas, sets fonts and draws the
+static title and labels for every receipt. Here the static parts of the file
+(header, catalog, page, font objects, the title/label drawing operators and
+most of the xref table) are encoded once per process; rendering a receipt
+only stamps the six variable values into the content stream and patches the
+stream length and ``startxref``. Output is deterministic: the same
+transaction always produces the same bytes.
+"""
+import os
+import threading
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+PAGE_WIDTH, PAGE_HEIGHT = letter
+
+# Fonts are the standard Type1 fonts, so nothing needs embedding
+FONTS = {"F1": "Helvetica", "F2": "Helvetica-Bold"}
+
+# Same positions and text as utils.pdf_generator.generate_pdf_receipt
+TITLE = ("F2", 18, 50, PAGE_HEIGHT - 50, "Transaction Receipt")
+FIELDS = [                                             # (label, y, value getter)
+    ("Transaction ID: ", PAGE_HEIGHT - 120, lambda t: t.id),
+    ("User ID: ", PAGE_HEIGHT - 140, lambda t: t.user_id),
+    ("Account ID: ", PAGE_HEIGHT - 160, lambda t: t.account_id),
+    ("Type: ", PAGE_HEIGHT - 180, lambda t: t.transaction_type),
+    ("Amount: ", PAGE_HEIGHT - 200, lambda t: f"${t.amount}"),
+    ("Date: ", PAGE_HEIGHT - 220, lambda t: t.date_added),
+]
+FIELD_FONT = ("F1", 12)
+
+
+# ============================================================
+# Low-level PDF helpers
+# ============================================================
+
+
+def pdf_text(value):
+    """Encode a value as a PDF literal string body (WinAnsi, escaped)."""
+    text = str(value).replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return text.encode("cp1252", errors="replace")
+
+
+def pdf_number(n):
+    return (f"{n:.2f}".rstrip("0").rstrip(".")).encode()
+
+
+def text_op(font, size, x, y, text):
+    """Content-stream operators that draw ``text`` at (x, y)."""
+    return b"BT /%s %s Tf %s %s Td (%s) Tj ET\n" % (
+        font.encode(), pdf_number(size), pdf_number(x), pdf_number(y), pdf_text(text))
+
+
+def font_objects():
+    """Font object bodies keyed by resource name, shared by our PDFs."""
+    return {name: b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>"
+            % base.encode() for name, base in FONTS.items()}
+
+
+# ============================================================
+# Receipt template (built once per process)
+# ============================================================
+
+
+class ReceiptTemplate:
+    def __init__(self):
+        font_name, font_size = FIELD_FONT
+
+        # Static drawing operators: title and labels
+        static = [text_op(*TITLE)]
+        self._slots = []                               # (operator prefix, getter) per variable value
+        for label, y, getter in FIELDS:
+            static.append(text_op(font_name, font_size, 50, y, label))
+            x = 50 + stringWidth(label, FONTS[font_name], font_size)
+            self._slots.append((b"BT /%s %s Tf %s %s Td (" % (
+                font_name.encode(), pdf_number(font_size), pdf_number(x), pdf_number(y)), getter))
+        self._static_ops = b"".join(static)
+
+        # Objects 1-5 never change; object 6 is the content stream
+        fonts = font_objects()
+        font_refs = b" ".join(b"/%s %d 0 R" % (name.encode(), 4 + i) for i, name in enumerate(fonts))
+        objects = [
+            b"<< /Type /Catalog /Pages 2 0 R >>",
+            b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %s %s] "
+            b"/Resources << /Font << %s >> >> /Contents 6 0 R >>"
+            % (pdf_number(PAGE_WIDTH), pdf_number(PAGE_HEIGHT), font_refs),
+        ] + list(fonts.values())
+
+        head = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(len(head))
+            head += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+        offsets.append(len(head))                      # Content stream always starts here
+        self._head = bytes(head) + b"6 0 obj\n<< /Length "
+
+        xref = b"xref\n0 7\n0000000000 65535 f \n" + b"".join(
+            b"%010d 00000 n \n" % off for off in offsets)
+        self._tail = b"\nendstream\nendobj\n" + xref + b"trailer\n<< /Size 7 /Root 1 0 R >>\nstartxref\n"
+
+    def render(self, transaction):
+        """Return the PDF bytes for one transaction."""
+        ops = [self._static_ops]
+        for prefix, getter in self._slots:
+            ops.append(prefix)
+            ops.append(pdf_text(getter(transaction)))
+            ops.append(b") Tj ET\n")
+        content = b"".join(ops)
+
+        length = b"%d" % len(content)
+        stream_head = self._head + length + b" >>\nstream\n"
+        startxref = len(stream_head) + len(content) + len(b"\nendstream\nendobj\n")
+        return b"".join((stream_head, content, self._tail, b"%d\n%%%%EOF\n" % startxref))
+
+
+_template = None
+_template_lock = threading.Lock()
+
+
+def get_receipt_template():
+    """Return the process-wide receipt template, building it on first use."""
+    global _template
+    if _template is None:
+        with _template_lock:
+            if _template is None:
+                _template = ReceiptTemplate()
+    return _template
+
+
+# ============================================================
+# Public API
+# ============================================================
+
+
+def render_receipt_pdf(transaction):
+    return get_receipt_template().render(transaction)
+
+
+def render_receipts(transactions):
+    """Yield (transaction, pdf_bytes) for many transactions in one pass."""
+    template = get_receipt_template()
+    for transaction in transactions:
+        yield transaction, template.render(transaction)
+
+
+def write_receipts(transactions, directory):
+    """Write ``transaction_<id>.pdf`` for every transaction; returns the paths."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for transaction, data in render_receipts(transactions):
+        path = os.path.join(directory, f"transaction_{transaction.id}.pdf")
+        with open(path, "wb") as f:
+            f.write(data)
+        paths.append(path)
+    return paths
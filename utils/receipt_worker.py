@@ -0,0 +1,127 @@
+"""Database-backed receipt job queue and the worker pool that drains it.
+
+Receipts are rendered lazily: the first status request for a transaction
+queues a ``ReceiptJob`` row, and the JSON/PDF receipts are rendered into the
+receipt cache here, off the request path. Jobs are claimed with a conditional
+UPDATE, so several gunicorn workers (each with its own pool) can share one
+queue without double-rendering.
+"""
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from models import db, ReceiptJob, Transaction
+from utils.receipt_cache import get_receipt_cache
+from utils.receipts import generate_receipts
+
+logger = logging.getLogger(__name__)
+
+_wakeup = threading.Event()                           # Set whenever new jobs are committed
+_lock = threading.Lock()
+_started_pid = None                                   # PID that owns the running pool (fork safety)
+
+
+# ============================================================
+# Producer side (called from the request path)
+# ============================================================
+
+
+def enqueue_receipt(transaction):
+    job = ReceiptJob(transaction=transaction, status="pending")
+    db.session.add(job)
+    return job                  # Return job object (not yet committed)
+
+
+def notify_workers():
+    _wakeup.set()               # Wake idle workers instead of waiting for the next poll
+
+
+# ============================================================
+# Consumer side (worker threads)
+# ============================================================
+
+
+def _claim_next_job(stale_after):
+    now = datetime.utcnow()
+    claimable = or_(
+        ReceiptJob.status == "pending",
+        # Jobs left "running" by a crashed worker are picked up again
+        (ReceiptJob.status == "running") & (ReceiptJob.date_updated < now - stale_after)
+    )
+    job_id = db.session.execute(
+        select(ReceiptJob.id).where(claimable).order_by(ReceiptJob.id).limit(1)
+    ).scalar()
+    if job_id is None:
+        db.session.rollback()
+        return None
+
+    claimed = db.session.execute(
+        update(ReceiptJob)
+        .where(ReceiptJob.id == job_id, claimable)
+        .values(status="running", attempts=ReceiptJob.attempts + 1, date_updated=now)
+    ).rowcount
+    db.session.commit()
+    return job_id if claimed == 1 else None           # Another worker won the race
+
+
+def _run_job(job_id, cache, max_attempts):
+    job = db.session.get(ReceiptJob, job_id)
+    try:
+        txn = db.session.get(Transaction, job.transaction_id)
+        json_path, pdf_path, _ = generate_receipts(txn, cache)
+        job.status = "done"
+        job.error = None
+        job.receipt_json = json_path
+        job.receipt_pdf = pdf_path
+    except Exception as exc:                          # Keep the worker alive; record the failure
+        logger.exception("Receipt job %s failed", job_id)
+        job.status = "pending" if job.attempts < max_attempts else "failed"
+        job.error = str(exc)
+    job.date_updated = datetime.utcnow()
+    db.session.commit()
+
+
+def process_pending_jobs(app, limit=None):
+    """Drain the queue in the calling thread; returns the number of jobs run."""
+    processed = 0
+    with app.app_context():
+        stale_after = timedelta(seconds=app.config["RECEIPT_JOB_TIMEOUT"])
+        cache = get_receipt_cache(app)
+        while limit is None or processed < limit:
+            job_id = _claim_next_job(stale_after)
+            if job_id is None:
+                break
+            _run_job(job_id, cache, app.config["RECEIPT_MAX_ATTEMPTS"])
+            processed += 1
+    return processed
+
+
+def _worker_loop(app):
+    interval = app.config["RECEIPT_POLL_INTERVAL"]
+    while True:
+        try:
+            if process_pending_jobs(app):
+                continue                              # Queue may still have work
+        except SQLAlchemyError:                       # e.g. tables not created yet, DB restarting
+            logger.warning("Receipt worker could not poll the queue", exc_info=True)
+        _wakeup.wait(interval)
+        _wakeup.clear()
+
+
+def start_receipt_workers(app):
+    """Start the receipt worker pool once per process (safe to call on every request)."""
+    global _started_pid
+    if _started_pid == os.getpid():
+        return
+    with _lock:
+        if _started_pid == os.getpid():
+            return
+        for n in range(app.config["RECEIPT_WORKERS"]):
+            threading.Thread(
+                target=_worker_loop, args=(app,), name=f"receipt-worker-{n}", daemon=True
+            ).start()
+        _started_pid = os.getpid()
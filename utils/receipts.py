@@ -0,0 +1,69 @@
+from utils.receipt_engine import render_receipt_pdf    # Template-stamped, deterministic PDFs
+from utils.metrics import registry, timed              # Render-time histograms for /metrics
+from io import BytesIO
+import json
+import time
+
+
+# ============================================================
+# Helper: Build the JSON receipt for a transaction
+# ============================================================
+
+
+def build_json_receipt(transaction):
+    return {
+        "receipt_id": f"tx-{transaction.id}",
+        "transaction_id": transaction.id,
+        "user_id": transaction.user_id,
+        "account_id": transaction.account_id,
+        "transaction_type": transaction.transaction_type,
+        "amount": str(transaction.amount),
+        "date": transaction.date_added.isoformat()
+    }
+
+# ============================================================
+# Helper: Render one receipt format to bytes
+# ============================================================
+
+
+def render_receipt(transaction, fmt):
+    started = time.perf_counter()
+    if fmt == "json":
+        data = json.dumps(build_json_receipt(transaction), indent=4, sort_keys=True).encode()
+    else:
+        data = render_receipt_pdf(transaction)
+    registry.observe("receipt_render_seconds", time.perf_counter() - started, (("format", fmt),))
+    return data
+
+# ============================================================
+# Helper: Open a receipt from the cache, rendering it on a miss
+# ============================================================
+
+
+def open_receipt(transaction, fmt, cache):
+    key = cache.key_for(build_json_receipt(transaction), fmt)
+    f = cache.open(key, fmt)
+    if f is None:
+        data = render_receipt(transaction, fmt)
+        cache.put(key, fmt, data)
+        f = cache.open(key, fmt) or BytesIO(data)  # Tiny caps may evict it straight away
+    return f
+
+# ============================================================
+# Helper: Make sure JSON + PDF receipts are in the cache
+# ============================================================
+
+
+@timed("receipt_generate_seconds")
+def generate_receipts(transaction, cache):
+    json_receipt = build_json_receipt(transaction)
+
+    paths = []
+    for fmt in ("json", "pdf"):
+        key = cache.key_for(json_receipt, fmt)
+        if not cache.contains(key, fmt):
+            cache.put(key, fmt, render_receipt(transaction, fmt))
+        paths.append(cache.path_for(key, fmt))
+
+    json_path, pdf_path = paths
+    return json_path, pdf_path, json_receipt
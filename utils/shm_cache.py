@@ -0,0 +1,299 @@
+"""Cache shared by every worker process on a host, backed by a memory-mapped file.
+
+The file (``SHARED_CACHE_PATH``, on /dev/shm by default) holds a fixed grid of
+slots: ``nsets`` sets of ``ways`` slots, ``slot_size`` bytes each. A key hashes
+to one set and may live in any slot of it, so an insert only ever evicts
+within its set, choosing the least recently used slot.
+
+* Reads take no locks. Each slot starts with a sequence number that writers
+  make odd while they change the slot and even again when done; a reader
+  retries if it saw an odd number or the number changed under it (seqlock).
+* Writes lock only their set: a thread lock stripe (fcntl locks don't
+  exclude threads of one process) plus an fcntl byte-range lock shared by
+  all processes.
+
+Values are stored as JSON, with datetimes, dates and Decimals tagged so they
+round-trip. Entries that don't fit in a slot are simply not cached. Hit and
+miss counters are per process.
+"""
+import fcntl
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from hashlib import blake2b
+
+MAGIC = b"BANKSHM1"
+HEADER = struct.Struct("<8sIII")                       # magic, nsets, ways, slot_size
+HEADER_SIZE = 64
+SEQ = struct.Struct("<I")
+SLOT = struct.Struct("<QddHI")                         # key hash, expires_at, last_used, key length, value length
+SLOT_DATA = 8 + SLOT.size + 2                          # seq (padded to 8) + fields, rounded to 40 bytes
+READ_RETRIES = 16
+LOCK_STRIPES = 256
+
+
+def default_path():
+    root = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(root, "bank-backend-cache")
+
+
+def _default(o):
+    if isinstance(o, datetime):
+        return {"__datetime__": o.isoformat()}
+    if isinstance(o, date):
+        return {"__date__": o.isoformat()}
+    if isinstance(o, Decimal):
+        return {"__decimal__": str(o)}
+    raise TypeError(f"{type(o).__name__} is not cacheable")
+
+
+def _object_hook(d):
+    if len(d) == 1:
+        if "__datetime__" in d:
+            return datetime.fromisoformat(d["__datetime__"])
+        if "__date__" in d:
+            return date.fromisoformat(d["__date__"])
+        if "__decimal__" in d:
+            return Decimal(d["__decimal__"])
+    return d
+
+
+def encode(value):
+    return json.dumps(value, default=_default, separators=(",", ":")).encode()
+
+
+def decode(data):
+    return json.loads(data, object_hook=_object_hook)
+
+
+class SharedMemoryCache:
+    """Set-associative LRU cache in a shared mmap; same interface as ``TTLCache``."""
+
+    def __init__(self, path, slots=16384, slot_size=1024, ways=8, ttl=300):
+        if slot_size <= SLOT_DATA:
+            raise ValueError(f"slot_size must be larger than {SLOT_DATA} bytes")
+        self.path = path
+        self.ways = ways
+        self.nsets = max(1, slots // ways)
+        self.slot_size = slot_size
+        self.maxsize = self.nsets * ways
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._locks = [threading.Lock() for _ in range(min(self.nsets, LOCK_STRIPES))]
+        self._fd, self._mm = self._open()
+
+    def _open(self):
+        size = HEADER_SIZE + self.maxsize * self.slot_size
+        header = HEADER.pack(MAGIC, self.nsets, self.ways, self.slot_size)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.lockf(fd, fcntl.LOCK_EX, 1, 0)       # Byte 0 guards initialisation
+            try:
+                existing = os.pread(fd, HEADER.size, 0)
+                if existing[:len(MAGIC)] != MAGIC:
+                    os.ftruncate(fd, size)             # New file: zeroed slots are empty
+                    os.pwrite(fd, header, 0)
+                elif existing != header or os.fstat(fd).st_size != size:
+                    raise ValueError(f"{self.path} was created with a different layout; "
+                                     "use the same settings in every worker or remove the file")
+            finally:
+                fcntl.lockf(fd, fcntl.LOCK_UN, 1, 0)
+            return fd, mmap.mmap(fd, size)
+        except BaseException:
+            os.close(fd)
+            raise
+
+    # ------------------------------------------------------------
+    # Layout helpers
+    # ------------------------------------------------------------
+
+    def _locate(self, key):
+        kb = key.encode()
+        h = int.from_bytes(blake2b(kb, digest_size=8).digest(), "little")
+        return kb, h, h % self.nsets
+
+    def _slot_offset(self, set_index, way):
+        return HEADER_SIZE + (set_index * self.ways + way) * self.slot_size
+
+    def _lock(self, set_index):
+        lock = self._locks[set_index % len(self._locks)]
+        lock.acquire()
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, 1 + set_index)
+        return lock
+
+    def _unlock(self, set_index, lock):
+        fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, 1 + set_index)
+        lock.release()
+
+    def _find(self, kb, h, set_index):
+        """Way holding ``kb`` (caller holds the set lock), or None."""
+        mm = self._mm
+        for way in range(self.ways):
+            off = self._slot_offset(set_index, way)
+            slot_hash, _, _, key_len, _ = SLOT.unpack_from(mm, off + 8)
+            if key_len and slot_hash == h and mm[off + SLOT_DATA:off + SLOT_DATA + key_len] == kb:
+                return way
+        return None
+
+    def _write(self, off, fields, payload=b""):
+        mm = self._mm
+        seq = SEQ.unpack_from(mm, off)[0]
+        SEQ.pack_into(mm, off, (seq + 1) & 0xFFFFFFFF)  # Odd: readers back off
+        SLOT.pack_into(mm, off + 8, *fields)
+        if payload:
+            mm[off + SLOT_DATA:off + SLOT_DATA + len(payload)] = payload
+        SEQ.pack_into(mm, off, (seq + 2) & 0xFFFFFFFF)
+
+    # ------------------------------------------------------------
+    # Cache interface
+    # ------------------------------------------------------------
+
+    def get(self, key, default=None):
+        kb, h, set_index = self._locate(key)
+        mm = self._mm
+        for way in range(self.ways):
+            off = self._slot_offset(set_index, way)
+            for _ in range(READ_RETRIES):
+                seq = SEQ.unpack_from(mm, off)[0]
+                if seq & 1:
+                    continue                           # Writer in progress
+                slot_hash, expires_at, _, key_len, val_len = SLOT.unpack_from(mm, off + 8)
+                if not key_len or slot_hash != h:
+                    data = None
+                else:
+                    start = off + SLOT_DATA
+                    data = mm[start:start + key_len + val_len]
+                if SEQ.unpack_from(mm, off)[0] != seq:
+                    continue                           # Slot changed while we read it
+                break
+            else:
+                continue                               # Slot too busy; treat as a miss for this way
+            if data is None or data[:key_len] != kb:
+                continue
+            now = time.time()
+            if expires_at < now:
+                break
+            struct.pack_into("<d", mm, off + 8 + 16, now)   # Approximate LRU; races only reorder eviction
+            self.hits += 1
+            return decode(data[key_len:])
+        self.misses += 1
+        return default
+
+    def set(self, key, value, ttl=None):
+        kb, h, set_index = self._locate(key)
+        payload = kb + encode(value)
+        if SLOT_DATA + len(payload) > self.slot_size:
+            return                                     # Too large for a slot; not cached
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        lock = self._lock(set_index)
+        try:
+            way = self._find(kb, h, set_index)
+            if way is None:
+                way = self._victim(set_index, now)
+            self._write(self._slot_offset(set_index, way),
+                        (h, expires_at, now, len(kb), len(payload) - len(kb)), payload)
+        finally:
+            self._unlock(set_index, lock)
+
+    def _victim(self, set_index, now):
+        """Empty or expired slot if there is one, else the least recently used."""
+        oldest_way, oldest_used = 0, None
+        for way in range(self.ways):
+            _, expires_at, last_used, key_len, _ = SLOT.unpack_from(self._mm, self._slot_offset(set_index, way) + 8)
+            if not key_len or expires_at < now:
+                return way
+            if oldest_used is None or last_used < oldest_used:
+                oldest_way, oldest_used = way, last_used
+        self.evictions += 1
+        return oldest_way
+
+    def delete(self, key):
+        kb, h, set_index = self._locate(key)
+        lock = self._lock(set_index)
+        try:
+            way = self._find(kb, h, set_index)
+            if way is not None:
+                self._write(self._slot_offset(set_index, way), (0, 0.0, 0.0, 0, 0))
+        finally:
+            self._unlock(set_index, lock)
+
+    def clear(self, prefix=""):
+        """Empty every slot (or only keys starting with ``prefix``)."""
+        pb = prefix.encode()
+        for set_index in range(self.nsets):
+            lock = self._lock(set_index)
+            try:
+                for way in range(self.ways):
+                    off = self._slot_offset(set_index, way)
+                    key_len = SLOT.unpack_from(self._mm, off + 8)[3]
+                    if key_len and self._mm[off + SLOT_DATA:off + SLOT_DATA + key_len].startswith(pb):
+                        self._write(off, (0, 0.0, 0.0, 0, 0))
+            finally:
+                self._unlock(set_index, lock)
+
+    def stats(self):
+        return {"backend": "shared", "path": self.path, "size": len(self), "maxsize": self.maxsize,
+                "slot_size": self.slot_size, "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions}
+
+    def __len__(self):
+        now = time.time()
+        count = 0
+        for i in range(self.maxsize):
+            _, expires_at, _, key_len, _ = SLOT.unpack_from(self._mm, HEADER_SIZE + i * self.slot_size + 8)
+            count += bool(key_len) and expires_at >= now
+        return count
+
+
+class Namespace:
+    """Prefixes keys so several caches can share one ``SharedMemoryCache``."""
+
+    def __init__(self, shared, prefix, ttl):
+        self.shared = shared
+        self.prefix = prefix + ":"
+        self.ttl = ttl
+
+    def get(self, key, default=None):
+        return self.shared.get(self.prefix + str(key), default)
+
+    def set(self, key, value, ttl=None):
+        self.shared.set(self.prefix + str(key), value, self.ttl if ttl is None else ttl)
+
+    def delete(self, key):
+        self.shared.delete(self.prefix + str(key))
+
+    def clear(self):
+        self.shared.clear(self.prefix)
+
+    def stats(self):
+        return self.shared.stats()
+
+    def __len__(self):
+        return len(self.shared)
+
+
+_shared = None
+_shared_pid = None
+
+
+def get_shared_cache(app):
+    """The process's handle on the host-wide cache file (re-opened after fork)."""
+    global _shared, _shared_pid
+    if _shared is None or _shared_pid != os.getpid():
+        _shared = SharedMemoryCache(
+            app.config["SHARED_CACHE_PATH"] or default_path(),
+            slots=app.config["SHARED_CACHE_SLOTS"],
+            slot_size=app.config["SHARED_CACHE_SLOT_SIZE"],
+            ways=app.config["SHARED_CACHE_WAYS"],
+        )
+        _shared_pid = os.getpid()
+    return _shared
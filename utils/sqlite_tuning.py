@@ -0,0 +1,112 @@
+"""SQLite profile for the local/edge fallback database.
+
+``configure_sqlite(app)`` sets pragmas on every new connection of the app's
+SQLite engines:
+
+* ``journal_mode=WAL``: readers and the writer no longer block each other.
+* ``synchronous=NORMAL``: with WAL this only risks the last commits on power
+  loss, never corruption.
+* ``busy_timeout``: writers wait for the lock instead of failing at once
+  with "database is locked".
+* ``mmap_size`` and ``cache_size``: reads come from mapped pages and a larger
+  page cache.
+
+Other apps and ad-hoc engines in the process (tests, benchmarks) keep
+SQLite's defaults.
+
+SQLite still allows one writer at a time. ``SingleWriter`` runs the ledger's
+money-moving transactions one after another on a dedicated thread, so a
+process's request threads queue in Python instead of spinning on the file
+lock. Readers are not queued.
+
+The writer only serializes within one process. With several gunicorn
+workers on one SQLite file, their writers still contend for the file lock:
+``busy_timeout`` makes them wait for it, and the ledger retries the
+"database is locked" errors that remain (e.g. past the timeout). For
+sustained write traffic run one worker (with threads) on SQLite, or use
+Postgres.
+"""
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import event
+
+from models import db
+
+
+def is_sqlite(app):
+    return app.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite")
+
+
+def pragmas(config):
+    return [
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}",
+        f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE'])}",
+        f"PRAGMA cache_size=-{int(config['SQLITE_CACHE_SIZE_KB'])}",   # Negative = KiB, not pages
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+
+def configure_sqlite(app):
+    """Apply the SQLite profile to new connections of ``app``'s SQLite engines (no-op unless SQLITE_TUNED)."""
+    if not app.config["SQLITE_TUNED"] or "sqlite_tuning" in app.extensions:
+        return
+    statements = pragmas(app.config)
+
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.close()
+
+    with app.app_context():
+        for engine in db.engines.values():             # Primary and any replica binds
+            if engine.dialect.name == "sqlite":
+                event.listen(engine, "connect", set_pragmas)
+    app.extensions["sqlite_tuning"] = statements
+
+
+class SingleWriter:
+    """One thread that runs write transactions in submission order."""
+
+    def __init__(self, app):
+        self.app = app
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-writer")
+        self._local = threading.local()
+
+    def run(self, fn, *args):
+        """Run ``fn(*args)`` in its own app context (and session) on the writer thread."""
+        if getattr(self._local, "active", False):      # Already on the writer thread
+            return fn(*args)
+        # copy_context: per-request instrumentation (utils/metrics.py) follows the work
+        return self._executor.submit(contextvars.copy_context().run, self._call, fn, args).result()
+
+    def _call(self, fn, args):
+        self._local.active = True
+        try:
+            with self.app.app_context():
+                return fn(*args)
+        finally:
+            self._local.active = False
+
+
+_writer = None
+_writer_pid = None
+_lock = threading.Lock()
+
+
+def get_writer(app):
+    """This process's single writer, or None unless the app runs on SQLite with SQLITE_SINGLE_WRITER."""
+    global _writer, _writer_pid
+    if not (app.config["SQLITE_SINGLE_WRITER"] and is_sqlite(app)):
+        return None
+    if _writer_pid != os.getpid():
+        with _lock:
+            if _writer_pid != os.getpid():
+                _writer = SingleWriter(app)
+                _writer_pid = os.getpid()
+    return _writer
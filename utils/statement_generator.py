@@ -0,0 +1,242 @@
+"""Monthly PDF account statements.
+
+``generate_statement`` streams an account's ``Transaction`` rows for a period
+(server-side, ``yield_per``) into one multi-page PDF, writing each page as
+soon as it is full so memory stays flat regardless of volume.
+``generate_all_statements`` fans the work for every account out across a
+process pool sized to the cores this process may use.
+
+Run from the repo root:  python -m utils.statement_generator 2026-09 --out statements
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from decimal import Decimal
+
+from flask import Flask
+from sqlalchemy import case, func, select
+
+from models import db, Account, Transaction
+from utils.receipt_engine import PAGE_HEIGHT, PAGE_WIDTH, pdf_number, font_objects, text_op
+
+ROWS_PER_PAGE = 40
+ROW_HEIGHT = 15
+TOP = PAGE_HEIGHT - 50
+COLUMNS = [("Date", 50), ("Transaction", 200), ("Type", 290), ("Amount", 390), ("Balance", 480)]
+
+# Sign applied to each transaction type when computing balances
+SIGNED_AMOUNT = case(
+    (Transaction.transaction_type.in_(["withdrawal", "transfer_out"]), -Transaction.amount),
+    else_=Transaction.amount
+)
+
+
+# ============================================================
+# Streaming multi-page PDF writer
+# ============================================================
+
+
+class StatementWriter:
+    """Write pages to ``f`` as they are produced; the page tree goes last."""
+
+    CATALOG, PAGES = 1, 2
+
+    def __init__(self, f):
+        self._f = f
+        self._pos = 0
+        self._offsets = {}
+        self._kids = []
+        self._next = 3
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._font_refs = []
+        for name, body in font_objects().items():
+            number = self._object(body)
+            self._font_refs.append(b"/%s %d 0 R" % (name.encode(), number))
+
+    def _write(self, data):
+        self._f.write(data)
+        self._pos += len(data)
+
+    def _object(self, body, number=None):
+        if number is None:
+            number, self._next = self._next, self._next + 1
+        self._offsets[number] = self._pos
+        self._write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+        return number
+
+    def add_page(self, content):
+        contents = self._object(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+        self._kids.append(self._object(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %s %s] "
+            b"/Resources << /Font << %s >> >> /Contents %d 0 R >>"
+            % (self.PAGES, pdf_number(PAGE_WIDTH), pdf_number(PAGE_HEIGHT), b" ".join(self._font_refs), contents)))
+
+    def close(self):
+        kids = b" ".join(b"%d 0 R" % k for k in self._kids)
+        self._object(b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self._kids)), self.PAGES)
+        self._object(b"<< /Type /Catalog /Pages %d 0 R >>" % self.PAGES, self.CATALOG)
+
+        xref_at = self._pos
+        size = self._next
+        self._write(b"xref\n0 %d\n0000000000 65535 f \n" % size)
+        self._write(b"".join(b"%010d 00000 n \n" % self._offsets[n] for n in range(1, size)))
+        self._write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                    % (size, self.CATALOG, xref_at))
+
+
+# ============================================================
+# Single statement
+# ============================================================
+
+
+def month_bounds(month):
+    """'2026-09' -> (datetime(2026, 9, 1), datetime(2026, 10, 1))"""
+    start = datetime.strptime(month, "%Y-%m")
+    end = start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+    return start, end
+
+
+def _page_header(account, start, end, page_no):
+    ops = [
+        text_op("F2", 16, 50, TOP, "Account Statement"),
+        text_op("F1", 10, 50, TOP - 20, f"Account ID: {account.id}    User ID: {account.user_id}    "
+                                         f"Type: {account.account_type}"),
+        text_op("F1", 10, 50, TOP - 34, f"Period: {start.date()} to {end.date()}    Page {page_no}"),
+    ]
+    ops += [text_op("F2", 10, x, TOP - 60, title) for title, x in COLUMNS]
+    return ops
+
+
+def generate_statement(account_id, start, end, path):
+    """Write the statement for one account and period to ``path``. Needs an app context."""
+    account = db.session.get(Account, account_id)
+    if account is None:
+        raise ValueError(f"Account {account_id} not found")
+
+    # Opening balance = current balance minus everything booked since the period start
+    since_start = db.session.execute(
+        select(func.coalesce(func.sum(SIGNED_AMOUNT), 0))
+        .where(Transaction.account_id == account_id, Transaction.date_added >= start)
+    ).scalar()
+    opening = Decimal(account.balance or 0) - Decimal(since_start)
+
+    rows = db.session.execute(
+        select(Transaction.id, Transaction.date_added, Transaction.transaction_type,
+               Transaction.amount, SIGNED_AMOUNT)
+        .where(Transaction.account_id == account_id,
+               Transaction.date_added >= start, Transaction.date_added < end)
+        .order_by(Transaction.date_added, Transaction.id)
+        .execution_options(yield_per=500)
+    )
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    try:
+        _write_statement(tmp_path, account, start, end, opening, rows)
+        os.replace(tmp_path, path)                     # Never leave a half-written statement behind
+    finally:
+        if os.path.exists(tmp_path):                   # Rendering failed part-way
+            os.remove(tmp_path)
+    return path
+
+
+def _write_statement(tmp_path, account, start, end, opening, rows):
+    balance = opening
+    with open(tmp_path, "wb") as f:
+        writer = StatementWriter(f)
+        page_no = 1
+        ops = _page_header(account, start, end, page_no)
+        ops.append(text_op("F1", 10, 50, TOP - 76, f"Opening balance: ${opening:.2f}"))
+        line = 1
+        count = 0
+        for txn_id, date_added, txn_type, amount, signed in rows:
+            if line > ROWS_PER_PAGE:                   # Flush the full page and start the next one
+                writer.add_page(b"".join(ops))
+                page_no += 1
+                ops = _page_header(account, start, end, page_no)
+                line = 0
+            balance += Decimal(signed)
+            y = TOP - 76 - line * ROW_HEIGHT
+            for value, (_, x) in zip(
+                    (date_added.strftime("%Y-%m-%d %H:%M"), txn_id, txn_type, f"${amount:.2f}", f"${balance:.2f}"),
+                    COLUMNS):
+                ops.append(text_op("F1", 10, x, y, value))
+            line += 1
+            count += 1
+
+        y = TOP - 76 - (line + 1) * ROW_HEIGHT
+        ops.append(text_op("F2", 10, 50, max(y, 40), f"Closing balance: ${balance:.2f}    "
+                                                    f"Transactions: {count}"))
+        writer.add_page(b"".join(ops))
+        writer.close()
+
+
+# ============================================================
+# Batch mode (process pool)
+# ============================================================
+
+
+_worker_app = None                                    # Per-process app built by _init_worker
+
+
+def _init_worker(config):
+    # A fresh app (and engine) per worker: nothing inherited from the parent is
+    # reused, and statements come from the database of the app that was passed in
+    global _worker_app
+    _worker_app = Flask(__name__)
+    _worker_app.config.update(config)
+    db.init_app(_worker_app)
+
+
+def _statement_task(task):
+    account_id, start, end, path = task
+    with _worker_app.app_context():
+        return generate_statement(account_id, start, end, path)
+
+
+def available_cpus():
+    """CPUs this process may run on (respects affinity masks and container cpusets)."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def generate_all_statements(app, start, end, out_dir, workers=None):
+    """Render statements for every account in parallel; returns the written paths."""
+    with app.app_context():
+        account_ids = db.session.execute(select(Account.id).order_by(Account.id)).scalars().all()
+        db.engine.dispose()                            # Don't hand open connections to the children
+
+    period = start.strftime("%Y-%m")
+    tasks = [(aid, start, end, os.path.join(out_dir, period, f"account_{aid}.pdf")) for aid in account_ids]
+    workers = workers or available_cpus()
+    config = {k: v for k, v in app.config.items() if k.startswith("SQLALCHEMY_")}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(config,)) as pool:
+        chunksize = max(1, len(tasks) // (workers * 8))
+        return list(pool.map(_statement_task, tasks, chunksize=chunksize))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate monthly account statements")
+    parser.add_argument("month", help="statement month, YYYY-MM")
+    parser.add_argument("--out", default="statements", help="output directory")
+    parser.add_argument("--account", type=int, help="only this account (runs in-process)")
+    parser.add_argument("--workers", type=int, help="process pool size (default: available CPUs)")
+    args = parser.parse_args()
+
+    from app import app
+    start, end = month_bounds(args.month)
+    if args.account:
+        with app.app_context():
+            print(generate_statement(args.account, start, end,
+                                     os.path.join(args.out, args.month, f"account_{args.account}.pdf")))
+        return
+
+    began = datetime.now()
+    paths = generate_all_statements(app, start, end, args.out, args.workers)
+    print(f"Generated {len(paths)} statements in {(datetime.now() - began).total_seconds():.1f}s")
+
+
+if __name__ == "__main__":
+    main()
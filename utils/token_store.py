@@ -0,0 +1,65 @@
+"""Revocation store for JWTs (used for refresh-token rotation and logout).
+
+Revoked JTIs live in the ``revoked_tokens`` table; a TTL cache (in-process
+or host-wide, see ``CACHE_BACKEND``) in front of it answers repeat checks without a query. Revoking inserts a row
+under a unique constraint, so a refresh token can only ever be rotated once,
+even when two workers see it at the same time.
+"""
+import random
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+
+from models import db, RevokedToken
+from utils.cache import make_cache
+
+PURGE_PROBABILITY = 0.01                               # Share of revocations that also purge expired rows
+
+_revoked = None
+
+
+def _cache():
+    global _revoked
+    if _revoked is None:
+        _revoked = make_cache(current_app, "revoked", current_app.config["TOKEN_REVOCATION_CACHE_SIZE"],
+                              int(current_app.config["JWT_REFRESH_TOKEN_EXPIRES"]))
+    return _revoked
+
+
+def _remaining(jwt_payload):
+    return max(1, int(jwt_payload["exp"] - datetime.utcnow().timestamp()))
+
+
+def is_revoked(jwt_payload):
+    """True if the token's JTI has been revoked (cache first, then database)."""
+    jti = jwt_payload["jti"]
+    if _cache().get(jti):
+        return True
+    revoked = db.session.query(RevokedToken.id).filter_by(jti=jti).first() is not None
+    if revoked:
+        _cache().set(jti, True, ttl=_remaining(jwt_payload))
+    return revoked
+
+
+def revoke(jwt_payload):
+    """Revoke a token; returns False if it had already been revoked (e.g. reused refresh token)."""
+    if random.random() < PURGE_PROBABILITY:
+        db.session.execute(delete(RevokedToken).where(RevokedToken.expires_at <= datetime.utcnow()))
+
+    db.session.add(RevokedToken(
+        jti=jwt_payload["jti"],
+        token_type=jwt_payload.get("type", "access"),
+        user_id=int(jwt_payload["sub"]),
+        expires_at=datetime.utcfromtimestamp(jwt_payload["exp"])
+    ))
+    try:
+        db.session.commit()
+    except IntegrityError:                             # Unique jti: someone else revoked it first
+        db.session.rollback()
+        _cache().set(jwt_payload["jti"], True, ttl=_remaining(jwt_payload))
+        return False
+    # Only cache what the database recorded; any other error propagates uncached
+    _cache().set(jwt_payload["jti"], True, ttl=_remaining(jwt_payload))
+    return True
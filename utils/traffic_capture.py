@@ -0,0 +1,198 @@
+"""Opt-in capture of live traffic as sanitized JSONL, for replay benchmarks.
+
+With ``CAPTURE_ENABLED`` every request appends one record to
+``CAPTURE_PATH``:
+
+    {"ts": 1760000000.123, "method": "POST", "route": "/transactions/deposit",
+     "path": "/transactions/deposit", "query": {}, "auth": false, "idempotency_key": false,
+     "body": {"account_id": 3, "amount": "12.50"}, "status": 201, "duration_ms": 4.2,
+     "response_bytes": 311}
+
+What is kept and what is redacted:
+
+* Numbers (ids, amounts, also as numeric strings) and operation types are kept.
+* Credentials and personal fields are replaced with ``"<redacted>"``.
+* Other strings become ``"<str:LEN>"``.
+* Query values survive only for the paging/filter keys.
+* Paths with string parameters (e.g. usernames) keep only the route
+  template. Headers are reduced to flags.
+
+Requests only queue their record; a background thread per process writes
+them in chunks. Each chunk is written under an flock, so gunicorn workers
+can share one file, and the file rotates like
+``RotatingFileHandler`` (``path.1`` ... ``path.N``). benchmarks/replay.py
+re-issues a capture.
+"""
+import atexit
+import fcntl
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+
+from flask import g, request
+
+SENSITIVE_FIELDS = {"password", "username", "email", "name", "dob", "job",
+                    "access_token", "refresh_token", "token"}
+SAFE_FIELDS = {"type", "transaction_type", "account_type"}   # Enum-like strings kept verbatim
+SAFE_QUERY_KEYS = {"limit", "cursor", "format", "from", "to", "bucket"}
+REDACTED = "<redacted>"
+NUMERIC = re.compile(r"^-?\d+(\.\d+)?$")                # Amounts sent as strings
+
+logger = logging.getLogger(__name__)
+
+
+def sanitize(value, key=None):
+    """Payload shape with personal data removed (numbers, booleans and enum fields kept)."""
+    if key in SENSITIVE_FIELDS and value is not None:
+        return REDACTED
+    if isinstance(value, dict):
+        return {k: sanitize(v, k) for k, v in value.items()}
+    if isinstance(value, list):
+        return [sanitize(v, key) for v in value]
+    if isinstance(value, str):
+        return value if key in SAFE_FIELDS or NUMERIC.match(value) else f"<str:{len(value)}>"
+    return value
+
+
+class CaptureWriter:
+    """Size-rotated JSONL appender fed from a queue, shared safely by threads and processes.
+
+    ``write`` only enqueues the record. A background thread per process
+    serializes and appends queued records every ``flush_interval`` seconds,
+    or as soon as ``buffer_size`` are waiting, so the flock and the file I/O
+    stay off the request path.
+    """
+
+    def __init__(self, path, max_bytes, backups, buffer_size, flush_interval):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self._queue = queue.SimpleQueue()
+        self._due = threading.Event()                  # Set when a full buffer is waiting
+        self._io_lock = threading.Lock()               # Writer thread vs. flush() at exit
+        self._lock = threading.Lock()
+        self._thread_pid = None                        # PID that owns the writer thread (fork safety)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        atexit.register(self.flush)
+
+    def write(self, record):
+        self._ensure_thread()
+        self._queue.put(record)
+        if self._queue.qsize() >= self.buffer_size:
+            self._due.set()
+
+    def _ensure_thread(self):
+        if self._thread_pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread_pid == os.getpid():
+                return
+            if self._thread_pid is not None:           # Forked: the parent keeps its own queue
+                self._queue = queue.SimpleQueue()
+                self._io_lock = threading.Lock()
+            threading.Thread(target=self._run, name="traffic-capture", daemon=True).start()
+            self._thread_pid = os.getpid()
+
+    def _run(self):
+        while True:
+            self._due.wait(self.flush_interval)
+            self._due.clear()
+            try:
+                self.flush()
+            except OSError:                            # Keep capturing; the next flush may succeed
+                logger.warning("Could not write traffic capture to %s", self.path, exc_info=True)
+
+    def flush(self):
+        """Append everything queued so far (normally called by the writer thread)."""
+        with self._io_lock:
+            lines = []
+            while True:
+                try:
+                    record = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                lines.append(json.dumps(record, separators=(",", ":"), default=str) + "\n")
+            if not lines:
+                return
+            data = "".join(lines).encode()
+            with open(self.path + ".lock", "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)  # One writer (process) at a time
+                try:
+                    if self._size() + len(data) > self.max_bytes:
+                        self._rotate()
+                    with open(self.path, "ab") as f:
+                        f.write(data)
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _size(self):
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def _rotate(self):
+        if self.backups <= 0:                          # No history kept: start over
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if os.path.exists(self.path):
+            os.replace(self.path, f"{self.path}.1")
+
+
+def _record(response):
+    started = g.pop("capture_started", None)
+    if started is None:
+        return
+    view_args = request.view_args or {}
+    has_text_args = any(isinstance(v, str) for v in view_args.values())
+    body = request.get_json(silent=True) if request.is_json else None
+    return {
+        "ts": round(g.pop("capture_ts"), 3),
+        "method": request.method,
+        "route": request.url_rule.rule if request.url_rule else None,
+        "path": None if has_text_args else request.path,
+        "query": {k: (v if k in SAFE_QUERY_KEYS else REDACTED) for k, v in request.args.items()},
+        "auth": "Authorization" in request.headers,
+        "idempotency_key": "Idempotency-Key" in request.headers,
+        "body": sanitize(body) if body is not None else None,
+        "status": response.status_code,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+        "response_bytes": response.calculate_content_length(),
+    }
+
+
+def init_capture(app):
+    """Register the capture hooks (no-op unless CAPTURE_ENABLED)."""
+    if not app.config["CAPTURE_ENABLED"]:
+        return
+    writer = CaptureWriter(
+        app.config["CAPTURE_PATH"],
+        max_bytes=app.config["CAPTURE_MAX_BYTES"],
+        backups=app.config["CAPTURE_BACKUPS"],
+        buffer_size=app.config["CAPTURE_BUFFER_RECORDS"],
+        flush_interval=app.config["CAPTURE_FLUSH_INTERVAL"],
+    )
+    app.extensions["traffic_capture"] = writer
+
+    @app.before_request
+    def _capture_start():
+        g.capture_ts = time.time()
+        g.capture_started = time.perf_counter()
+
+    @app.after_request
+    def _capture_end(response):
+        record = _record(response)
+        if record is not None:
+            writer.write(record)
+        return response